@@ -0,0 +1,137 @@
+"""
+Control de admisión para /login.
+
+bcrypt es lo más caro de la API: una ráfaga de logins (credential stuffing,
+reconexión masiva tras un despliegue) ocupa todos los núcleos y arrastra al
+resto de rutas. Antes de tocar la base o el pool de hashing, cada login pasa:
+
+  1. un token bucket por IP       -> 429 + Retry-After
+  2. un token bucket por email    -> 429 + Retry-After
+  3. un tope global de logins en curso (consulta + bcrypt) -> 503 + Retry-After
+
+Los rechazos no cuestan nada de CPU. Los buckets viven en un LRU de tamaño
+fijo (LOGIN_LIMITER_MAX_KEYS): al llenarse se olvidan los menos recientes,
+que vuelven con el bucket lleno. El estado es por proceso; con N workers de
+serve.py los límites efectivos son N veces los configurados.
+
+Un rate de 0 desactiva ese bucket; LOGIN_ADMISSION=0 desactiva todo.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from auth import HASH_WORKERS
+
+LOGIN_ADMISSION = os.getenv("LOGIN_ADMISSION", "1").lower() in ("1", "true", "yes")
+# Intentos por segundo y ráfaga por IP y por email
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "1"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_EMAIL_RATE = float(os.getenv("LOGIN_EMAIL_RATE", "0.2"))
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+# Logins simultáneos por proceso: los hilos de bcrypt más una cola corta
+LOGIN_MAX_CONCURRENCY = int(os.getenv("LOGIN_MAX_CONCURRENCY", str(HASH_WORKERS * 2)))
+LOGIN_LIMITER_MAX_KEYS = int(os.getenv("LOGIN_LIMITER_MAX_KEYS", "100000"))
+# Detrás de un proxy: la IP del cliente es la primera de X-Forwarded-For
+LOGIN_TRUST_FORWARDED = os.getenv("LOGIN_TRUST_FORWARDED", "0").lower() in ("1", "true", "yes")
+
+class TokenBucketLimiter:
+    """Un token bucket por clave, en un LRU acotado a max_keys claves."""
+
+    def __init__(self, rate, burst, max_keys=LOGIN_LIMITER_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, actualizado)
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Consume un token; devuelve 0 si se admite o los segundos hasta el siguiente token."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+class LoginAdmission:
+    def __init__(self, enabled=LOGIN_ADMISSION, ip_rate=LOGIN_IP_RATE, ip_burst=LOGIN_IP_BURST,
+                 email_rate=LOGIN_EMAIL_RATE, email_burst=LOGIN_EMAIL_BURST,
+                 max_concurrency=LOGIN_MAX_CONCURRENCY, max_keys=LOGIN_LIMITER_MAX_KEYS):
+        self.enabled = enabled
+        self.by_ip = TokenBucketLimiter(ip_rate, ip_burst, max_keys)
+        self.by_email = TokenBucketLimiter(email_rate, email_burst, max_keys)
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {"admitted": 0, "rejected_ip": 0, "rejected_email": 0, "rejected_busy": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _reject(self, name, status_code, detail, retry_after):
+        self._count(name)
+        raise HTTPException(status_code=status_code, detail=detail,
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+    @asynccontextmanager
+    async def admit(self, request, email):
+        """Envuelve la consulta y el bcrypt del login; lanza 429/503 si no se admite."""
+        if not self.enabled:
+            yield
+            return
+        wait = self.by_ip.acquire(client_ip(request))
+        if wait:
+            self._reject("rejected_ip", 429, "Demasiados intentos de inicio de sesión, espera un momento", wait)
+        wait = self.by_email.acquire(email.lower())
+        if wait:
+            self._reject("rejected_email", 429, "Demasiados intentos para esta cuenta, espera un momento", wait)
+        with self._lock:
+            busy = self._in_flight >= self.max_concurrency
+            if not busy:
+                self._in_flight += 1
+                self._stats["admitted"] += 1
+        if busy:
+            self._reject("rejected_busy", 503, "Servidor ocupado, intenta de nuevo", 1)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+        return {
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": in_flight,
+            "ip": {"rate": self.by_ip.rate, "burst": self.by_ip.burst, "keys": len(self.by_ip)},
+            "email": {"rate": self.by_email.rate, "burst": self.by_email.burst, "keys": len(self.by_email)},
+            **stats,
+        }
+
+def client_ip(request):
+    if LOGIN_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "desconocido"
+
+login_admission = LoginAdmission()
@@ -0,0 +1,10 @@
+"""
+Caché de respuestas de agenda_fastapi. La implementación es la de cache.py;
+aquí solo cambia el prefijo, para no compartir llaves con main.py en un
+mismo Redis.
+"""
+from cache import ResponseCache, create_backend
+
+CACHE_PREFIX = "agenda_fastapi"
+
+response_cache = ResponseCache(create_backend(), prefix=CACHE_PREFIX)
@@ -1,15 +1,18 @@
+from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from bulk import error_messages
+from pagination import build_page, decode_cursor
 from . import models, schemas
+from .cache import response_cache
+from .database import replicas
 from typing import List, Optional
 
-# CREATE - Crear nueva persona
+# CREATE - Crear nueva persona (el índice único de email detecta el duplicado,
+# sin SELECT previo que dos altas simultáneas podrían pasar a la vez)
 def crear_persona(db: Session, persona: schemas.PersonaCreate):
-    # Verificar si el email ya existe
-    db_persona = db.query(models.Persona).filter(models.Persona.email == persona.email).first()
-    if db_persona:
-        raise ValueError("El email ya está registrado")
-    
-    # Crear nueva persona
     db_persona = models.Persona(
         nombre=persona.nombre,
         apellido=persona.apellido,
@@ -19,46 +22,227 @@ def crear_persona(db: Session, persona: schemas.PersonaCreate):
     )
     
     db.add(db_persona)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("El email ya está registrado")
+    response_cache.invalidate("personas")
+    replicas.mark_write("personas")
     db.refresh(db_persona)
     return db_persona
 
+# CREATE - Crear personas en lote (INSERT multi-fila por lote, errores por fila)
+def crear_personas_bulk(db: Session, personas: List[dict], batch_size: int = 1000):
+    errores = []
+    insertadas = 0
+    vistos = set()
+    lote = []
+
+    def guardar_lote(lote):
+        # Un solo SELECT por lote para detectar emails ya registrados
+        emails = [persona.email for _, persona in lote]
+        existentes = {
+            email for (email,) in
+            db.query(models.Persona.email).filter(models.Persona.email.in_(emails))
+        }
+        filas = [persona.dict() for _, persona in lote if persona.email not in existentes]
+        if filas:
+            # Otra petición pudo dar de alta alguno de esos emails tras el SELECT:
+            # el índice único lo rechaza, se deshace solo este INSERT (SAVEPOINT) y
+            # se repite el lote, cuyo SELECT ya los encuentra
+            try:
+                with db.begin_nested():
+                    db.execute(insert(models.Persona), filas)
+            except IntegrityError:
+                return guardar_lote(lote)
+        for index, persona in lote:
+            if persona.email in existentes:
+                errores.append({"index": index, "detail": ["El email ya está registrado"]})
+        return len(filas)
+
+    for index, persona in validar_personas(personas, errores):
+        if persona.email in vistos:
+            errores.append({"index": index, "detail": ["Email repetido en la importación"]})
+            continue
+        vistos.add(persona.email)
+        lote.append((index, persona))
+        if len(lote) >= batch_size:
+            insertadas += guardar_lote(lote)
+            lote = []
+    if lote:
+        insertadas += guardar_lote(lote)
+
+    db.commit()
+    response_cache.invalidate("personas")
+    replicas.mark_write("personas")
+    return {"inserted": insertadas, "errors": errores}
+
+def validar_personas(personas: List[dict], errores: List[dict]):
+    """(índice, PersonaCreate) de las filas válidas; las inválidas van a `errores`."""
+    for index, datos in enumerate(personas):
+        if not isinstance(datos, dict):
+            errores.append({"index": index, "detail": ["Se esperaba un objeto"]})
+            continue
+        try:
+            yield index, schemas.PersonaCreate(**datos)
+        except ValidationError as e:
+            errores.append({"index": index, "detail": error_messages(e)})
+
+# UPSERT - Insertar o actualizar por email con el upsert nativo del dialecto
+# (ON DUPLICATE KEY UPDATE / ON CONFLICT), sin leer antes. updated_at queda NULL
+# al insertar y se fija al actualizar: así cada fila dice qué le pasó.
+UPSERT_COLUMNS = ("nombre", "apellido", "telefono", "direccion")
+
+def _upsert_statement(dialect, filas):
+    if dialect == "mysql":
+        stmt = mysql.insert(models.Persona).values(filas)
+        nuevos = stmt.inserted
+        return stmt.on_duplicate_key_update(
+            **{columna: nuevos[columna] for columna in UPSERT_COLUMNS}, updated_at=func.now()
+        )
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(models.Persona).values(filas)
+        nuevos = stmt.excluded
+        return stmt.on_conflict_do_update(
+            index_elements=[models.Persona.email],
+            set_={**{columna: nuevos[columna] for columna in UPSERT_COLUMNS}, "updated_at": func.now()},
+        )
+    raise NotImplementedError(f"Upsert no disponible para {dialect}")
+
+def upsert_personas(db: Session, personas: List[schemas.PersonaCreate]):
+    """
+    Un solo statement para todas (emails sin repetir). Devuelve filas de
+    PERSONA_COLUMNS (ver fue_insertada); no hace commit.
+    """
+    dialect = db.get_bind().dialect
+    stmt = _upsert_statement(dialect.name, [persona.dict() for persona in personas])
+    if dialect.insert_returning:
+        return db.execute(stmt.returning(*PERSONA_COLUMNS)).all()
+    # MySQL: sin RETURNING se releen las filas, aún bloqueadas por el upsert
+    db.execute(stmt)
+    emails = [persona.email for persona in personas]
+    return db.query(*PERSONA_COLUMNS).filter(models.Persona.email.in_(emails)).all()
+
+def fue_insertada(fila):
+    # Se mira en Python: SQLite 3.40 evalúa mal `updated_at IS NULL` dentro de RETURNING
+    return fila.updated_at is None
+
+def upsert_persona(db: Session, persona: schemas.PersonaCreate):
+    (db_persona,) = upsert_personas(db, [persona])
+    db.commit()
+    response_cache.invalidate("personas")
+    replicas.mark_write("personas")
+    return db_persona
+
+# UPSERT - Sincronización masiva: un upsert por lote, resultado por fila
+def upsert_personas_bulk(db: Session, personas: List[dict], batch_size: int = 1000):
+    errores = []
+    resultados = []
+    vistos = set()
+    lote = []
+
+    def guardar_lote(lote):
+        # Los emails del lote ya vienen en minúsculas (schemas.PersonaCreate); con la
+        # collation de MySQL una fila anterior a la normalización puede diferir en mayúsculas
+        indices = {persona.email: index for index, persona in lote}
+        for fila in upsert_personas(db, [persona for _, persona in lote]):
+            resultados.append({
+                "index": indices[fila.email.lower()],
+                "id": fila.id,
+                "email": fila.email,
+                "resultado": "insertado" if fue_insertada(fila) else "actualizado",
+            })
+
+    for index, persona in validar_personas(personas, errores):
+        if persona.email in vistos:
+            errores.append({"index": index, "detail": ["Email repetido en la sincronización"]})
+            continue
+        vistos.add(persona.email)
+        lote.append((index, persona))
+        if len(lote) >= batch_size:
+            guardar_lote(lote)
+            lote = []
+    if lote:
+        guardar_lote(lote)
+
+    db.commit()
+    response_cache.invalidate("personas")
+    replicas.mark_write("personas")
+    resultados.sort(key=lambda r: r["index"])
+    insertadas = sum(r["resultado"] == "insertado" for r in resultados)
+    return {
+        "inserted": insertadas,
+        "updated": len(resultados) - insertadas,
+        "results": resultados,
+        "errors": errores,
+    }
+
 # READ - Obtener persona por ID
 def obtener_persona(db: Session, persona_id: int):
     return db.query(models.Persona).filter(models.Persona.id == persona_id).first()
 
-# READ - Obtener todas las personas
-def obtener_personas(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Persona).offset(skip).limit(limit).all()
+# READ - Obtener personas paginadas por cursor (keyset sobre id)
+# Columnas de schemas.Persona, en el orden de sus campos
+PERSONA_COLUMNS = (
+    models.Persona.nombre,
+    models.Persona.apellido,
+    models.Persona.email,
+    models.Persona.telefono,
+    models.Persona.direccion,
+    models.Persona.id,
+    models.Persona.created_at,
+    models.Persona.updated_at,
+)
+
+def obtener_personas(db: Session, cursor: Optional[str] = None, limit: int = 100):
+    # Filas de columnas, no objetos ORM (se serializan con serialization.page_json)
+    query = db.query(*PERSONA_COLUMNS)
+    if cursor:
+        (persona_id,) = decode_cursor(cursor, int)
+        query = query.filter(models.Persona.id > persona_id)
+    personas = query.order_by(models.Persona.id).limit(limit + 1).all()
+    return build_page(personas, limit, lambda persona: (persona.id,))
 
 # READ - Obtener persona por email
 def obtener_persona_por_email(db: Session, email: str):
-    return db.query(models.Persona).filter(models.Persona.email == email).first()
+    return db.query(models.Persona).filter(models.Persona.email == email.lower()).first()
 
-# UPDATE - Actualizar persona
+# UPDATE - Actualizar persona (un UPDATE; con RETURNING si el backend lo soporta)
 def actualizar_persona(db: Session, persona_id: int, persona: schemas.PersonaUpdate):
-    db_persona = db.query(models.Persona).filter(models.Persona.id == persona_id).first()
-    
-    if not db_persona:
-        return None
-    
     # Actualizar solo los campos proporcionados
     update_data = persona.dict(exclude_unset=True)
+    if not update_data:
+        return db.query(*PERSONA_COLUMNS).filter(models.Persona.id == persona_id).first()
+    
+    query = update(models.Persona).where(models.Persona.id == persona_id).values(**update_data)
+    if db.get_bind().dialect.update_returning:
+        db_persona = db.execute(query.returning(*PERSONA_COLUMNS)).first()
+    else:
+        # MySQL: sin RETURNING se relee la fila (created_at/updated_at los pone la base)
+        result = db.execute(query)
+        db_persona = None
+        if result.rowcount:
+            db_persona = db.query(*PERSONA_COLUMNS).filter(models.Persona.id == persona_id).first()
     
-    for field, value in update_data.items():
-        setattr(db_persona, field, value)
+    if not db_persona:
+        db.rollback()
+        return None
     
     db.commit()
-    db.refresh(db_persona)
+    response_cache.invalidate("personas")
+    replicas.mark_write("personas")
     return db_persona
 
-# DELETE - Eliminar persona
+# DELETE - Eliminar persona (un DELETE; rowcount indica si existía)
 def eliminar_persona(db: Session, persona_id: int):
-    db_persona = db.query(models.Persona).filter(models.Persona.id == persona_id).first()
+    result = db.execute(delete(models.Persona).where(models.Persona.id == persona_id))
     
-    if not db_persona:
+    if not result.rowcount:
+        db.rollback()
         return None
     
-    db.delete(db_persona)
     db.commit()
-    return db_persona
\ No newline at end of file
+    response_cache.invalidate("personas")
+    replicas.mark_write("personas")
+    return persona_id
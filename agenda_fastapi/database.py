@@ -3,6 +3,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+import query_stats
+from replicas import ReplicaRouter
 
 # Cargar variables de entorno
 load_dotenv()
@@ -10,15 +12,30 @@ load_dotenv()
 # Configuración de la base de datos
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./agenda.db")
 
+# Réplicas de lectura (URLs separadas por comas). Tras una escritura, las
+# lecturas van al primario durante READ_YOUR_WRITES_SECONDS.
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+REPLICA_BALANCE = os.getenv("REPLICA_BALANCE", "round_robin")
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+def _connect_args(url):
+    # Solo necesario para SQLite; otros drivers rechazan check_same_thread
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
 # Crear motor de base de datos
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Solo necesario para SQLite
-)
+engine = query_stats.instrument(create_engine(DATABASE_URL, connect_args=_connect_args(DATABASE_URL)))
 
 # Crear SessionLocal
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replicas = ReplicaRouter(
+    engine,
+    [query_stats.instrument(create_engine(url, connect_args=_connect_args(url)))
+     for url in DATABASE_REPLICA_URLS],
+    REPLICA_BALANCE,
+    READ_YOUR_WRITES_SECONDS,
+)
+
 # Base para modelos
 Base = declarative_base()
 
@@ -28,4 +45,16 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Sesión de solo lectura: una réplica, o el primario si hubo escrituras hace poco
+# (crud marca el namespace "personas" en cada escritura, igual que la caché)
+def get_read_db():
+    db = SessionLocal(bind=replicas.engine_for_read("personas"))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def all_engines():
+    return [engine, *replicas.replicas]
@@ -1,21 +1,64 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
-from typing import List
-import uvicorn
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
 
-from . import crud, models, schemas
-from .database import SessionLocal, engine, get_db
+from bulk import error_messages, read_rows
+from cache import CACHE_BACKEND, WEB_CONCURRENCY, json_response
+from metrics import MetricsMiddleware, MetricsRegistry, metrics_response
+from pagination import MAX_PAGE_SIZE
+from query_stats import SQL_TRACE, QueryStatsMiddleware
+from serialization import page_json
+from . import crud, schema, schemas
+from .cache import response_cache
+from .database import SessionLocal, get_db, get_read_db, replicas
 
-# Crear tablas en la base de datos
-models.Base.metadata.create_all(bind=engine)
+DEFAULT_PAGE_SIZE = 100
+
+# Métricas propias de esta app (el registro de metrics.py es el de main.py)
+metrics = MetricsRegistry()
+
+# Solo desarrollo: crear las tablas al arrancar en lugar de con `python -m agenda_fastapi.schema`
+SCHEMA_AUTO_MIGRATE = os.getenv("SCHEMA_AUTO_MIGRATE", "0").lower() in ("1", "true", "yes")
+
+def preparar_base():
+    if SCHEMA_AUTO_MIGRATE:
+        schema.create()
+    schema.check()
+
+# Importar el módulo no toca la base: el esquema se comprueba una vez al arrancar
+@asynccontextmanager
+async def lifespan(app):
+    try:
+        await run_in_threadpool(preparar_base)
+    except OperationalError as exc:
+        print(f"⚠️  No se pudo conectar a la base al arrancar: {exc.orig}")
+    yield
 
 # Inicializar FastAPI
 app = FastAPI(
     title="API Agenda de Contactos",
     description="Una API REST para gestionar una agenda de contactos",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Marcas de escritura para las réplicas compartidas entre workers vía Redis
+if CACHE_BACKEND == "redis":
+    replicas.sticky_store = response_cache.backend
+replicas.check_workers(WEB_CONCURRENCY)
+
+# Conteo y latencia por ruta, expuestos en /metrics
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
+# Consultas y tiempo de base de datos por petición (lentas, N+1; Server-Timing con SERVER_TIMING=1)
+if SQL_TRACE:
+    app.add_middleware(QueryStatsMiddleware)
+
 # Raíz
 @app.get("/")
 def read_root():
@@ -32,15 +75,80 @@ def crear_persona(persona: schemas.PersonaCreate, db: Session = Depends(get_db))
             detail=str(e)
         )
 
-# READ - Obtener todas las personas
-@app.get("/personas/", response_model=List[schemas.Persona])
-def leer_personas(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    personas = crud.obtener_personas(db, skip=skip, limit=limit)
-    return personas
+# CREATE - Importación masiva de personas (lista JSON o CSV)
+@app.post("/personas/bulk")
+async def crear_personas_bulk(
+    request: Request,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    try:
+        personas = await read_rows(request, "personas")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return await run_in_threadpool(crud.crear_personas_bulk, db, personas, batch_size)
+
+# UPSERT - Crear o reemplazar la persona con ese email (201 si se creó, 200 si se actualizó)
+@app.put("/personas/by-email/{email}", response_model=schemas.PersonaUpsertResult)
+def upsert_persona(email: str, persona: schemas.PersonaUpsert, response: Response, db: Session = Depends(get_db)):
+    try:
+        datos = schemas.PersonaCreate(email=email, **persona.dict())
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=error_messages(e)
+        )
+    db_persona = crud.upsert_persona(db, datos)
+    insertada = crud.fue_insertada(db_persona)
+    if insertada:
+        response.status_code = status.HTTP_201_CREATED
+    return {**db_persona._mapping, "resultado": "insertado" if insertada else "actualizado"}
+
+# UPSERT - Sincronización masiva por email (lista JSON o CSV); resultado por fila
+@app.post("/personas/upsert")
+async def upsert_personas(
+    request: Request,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    try:
+        personas = await read_rows(request, "personas")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return await run_in_threadpool(crud.upsert_personas_bulk, db, personas, batch_size)
+
+# READ - Obtener personas (paginadas por cursor)
+@app.get("/personas/", response_model=schemas.PersonaPage)
+def leer_personas(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
+):
+    # Página ya serializada en caché (se invalida en cada escritura de crud)
+    cached, slot = response_cache.lookup("personas", f"{cursor}:{limit}")
+    if cached is not None:
+        return json_response(cached)
+
+    try:
+        page = crud.obtener_personas(db, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    body = page_json(page)
+    response_cache.store(slot, body)
+    return json_response(body)
 
 # READ - Obtener persona por ID
 @app.get("/personas/{persona_id}", response_model=schemas.Persona)
-def leer_persona(persona_id: int, db: Session = Depends(get_db)):
+def leer_persona(persona_id: int, db: Session = Depends(get_read_db)):
     db_persona = crud.obtener_persona(db, persona_id=persona_id)
     if db_persona is None:
         raise HTTPException(
@@ -71,11 +179,24 @@ def eliminar_persona(persona_id: int, db: Session = Depends(get_db)):
         )
     return None
 
+# Estadísticas de la caché de respuestas
+@app.get("/stats/cache")
+def response_cache_stats():
+    return response_cache.stats()
+
+# Métricas en formato Prometheus
+# (async: el registro solo se lee y modifica en el event loop)
+@app.get("/metrics", include_in_schema=False)
+async def metrics_route():
+    return metrics_response(metrics)
+
 # Health check
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "message": "API funcionando correctamente"}
 
-# Ejecutar la aplicación
+# Ejecutar la aplicación (desarrollo). En producción, con varios workers:
+#   python serve.py --app agenda_fastapi.main:app
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    import uvicorn
+    uvicorn.run("agenda_fastapi.main:app", host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Esquema de la agenda. La app ya no crea tablas al importarse; se crean con
+
+    python -m agenda_fastapi.schema
+
+y al arrancar la app solo comprueba que existan. El mismo comando pasa a
+minúsculas los emails de personas guardados antes de que schemas.py los
+normalizara (ver normalize_emails).
+"""
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from . import models
+from .database import engine
+
+class SchemaMissing(RuntimeError):
+    pass
+
+def create(bind=engine):
+    models.Base.metadata.create_all(bind=bind)
+
+def check(bind=engine):
+    """Una consulta vacía por tabla (sin reflejar el esquema); un error al conectar se propaga."""
+    with bind.connect() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            try:
+                conn.execute(select(literal(1)).select_from(table).limit(0))
+            except (OperationalError, ProgrammingError):
+                raise SchemaMissing(
+                    f"No existe la tabla {table.name}: ejecuta python -m agenda_fastapi.schema") from None
+
+def normalize_emails(bind=engine):
+    """
+    Paso único: UPDATE personas SET email = lower(email). Si dos filas solo
+    difieren en mayúsculas el índice único lo impediría, así que primero se
+    buscan y, si hay, no se toca nada: hay que fusionarlas a mano. Devuelve
+    cuántas filas cambió (0 si ya estaban normalizadas).
+    """
+    personas = models.Persona.__table__
+    email = func.lower(personas.c.email)
+    with bind.begin() as conn:
+        repetidos = conn.execute(
+            select(email).group_by(email).having(func.count() > 1)
+        ).scalars().all()
+        if repetidos:
+            raise ValueError(
+                "Emails repetidos si se ignoran las mayúsculas (fusiona esas personas "
+                f"antes de normalizar): {', '.join(repetidos)}")
+        return conn.execute(
+            update(personas).where(personas.c.email != email).values(email=email)
+        ).rowcount
+
+if __name__ == "__main__":
+    create()
+    print("✅ Tablas de la agenda creadas")
+    try:
+        cambiados = normalize_emails()
+    except ValueError as exc:
+        raise SystemExit(f"❌ {exc}")
+    if cambiados:
+        print(f"✅ {cambiados} emails de personas pasados a minúsculas")
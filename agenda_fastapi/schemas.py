@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 # Esquema base
 class PersonaBase(BaseModel):
@@ -10,9 +10,14 @@ class PersonaBase(BaseModel):
     telefono: Optional[str] = None
     direccion: Optional[str] = None
 
+def _email_normalizado(email):
+    # El índice único de email distingue mayúsculas en SQLite/PostgreSQL:
+    # en minúsculas, a@x.com y A@x.com son la misma persona en todas las bases
+    return email.lower() if email is not None else None
+
 # Esquema para crear persona
 class PersonaCreate(PersonaBase):
-    pass
+    _email = field_validator("email")(_email_normalizado)
 
 # Esquema para actualizar persona
 class PersonaUpdate(BaseModel):
@@ -22,6 +27,15 @@ class PersonaUpdate(BaseModel):
     telefono: Optional[str] = None
     direccion: Optional[str] = None
 
+    _email = field_validator("email")(_email_normalizado)
+
+# Esquema para PUT /personas/by-email/{email} (el email va en la ruta)
+class PersonaUpsert(BaseModel):
+    nombre: str
+    apellido: str
+    telefono: Optional[str] = None
+    direccion: Optional[str] = None
+
 # Esquema para respuesta (incluye campos automáticos)
 class Persona(PersonaBase):
     id: int
@@ -30,3 +44,12 @@ class Persona(PersonaBase):
     
     class Config:
         orm_mode = True  # Para Pydantic v1
+
+# Esquema para una página de personas (paginación por cursor)
+class PersonaPage(BaseModel):
+    items: List[Persona]
+    next_cursor: Optional[str] = None
+
+# Respuesta de un upsert: la persona y si se insertó o se actualizó
+class PersonaUpsertResult(Persona):
+    resultado: Literal["insertado", "actualizado"]
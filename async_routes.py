@@ -0,0 +1,379 @@
+"""
+Versiones async de las rutas de main.py (se activan con USE_ASYNC_DB=1).
+Usan AsyncSession, así que no ocupan hilos del threadpool mientras esperan
+a la base de datos.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import timedelta
+import models
+import purge
+import queries
+from schemas import (UserLogin, UserCreate, UserResponse, ContactoCreate, ContactoResponse, ContactoPage,
+                     ContactoOperacion, ContactoBatchResponse)
+from admission import login_admission
+from bulk import BATCH_MAX_OPERATIONS, BULK_BATCH_SIZE, read_rows, validate_in_batches
+from cache import json_response, pack, response_cache, unpack
+from etag import contactos_etag, etag_headers, etag_matches, not_modified, set_etag
+from export import MEDIA_TYPES, export_headers, stream_export_async
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page
+from serialization import page_json, rows_json
+from database import async_read_db, get_async_db, mark_write
+from auth import verify_token, get_password_hash_async, verify_and_update_async, create_access_token, revoked_users
+
+router = APIRouter()
+
+# Lecturas: réplica, salvo que el usuario haya escrito hace poco (lee lo que escribió)
+async def get_read_db(token: dict = Depends(verify_token)):
+    async for db in async_read_db(token.get("id")):
+        yield db
+
+@router.post("/login")
+async def login(user_data: UserLogin, request: Request, db: AsyncSession = Depends(get_async_db)):
+    async with login_admission.admit(request, user_data.email):
+        result = await db.execute(
+            select(models.Usuario).where(models.Usuario.email == user_data.email, models.Usuario.eliminado_en.is_(None))
+        )
+        user = result.scalars().first()
+        # Devolver la conexión al pool antes del bcrypt (close no expira los atributos)
+        await db.close()
+
+        if not user:
+            raise HTTPException(status_code=401, detail="Usuario no encontrado")
+
+        # bcrypt es CPU puro: se ejecuta en el pool de hashing, fuera del event loop
+        valida, nuevo_hash = await verify_and_update_async(user_data.password, user.password)
+        if not valida:
+            raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+
+        # Hash con otro costo que BCRYPT_ROUNDS: se reemplaza ahora que tenemos la contraseña
+        if nuevo_hash:
+            await db.execute(queries.rehash_password(user.id, user.password, nuevo_hash))
+            await db.commit()
+
+    access_token = create_access_token(
+        data={"sub": user.email, "id": user.id, "rol": user.rol},
+        expires_delta=timedelta(minutes=30)
+    )
+
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": {
+            "id": user.id,
+            "email": user.email,
+            "nombre": user.nombre,
+            "rol": user.rol
+        }
+    }
+
+# Rutas de Usuarios (solo admin)
+@router.get("/usuarios", response_model=List[UserResponse])
+async def get_usuarios(token: dict = Depends(verify_token), db: AsyncSession = Depends(get_read_db)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    # Solo las columnas de UserResponse, serializadas sin validar fila por fila
+    rows = (await db.execute(queries.usuarios())).all()
+    return json_response(rows_json(rows))
+
+@router.post("/usuarios", response_model=UserResponse)
+async def crear_usuario(usuario: UserCreate, token: dict = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    # El índice único de email detecta el duplicado (sin SELECT previo)
+    db_usuario = models.Usuario(
+        email=usuario.email,
+        password=await get_password_hash_async(usuario.password),
+        nombre=usuario.nombre,
+        rol=usuario.rol
+    )
+
+    db.add(db_usuario)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="El email ya está registrado")
+    mark_write(token.get("id"))
+    await db.refresh(db_usuario)
+
+    return db_usuario
+
+# Borrado lógico inmediato; los contactos se borran por lotes en segundo plano (purge.py)
+@router.delete("/usuarios/{usuario_id}", status_code=status.HTTP_202_ACCEPTED)
+async def eliminar_usuario(usuario_id: int, token: dict = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    if usuario_id == token.get("id"):
+        raise HTTPException(status_code=400, detail="No puedes eliminarte a ti mismo")
+
+    marcar, encolar = purge.soft_delete_statements(usuario_id)
+    if (await db.execute(marcar)).rowcount == 0:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    job_id = (await db.execute(encolar)).inserted_primary_key[0]
+    await db.commit()
+    revoked_users.add(usuario_id)
+    purge.purge_worker.wake()
+    mark_write(token.get("id"))
+
+    return {"message": "Usuario eliminado correctamente", "purga": job_id}
+
+# Progreso de la purga de un usuario eliminado (solo admin)
+@router.get("/usuarios/purgas/{job_id}")
+async def estado_purga(job_id: int, token: dict = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    job = await db.get(models.PurgeJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Purga no encontrada")
+    return purge.job_status(job)
+
+# Volver a encolar una purga que agotó sus reintentos (solo admin)
+@router.post("/usuarios/purgas/{job_id}/reintentar", status_code=status.HTTP_202_ACCEPTED)
+async def reintentar_purga(job_id: int, token: dict = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    if (await db.execute(purge.retry_statement(job_id))).rowcount == 0:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="La purga no existe o no está en error")
+    await db.commit()
+    purge.purge_worker.wake()
+    return {"message": "Purga encolada de nuevo", "purga": job_id}
+
+# Exportación en streaming de la agenda de un usuario (solo admin)
+@router.get("/usuarios/{usuario_id}/contactos/export")
+async def exportar_contactos_usuario(
+    usuario_id: int,
+    formato: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    token: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    usuario = await db.get(models.Usuario, usuario_id)
+    if not usuario or usuario.eliminado_en is not None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+    return StreamingResponse(
+        stream_export_async(queries.contactos_export(usuario_id), formato, token.get("id")),
+        media_type=MEDIA_TYPES[formato],
+        headers=export_headers(formato, f"contactos_usuario_{usuario_id}"),
+    )
+
+# Rutas de Contactos (Agenda)
+@router.get("/contactos", response_model=ContactoPage)
+async def get_contactos(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    token: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Si la agenda no cambió, 304 sin ejecutar la consulta del listado
+    usuario_id = token.get("id")
+    version = (await db.execute(queries.contactos_version(usuario_id))).scalar() or 0
+    etag = contactos_etag(usuario_id, version, cursor, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Página ya serializada en caché: solo vale si es de la versión actual (una
+    # invalidación hecha por otro worker puede no verse en esta caché)
+    cached, slot = response_cache.lookup(f"contactos:{usuario_id}", f"{cursor}:{limit}",
+                                         valid=lambda value: unpack(value)[0] == etag)
+    if cached is not None:
+        return json_response(unpack(cached)[1], etag_headers(etag))
+
+    try:
+        query = queries.contactos_page(usuario_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = (await db.execute(query)).all()
+    page = build_page(rows, limit, queries.contacto_cursor_key)
+    body = page_json(page)
+    response_cache.store(slot, pack(etag, body))
+    return json_response(body, etag_headers(etag))
+
+# Búsqueda por nombre, email o teléfono (índices sobre columnas normalizadas)
+@router.get("/contactos/search", response_model=ContactoPage)
+async def buscar_contactos(
+    q: str = Query(..., min_length=1, max_length=100),
+    match: str = Query("prefix", pattern="^(prefix|substring)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    token: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_read_db)
+):
+    try:
+        consultas = queries.contactos_search(token.get("id"), q, match, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Se piden grupos de relevancia en orden hasta llenar la página (+1 fila)
+    rows = []
+    for rank, columna, query in consultas:
+        if len(rows) > limit:
+            break
+        result = await db.execute(query.limit(limit + 1 - len(rows)))
+        rows.extend((rank, columna, contacto) for contacto in result.scalars())
+
+    page = build_page(rows, limit, queries.search_cursor_key)
+    page["items"] = [contacto for _, _, contacto in page["items"]]
+    return page
+
+# Exportación en streaming de la agenda propia
+@router.get("/contactos/export")
+async def exportar_contactos(
+    formato: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    token: dict = Depends(verify_token)
+):
+    return StreamingResponse(
+        stream_export_async(queries.contactos_export(token.get("id")), formato, token.get("id")),
+        media_type=MEDIA_TYPES[formato],
+        headers=export_headers(formato),
+    )
+
+@router.get("/contactos/{contacto_id}", response_model=ContactoResponse)
+async def get_contacto(
+    contacto_id: int,
+    request: Request,
+    response: Response,
+    token: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_read_db)
+):
+    usuario_id = token.get("id")
+    version = (await db.execute(queries.contactos_version(usuario_id))).scalar() or 0
+    etag = contactos_etag(usuario_id, version, contacto_id)
+    # Con "*" hay que saber antes si el contacto existe (y es de este usuario)
+    if etag_matches(request, etag, exists=False):
+        return not_modified(etag)
+
+    contacto = (await db.execute(queries.contacto(usuario_id, contacto_id))).scalars().first()
+    if not contacto:
+        raise HTTPException(status_code=404, detail="Contacto no encontrado")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
+    return contacto
+
+@router.post("/contactos", response_model=ContactoResponse)
+async def crear_contacto(contacto: ContactoCreate, token: dict = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    db_contacto = models.Contacto(
+        nombre=contacto.nombre,
+        email=contacto.email,
+        telefono=contacto.telefono,
+        usuario_id=token.get("id")
+    )
+
+    db.add(db_contacto)
+    await db.execute(queries.bump_contactos_version(token.get("id")))
+    await db.commit()
+    response_cache.invalidate(f"contactos:{token.get('id')}")
+    mark_write(token.get("id"))
+    await db.refresh(db_contacto)
+
+    return db_contacto
+
+# Importación masiva: JSON o CSV, validado e insertado por lotes multi-fila
+@router.post("/contactos/bulk")
+async def crear_contactos_bulk(
+    request: Request,
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=10000),
+    token: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        rows = await read_rows(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    usuario_id = token.get("id")
+    errors = []
+    inserted = 0
+    for batch in validate_in_batches(rows, ContactoCreate, batch_size, errors):
+        await db.execute(insert(models.Contacto), [queries.contacto_values(c, usuario_id) for _, c in batch])
+        inserted += len(batch)
+    if inserted:
+        await db.execute(queries.bump_contactos_version(usuario_id))
+    await db.commit()
+    response_cache.invalidate(f"contactos:{usuario_id}")
+    mark_write(usuario_id)
+
+    return {"inserted": inserted, "errors": errors}
+
+# Lote de altas, ediciones y bajas en una sola transacción: todo o nada
+@router.post("/contactos/batch", response_model=ContactoBatchResponse)
+async def procesar_lote_contactos(
+    operaciones: List[ContactoOperacion],
+    token: dict = Depends(verify_token),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if len(operaciones) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Máximo {BATCH_MAX_OPERATIONS} operaciones por lote")
+
+    usuario_id = token.get("id")
+    results = []
+    for index, operacion in enumerate(operaciones):
+        query, values = queries.batch_statement(usuario_id, operacion)
+        results.append(queries.batch_result(index, operacion, await db.execute(query), values))
+
+    # Si alguna falla no se aplica ninguna; se devuelven todos los resultados
+    if any(r["status"] >= 400 for r in results):
+        await db.rollback()
+        return JSONResponse(status_code=409, content=ContactoBatchResponse(committed=False, results=results).model_dump())
+
+    if operaciones:
+        await db.execute(queries.bump_contactos_version(usuario_id))
+        await db.commit()
+        response_cache.invalidate(f"contactos:{usuario_id}")
+        mark_write(usuario_id)
+    return {"committed": True, "results": results}
+
+@router.put("/contactos/{contacto_id}", response_model=ContactoResponse)
+async def actualizar_contacto(contacto_id: int, contacto: ContactoCreate, token: dict = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    # Un solo UPDATE ... WHERE id AND usuario_id (sin SELECT previo ni refresh)
+    usuario_id = token.get("id")
+    values = queries.contacto_values(contacto, usuario_id)
+    if queries.supports_returning(db):
+        row = (await db.execute(queries.update_contacto(usuario_id, contacto_id, values, returning=True))).first()
+        actualizado = row._asdict() if row else None
+    else:
+        # Sin RETURNING la respuesta se arma con los valores escritos
+        result = await db.execute(queries.update_contacto(usuario_id, contacto_id, values))
+        actualizado = {"id": contacto_id, **values} if result.rowcount else None
+
+    if not actualizado:
+        raise HTTPException(status_code=404, detail="Contacto no encontrado")
+
+    await db.execute(queries.bump_contactos_version(usuario_id))
+    await db.commit()
+    response_cache.invalidate(f"contactos:{usuario_id}")
+    mark_write(usuario_id)
+
+    return actualizado
+
+@router.delete("/contactos/{contacto_id}")
+async def eliminar_contacto(contacto_id: int, token: dict = Depends(verify_token), db: AsyncSession = Depends(get_async_db)):
+    usuario_id = token.get("id")
+    result = await db.execute(queries.delete_contacto(usuario_id, contacto_id))
+
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Contacto no encontrado")
+
+    await db.execute(queries.bump_contactos_version(usuario_id))
+    await db.commit()
+    response_cache.invalidate(f"contactos:{usuario_id}")
+    mark_write(usuario_id)
+
+    return {"message": "Contacto eliminado correctamente"}
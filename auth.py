@@ -1,3 +1,9 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -9,16 +15,114 @@ SECRET_KEY = "tu_clave_secreta_muy_segura_aqui_cambiala_en_produccion"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Configuración de password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuración de password hashing. El costo de bcrypt se elige con
+# `python calibrate_bcrypt.py` para el hardware y el presupuesto de latencia;
+# min = max = BCRYPT_ROUNDS hace que needs_update marque cualquier hash con
+# otro costo, y el login lo rehashea (verify_and_update)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS,
+                           bcrypt__min_rounds=BCRYPT_ROUNDS, bcrypt__max_rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update(plain_password, hashed_password):
+    """(válida, hash nuevo o None si el guardado ya tiene el costo configurado)."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Pool dedicado para bcrypt: así una ráfaga de logins no ocupa el threadpool
+# que atiende el resto de rutas
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")  # "thread" o "process"
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_QUEUE_MAX = int(os.getenv("HASH_QUEUE_MAX", "64"))
+
+class HashPoolSaturated(Exception):
+    """La cola del pool de hashing está llena."""
+
+def _timed(fn, *args):
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic()
+
+class HashPool:
+    def __init__(self, kind=HASH_EXECUTOR, workers=HASH_WORKERS, queue_max=HASH_QUEUE_MAX):
+        self.kind = kind
+        self.workers = workers
+        self.queue_max = queue_max
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {"count": 0, "rejected": 0, "hash_total": 0.0, "hash_max": 0.0,
+                       "wait_total": 0.0, "wait_max": 0.0}
+
+    def _get_executor(self):
+        # Se crea al primer uso (y después de un fork) en lugar de al importar
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_max:
+                self._stats["rejected"] += 1
+                raise HashPoolSaturated()
+            self._in_flight += 1
+        submitted = time.monotonic()
+        try:
+            future = self._get_executor().submit(_timed, fn, *args)
+            result, started, finished = await asyncio.wrap_future(future)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        self._record(started - submitted, finished - started)
+        return result
+
+    def _record(self, wait, elapsed):
+        with self._lock:
+            stats = self._stats
+            stats["count"] += 1
+            stats["hash_total"] += elapsed
+            stats["hash_max"] = max(stats["hash_max"], elapsed)
+            stats["wait_total"] += wait
+            stats["wait_max"] = max(stats["wait_max"], wait)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+        count = stats["count"] or 1
+        return {
+            "executor": self.kind,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "workers": self.workers,
+            "queue_max": self.queue_max,
+            "in_flight": in_flight,
+            "count": stats["count"],
+            "rejected": stats["rejected"],
+            "hash_avg_ms": round(stats["hash_total"] / count * 1000, 3),
+            "hash_max_ms": round(stats["hash_max"] * 1000, 3),
+            "queue_wait_avg_ms": round(stats["wait_total"] / count * 1000, 3),
+            "queue_wait_max_ms": round(stats["wait_max"] * 1000, 3),
+        }
+
+hash_pool = HashPool()
+
+async def verify_password_async(plain_password, hashed_password):
+    return await hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_async(plain_password, hashed_password):
+    return await hash_pool.run(verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await hash_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -29,12 +133,116 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Caché de tokens ya verificados: evita repetir jwt.decode (base64 + HMAC +
+# validación de claims) para el mismo bearer token. TOKEN_CACHE_SIZE=0 la desactiva.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+class TokenCache:
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # token -> (payload, exp)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                payload, exp = entry
+                if exp > time.time():
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return payload
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def put(self, token, payload):
+        exp = payload.get("exp")
+        if not self.maxsize or exp is None:
+            return
+        with self._lock:
+            self._entries[token] = (payload, exp)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+token_cache = TokenCache()
+
+# Usuarios eliminados (borrado lógico, ver purge.py): sus tokens se rechazan
+# aunque no hayan expirado. El conjunto se recarga cada REVOCATION_REFRESH_SECONDS
+# con `loader` (lo asigna main.py); add() lo aplica al instante en este proceso.
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+
+class RevokedUsers:
+    def __init__(self, loader=None, refresh_seconds=REVOCATION_REFRESH_SECONDS):
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self._ids = frozenset()
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, usuario_id):
+        with self._lock:
+            self._ids = self._ids | {usuario_id}
+
+    def _refresh(self):
+        # Un solo hilo recarga; los demás siguen con el conjunto anterior
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+            # add() se llama tras el commit: lo añadido ya viene en la carga
+            self._ids = frozenset(self.loader())
+        except Exception as exc:
+            # Base no disponible: se mantiene el conjunto anterior
+            print(f"⚠️  No se pudo recargar la lista de usuarios revocados: {exc}")
+        finally:
+            self._lock.release()
+
+    def __contains__(self, usuario_id):
+        if self.loader is not None and time.monotonic() >= self._next_refresh:
+            self._refresh()
+        return usuario_id in self._ids
+
+revoked_users = RevokedUsers()
+
+def decode_token(token):
+    if token_cache.maxsize:
+        payload = token_cache.get(token)
+        if payload is not None:
+            return dict(payload)
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    token_cache.put(token, payload)
+    return dict(payload)
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        payload = decode_token(credentials.credentials)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado"
         )
+    if payload.get("id") in revoked_users:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario eliminado"
+        )
+    return payload
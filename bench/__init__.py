@@ -0,0 +1 @@
+# Benchmarks de las APIs de agenda (ejecutar con `python -m bench.<nombre>`)
@@ -0,0 +1,52 @@
+"""
+Compara el modo sync y el modo async (USE_ASYNC_DB=1) de main.py sobre SQLite.
+
+    python -m bench.async_db --requests 2000 --concurrency 64 --contactos 50
+"""
+import argparse
+import asyncio
+import json
+
+from bench.common import drive, print_table, run_worker, seed_contactos
+
+
+def worker(args):
+    import main
+
+    token = seed_contactos(args.contactos)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def make_request(client, i):
+        if i % 10 == 0:
+            return client.post("/contactos", json={"nombre": f"Nuevo {i}"}, headers=headers)
+        return client.get("/contactos", headers=headers)
+
+    result = asyncio.run(drive(main.app, make_request, args.requests, args.concurrency))
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--contactos", type=int, default=50)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    rows = []
+    for mode, use_async in (("sync", 0), ("async", 1)):
+        result = run_worker(
+            "bench.async_db",
+            ["--worker", "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--contactos", str(args.contactos)],
+            USE_ASYNC_DB=use_async,
+        )
+        rows.append({"modo": mode, **result})
+    print_table(rows, ["modo", "requests", "rps", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
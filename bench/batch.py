@@ -0,0 +1,91 @@
+"""
+Sincronización de N ediciones: una llamada por operación (POST, PUT, DELETE
+/contactos) contra POST /contactos/batch en lotes de --lote operaciones.
+
+    python -m bench.batch --operaciones 3000 --lote 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from bench.common import print_table, run_worker, seed_contactos
+
+
+def operaciones(n, existentes):
+    """Mezcla 1/3 altas, 1/3 ediciones y 1/3 bajas sobre contactos ya sembrados."""
+    ops = []
+    for i in range(n):
+        if i % 3 == 0:
+            ops.append({"op": "create", "data": {"nombre": f"Nuevo {i}", "email": f"n{i}@test.com"}})
+        elif i % 3 == 1:
+            ops.append({"op": "update", "id": existentes[i], "data": {"nombre": f"Editado {i}"}})
+        else:
+            ops.append({"op": "delete", "id": existentes[i]})
+    return ops
+
+
+async def una_por_una(client, ops, headers):
+    for op in ops:
+        if op["op"] == "create":
+            response = await client.post("/contactos", json=op["data"], headers=headers)
+        elif op["op"] == "update":
+            response = await client.put(f"/contactos/{op['id']}", json=op["data"], headers=headers)
+        else:
+            response = await client.delete(f"/contactos/{op['id']}", headers=headers)
+        assert response.status_code < 300, response.text
+
+
+async def por_lotes(client, ops, headers, lote):
+    for inicio in range(0, len(ops), lote):
+        response = await client.post("/contactos/batch", json=ops[inicio:inicio + lote], headers=headers)
+        assert response.status_code == 200, response.text
+
+
+def worker(args):
+    import main
+
+    n = args.operaciones
+    # Contactos 1..2n: la primera mitad para la ruta una por una, la segunda para los lotes
+    headers = {"Authorization": f"Bearer {seed_contactos(2 * n)}"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            filas = []
+            for ruta, existentes in (("una_por_una", list(range(1, n + 1))), ("batch", list(range(n + 1, 2 * n + 1)))):
+                ops = operaciones(n, existentes)
+                start = time.perf_counter()
+                if ruta == "batch":
+                    await por_lotes(client, ops, headers, args.lote)
+                else:
+                    await una_por_una(client, ops, headers)
+                seg = time.perf_counter() - start
+                filas.append({"ruta": ruta, "operaciones": n, "seg": round(seg, 3), "ops_s": round(n / seg)})
+            return filas
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operaciones", type=int, default=3000)
+    parser.add_argument("--lote", type=int, default=100)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    rows = []
+    for modo, use_async in (("sync", 0), ("async", 1)):
+        filas = run_worker("bench.batch", ["--worker", "--operaciones", str(args.operaciones), "--lote", str(args.lote)],
+                           USE_ASYNC_DB=use_async)
+        rows += [{"modo": modo, **fila} for fila in filas]
+    print_table(rows, ["modo", "ruta", "operaciones", "seg", "ops_s"])
+
+
+if __name__ == "__main__":
+    main()
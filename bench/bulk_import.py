@@ -0,0 +1,62 @@
+"""
+Importación de N contactos: un POST /contactos por fila contra un único
+POST /contactos/bulk.
+
+    python -m bench.bulk_import --filas 5000 --batch-size 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from bench.common import print_table, run_worker, seed_contactos
+
+
+async def importar(app, headers, filas, batch_size):
+    contactos = [{"nombre": f"Import {i}", "email": f"i{i}@test.com", "telefono": f"555{i:07d}"}
+                 for i in range(filas)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        for contacto in contactos:
+            await client.post("/contactos", json=contacto, headers=headers)
+        una_por_una = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = await client.post("/contactos/bulk", json=contactos, headers=headers,
+                                     params={"batch_size": batch_size})
+        bulk = time.perf_counter() - start
+        assert response.json()["inserted"] == filas, response.text
+
+    return [
+        {"ruta": "una_por_una", "filas": filas, "seg": round(una_por_una, 3), "filas_s": round(filas / una_por_una)},
+        {"ruta": "bulk", "filas": filas, "seg": round(bulk, 3), "filas_s": round(filas / bulk)},
+    ]
+
+
+def worker(args):
+    import main
+
+    headers = {"Authorization": f"Bearer {seed_contactos(0)}"}
+    print(json.dumps(asyncio.run(importar(main.app, headers, args.filas, args.batch_size))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    rows = run_worker("bench.bulk_import",
+                      ["--worker", "--filas", str(args.filas), "--batch-size", str(args.batch_size)])
+    print_table(rows, ["ruta", "filas", "seg", "filas_s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Utilidades compartidas por los benchmarks: base SQLite temporal, subprocesos
+con su propia configuración y medición de latencias con httpx en proceso.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sqlite_env(path, **extra):
+    """Variables de entorno que apuntan main.py a un archivo SQLite."""
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{path}"
+    env["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    env.update({k: str(v) for k, v in extra.items()})
+    return env
+
+
+def run_worker(module, args, **env):
+    """Ejecuta `python -m module args` con una base SQLite nueva y devuelve su JSON."""
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = subprocess.run(
+            [sys.executable, "-m", module, *args],
+            cwd=ROOT,
+            env=sqlite_env(os.path.join(tmp, "bench.db"), **env),
+            capture_output=True,
+            text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def seed_contactos(contactos, rol="admin"):
+    """Crea un usuario con `contactos` contactos y devuelve un token suyo."""
+    import migrate
+    import models
+    from auth import create_access_token
+    from database import SessionLocal
+    from search import normalized_values
+
+    migrate.upgrade()
+    db = SessionLocal()
+    try:
+        usuario = models.Usuario(email="bench@test.com", password="x", nombre="Bench", rol=rol)
+        db.add(usuario)
+        db.flush()
+        if contactos:
+            db.execute(models.Contacto.__table__.insert(), [
+                {"nombre": nombre, "email": email, "telefono": telefono, "usuario_id": usuario.id,
+                 **normalized_values(nombre, email, telefono)}
+                for nombre, email, telefono in (
+                    (f"Contacto {i:07d}", f"c{i}@test.com", f"555{i:07d}") for i in range(contactos)
+                )
+            ])
+        db.commit()
+        return create_access_token({"sub": usuario.email, "id": usuario.id, "rol": rol})
+    finally:
+        db.close()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def drive(app, make_request, total, concurrency, base_url="http://bench", fail_on_5xx=True):
+    """
+    Lanza `total` peticiones con `concurrency` clientes simultáneos.
+    `make_request(client, i)` devuelve la corrutina de la petición i.
+    Con fail_on_5xx=False los 5xx se cuentan en "errors_5xx" en lugar de abortar.
+    Con app=None las peticiones van por red a base_url (p. ej. un uvicorn local).
+    """
+    latencies = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app) if app is not None else None
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=None, limits=limits) as client:
+        counter = iter(range(total))
+
+        async def worker():
+            for i in counter:
+                start = time.perf_counter()
+                response = await make_request(client, i)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 500:
+                    if fail_on_5xx:
+                        raise RuntimeError(f"{response.status_code}: {response.text}")
+                    nonlocal errors
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    result = summarize(latencies, elapsed)
+    if not fail_on_5xx:
+        result["errors_5xx"] = errors
+    return result
+
+
+def print_table(rows, columns):
+    print(" | ".join(f"{c:>10}" for c in columns))
+    for row in rows:
+        print(" | ".join(f"{row.get(c, ''):>10}" for c in columns))
@@ -0,0 +1,143 @@
+"""
+Latencia del listado durante una tormenta de logins, con y sin control de
+admisión (admission.py).
+
+Mientras unos clientes leen GET /contactos, otros lanzan POST /login con
+contraseñas incorrectas contra usuarios reales (cada intento admitido cuesta
+un bcrypt) a --flood-rps intentos por segundo, sin esperar respuestas, desde
+--ips direcciones distintas (X-Forwarded-For). Escenarios:
+  sin flood           solo lecturas (referencia)
+  flood sin admisión  LOGIN_ADMISSION=0
+  flood con admisión  buckets por IP/email y tope de logins simultáneos
+
+    python -m bench.login_flood --requests 300 --flood-rps 50 --ips 4
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+
+from bench.common import drive, percentile, print_table, run_worker, seed_contactos
+
+PASSWORD = "password123"
+
+SCENARIOS = [
+    ("sin flood", False, 1),
+    ("flood sin admisión", True, 0),
+    ("flood con admisión", True, 1),
+]
+
+
+async def flood(client, emails, ips, rate, max_pending, done):
+    """
+    POST /login a `rate` intentos por segundo (carga abierta: no espera las
+    respuestas, hasta max_pending en vuelo) hasta que `done` se activa;
+    cuenta los códigos de respuesta.
+    """
+    statuses = Counter()
+    latencies = []
+    pending = set()
+
+    async def attempt(i):
+        start = time.perf_counter()
+        response = await client.post(
+            "/login",
+            json={"email": emails[i % len(emails)], "password": "incorrecta"},
+            headers={"X-Forwarded-For": f"10.0.0.{i % ips + 1}"},
+        )
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    i = 0
+    while not done.is_set():
+        if len(pending) < max_pending:
+            task = asyncio.create_task(attempt(i))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        else:
+            statuses["descartado"] += 1
+        i += 1
+        await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+    await asyncio.gather(*pending)
+    return statuses, latencies
+
+
+def worker(args):
+    import httpx
+
+    import main
+    import seed_data
+    from database import engine
+    from sqlalchemy import text
+
+    token = seed_contactos(args.contactos)
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = seed_data.sembrar_usuarios(engine, args.usuarios, password=PASSWORD)
+    with engine.connect() as conn:
+        emails = conn.execute(text("SELECT email FROM usuarios WHERE id >= :id"), {"id": min(ids)}).scalars().all()
+
+    def make_request(client, i):
+        return client.get("/contactos", headers=headers)
+
+    async def run():
+        done = asyncio.Event()
+        attack = None
+        if args.flood:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                attack = asyncio.create_task(flood(client, emails, args.ips, args.flood_rps, args.max_pending, done))
+                # Dejar que la tormenta se establezca antes de medir
+                await asyncio.sleep(1)
+                result = await drive(main.app, make_request, args.requests, args.concurrency, fail_on_5xx=False)
+                done.set()
+                statuses, latencies = await attack
+        else:
+            result = await drive(main.app, make_request, args.requests, args.concurrency, fail_on_5xx=False)
+            statuses, latencies = Counter(), []
+        result.update(
+            login_bcrypt=statuses[401],
+            login_429=statuses[429],
+            login_503=statuses[503],
+            login_descartados=statuses["descartado"],
+            login_p50_ms=round(percentile(latencies, 50) * 1000, 1),
+        )
+        return result
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="lecturas medidas")
+    parser.add_argument("--concurrency", type=int, default=8, help="clientes de lectura")
+    parser.add_argument("--flood-rps", type=float, default=50, help="intentos de login por segundo")
+    parser.add_argument("--max-pending", type=int, default=100, help="logins en vuelo como máximo")
+    parser.add_argument("--ips", type=int, default=4, help="IPs distintas de la tormenta")
+    parser.add_argument("--usuarios", type=int, default=50)
+    parser.add_argument("--contactos", type=int, default=50)
+    parser.add_argument("--flood", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    rows = []
+    for nombre, con_flood, admision in SCENARIOS:
+        result = run_worker(
+            "bench.login_flood",
+            ["--worker", "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--flood-rps", str(args.flood_rps), "--max-pending", str(args.max_pending), "--ips", str(args.ips),
+             "--usuarios", str(args.usuarios), "--contactos", str(args.contactos),
+             *(["--flood"] if con_flood else [])],
+            LOGIN_ADMISSION=admision, LOGIN_TRUST_FORWARDED=1, CACHE_BACKEND="none",
+        )
+        rows.append({"escenario": nombre, **result})
+    print_table(rows, ["escenario", "rps", "p50_ms", "p95_ms", "p99_ms",
+                       "login_bcrypt", "login_429", "login_503", "login_p50_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Costo por petición de MetricsMiddleware.
+
+Llama directamente (sin servidor ni cliente HTTP) a una app ASGI mínima con y
+sin el middleware y reporta la diferencia en microsegundos por petición.
+También mide cuánto tarda en generarse /metrics con muchas rutas registradas.
+
+    python -m bench.metrics --calls 200000
+"""
+import argparse
+import asyncio
+import time
+
+from bench.common import print_table
+from metrics import MetricsMiddleware, MetricsRegistry
+
+
+class _Route:
+    path = "/contactos/{contacto_id}"
+
+_ROUTE = _Route()
+_START = {"type": "http.response.start", "status": 200, "headers": []}
+_BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def app(scope, receive, send):
+    # Simula al router: deja la ruta en el scope y responde
+    scope["route"] = _ROUTE
+    await send(_START)
+    await send(_BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(target, calls):
+    scope = {"type": "http", "method": "GET", "path": "/contactos/1"}
+    start = time.perf_counter()
+    for _ in range(calls):
+        await target(dict(scope), receive, send)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--rutas", type=int, default=50, help="rutas registradas al medir render()")
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    middleware = MetricsMiddleware(app, registry)
+    asyncio.run(run(app, 1000))  # calentamiento
+    base = min(asyncio.run(run(app, args.calls)) for _ in range(3))
+    medido = min(asyncio.run(run(middleware, args.calls)) for _ in range(3))
+
+    for i in range(args.rutas):
+        for status_code in (200, 404):
+            registry.observe("GET", f"/ruta/{i}", status_code, 0.003)
+    start = time.perf_counter()
+    body = registry.render()
+    render_ms = (time.perf_counter() - start) * 1000
+
+    print_table(
+        [{"app": "sin middleware", "us_req": round(base, 3)},
+         {"app": "con middleware", "us_req": round(medido, 3)},
+         {"app": "diferencia", "us_req": round(medido - base, 3)}],
+        ["app", "us_req"],
+    )
+    print(f"render() de {args.rutas} rutas: {render_ms:.2f} ms, {len(body.splitlines())} líneas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Comportamiento de main.py con el pool de conexiones agotado.
+
+Cada consulta se alarga artificialmente (--query-ms) para que las conexiones
+se retengan; con un pool pequeño y mucha concurrencia las peticiones esperan
+hasta DB_POOL_TIMEOUT y después reciben 503.
+
+    python -m bench.pool --requests 1000 --concurrency 64 --query-ms 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from bench.common import drive, print_table, run_worker, seed_contactos
+
+# (nombre, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT)
+SCENARIOS = [
+    ("agotado", 2, 0, 0.2),
+    ("overflow", 2, 8, 0.2),
+    ("holgado", 10, 20, 5),
+]
+
+
+def worker(args):
+    from sqlalchemy import event
+
+    import database
+    import main
+
+    token = seed_contactos(args.contactos)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    @event.listens_for(database.engine, "before_cursor_execute")
+    def _lenta(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(args.query_ms / 1000)
+
+    def make_request(client, i):
+        return client.get("/contactos", headers=headers)
+
+    result = asyncio.run(drive(main.app, make_request, args.requests, args.concurrency, fail_on_5xx=False))
+    pool = database.pool_status()["primary"]
+    result.update(wait_avg_ms=pool["wait_avg_ms"], wait_max_ms=pool["wait_max_ms"], timeouts=pool["timeouts"])
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--contactos", type=int, default=50)
+    parser.add_argument("--query-ms", type=float, default=20)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    rows = []
+    for nombre, size, overflow, timeout in SCENARIOS:
+        result = run_worker(
+            "bench.pool",
+            ["--worker", "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--contactos", str(args.contactos), "--query-ms", str(args.query_ms)],
+            DB_POOL_SIZE=size, DB_MAX_OVERFLOW=overflow, DB_POOL_TIMEOUT=timeout, CACHE_BACKEND="none",
+        )
+        rows.append({"pool": f"{nombre} {size}+{overflow}", **result})
+    print_table(rows, ["pool", "rps", "p50_ms", "p99_ms", "errors_5xx", "wait_avg_ms", "wait_max_ms"])
+
+
+if __name__ == "__main__":
+    main()
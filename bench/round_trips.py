@@ -0,0 +1,106 @@
+"""
+Viajes a la base por operación de escritura: sentencias SQL ejecutadas
+(before_cursor_execute) más el COMMIT, para PUT/DELETE /contactos/{id} de
+main.py (modo sync y async) y crear/upsert/actualizar/eliminar_persona de
+agenda_fastapi.
+
+    python -m bench.round_trips
+"""
+import argparse
+import json
+
+from bench.common import print_table, run_worker
+
+
+class Contador:
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.sentencias = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._sentencia)
+            event.listen(engine, "commit", self._sentencia)
+
+    def _sentencia(self, *args):
+        self.sentencias += 1
+
+    def medir(self, fn):
+        self.sentencias = 0
+        resultado = fn()
+        return self.sentencias, resultado
+
+
+def worker(args):
+    from fastapi.testclient import TestClient
+
+    import database
+    import main
+    from agenda_fastapi import crud, models as agenda_models, schemas as agenda_schemas
+    from agenda_fastapi.database import SessionLocal as AgendaSession, engine as agenda_engine
+    from bench.common import seed_contactos
+
+    token = seed_contactos(3)
+    h = {"Authorization": f"Bearer {token}"}
+    agenda_models.Base.metadata.create_all(bind=agenda_engine)
+    engines = [database.engine, agenda_engine]
+    if database.async_engine is not None:
+        engines.append(database.async_engine.sync_engine)
+    contador = Contador(engines)
+    client = TestClient(main.app)
+    modo = "async" if database.USE_ASYNC_DB else "sync"
+
+    filas = []
+
+    def registrar(operacion, fn, esperado):
+        n, status_code = contador.medir(fn)
+        assert status_code == esperado, (operacion, status_code)
+        filas.append({"operacion": operacion, "modo": modo, "status": status_code, "viajes": n})
+
+    registrar("PUT /contactos/{id}", lambda: client.put("/contactos/1", json={"nombre": "Editado"}, headers=h).status_code, 200)
+    registrar("PUT /contactos/{id}", lambda: client.put("/contactos/999", json={"nombre": "X"}, headers=h).status_code, 404)
+    registrar("DELETE /contactos/{id}", lambda: client.delete("/contactos/1", headers=h).status_code, 200)
+    registrar("DELETE /contactos/{id}", lambda: client.delete("/contactos/1", headers=h).status_code, 404)
+
+    if modo == "sync":
+        db = AgendaSession()
+        nueva = agenda_schemas.PersonaCreate(nombre="A", apellido="B", email="a@test.com")
+        registrar("crud.crear_persona", lambda: crud.crear_persona(db, nueva) and 201, 201)
+
+        def duplicada():
+            try:
+                crud.crear_persona(db, nueva)
+                return 201
+            except ValueError:
+                return 400
+        registrar("crud.crear_persona", duplicada, 400)
+        persona_id = crud.obtener_persona_por_email(db, "a@test.com").id
+        sync = agenda_schemas.PersonaCreate(nombre="S", apellido="B", email="s@test.com")
+        upsert = lambda: 201 if crud.fue_insertada(crud.upsert_persona(db, sync)) else 200
+        registrar("crud.upsert_persona", upsert, 201)
+        registrar("crud.upsert_persona", upsert, 200)
+        cambios = agenda_schemas.PersonaUpdate(nombre="C")
+        registrar("crud.actualizar_persona", lambda: 200 if crud.actualizar_persona(db, persona_id, cambios) else 404, 200)
+        registrar("crud.actualizar_persona", lambda: 200 if crud.actualizar_persona(db, 999, cambios) else 404, 404)
+        registrar("crud.eliminar_persona", lambda: 204 if crud.eliminar_persona(db, persona_id) else 404, 204)
+        registrar("crud.eliminar_persona", lambda: 204 if crud.eliminar_persona(db, persona_id) else 404, 404)
+        db.close()
+
+    print(json.dumps(filas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    rows = []
+    for use_async in (0, 1):
+        rows += run_worker("bench.round_trips", ["--worker"], USE_ASYNC_DB=use_async, CACHE_BACKEND="none")
+    print_table(rows, ["operacion", "modo", "status", "viajes"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Latencia de GET /contactos/search con agendas de distintos tamaños.
+
+    python -m bench.search --tamanos 10000,100000,1000000 --requests 300
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from bench.common import drive, print_table, run_worker, seed_contactos
+
+NOMBRES = ["Ana", "José", "María", "Luis", "Carmen", "Jorge", "Lucía", "Pedro", "Sofía", "Miguel"]
+APELLIDOS = ["García", "Pérez", "López", "Martínez", "Sánchez", "Ramírez", "Torres", "Flores"]
+CONSULTAS = {"prefix": ["jos", "mar", "5551", "luis g"], "substring": ["lopez", "ia", "1234"]}
+
+
+def seed_agenda(contactos):
+    import models
+    from database import SessionLocal
+    from search import normalized_values
+
+    token = seed_contactos(0)
+    rnd = random.Random(42)
+    db = SessionLocal()
+    try:
+        for inicio in range(0, contactos, 50000):
+            filas = []
+            for i in range(inicio, min(contactos, inicio + 50000)):
+                nombre = f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {i}"
+                email = f"{nombre.split()[0].lower()}{i}@test.com"
+                telefono = f"555{rnd.randrange(10**7):07d}"
+                filas.append({"nombre": nombre, "email": email, "telefono": telefono, "usuario_id": 1,
+                              **normalized_values(nombre, email, telefono)})
+            db.execute(models.Contacto.__table__.insert(), filas)
+        db.commit()
+    finally:
+        db.close()
+    return token
+
+
+def worker(args):
+    import main
+
+    headers = {"Authorization": f"Bearer {seed_agenda(args.contactos)}"}
+
+    resultados = []
+    for match, consultas in CONSULTAS.items():
+        def make_request(client, i):
+            return client.get("/contactos/search", params={"q": consultas[i % len(consultas)], "match": match},
+                              headers=headers)
+        resultados.append({"match": match, **asyncio.run(drive(main.app, make_request, args.requests, 1))})
+    print(json.dumps(resultados))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanos", default="10000,100000")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--contactos", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args)
+
+    rows = []
+    for tamano in map(int, args.tamanos.split(",")):
+        resultados = run_worker("bench.search",
+                                ["--worker", "--contactos", str(tamano), "--requests", str(args.requests)])
+        rows.extend({"contactos": tamano, **r} for r in resultados)
+    print_table(rows, ["contactos", "match", "rps", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
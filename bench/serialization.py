@@ -0,0 +1,147 @@
+"""
+Listados: objetos ORM validados con Pydantic y codificados con json (ruta
+previa de FastAPI) contra columnas + serialization (orjson o json).
+
+Mide CPU (time.process_time) y memoria pico (tracemalloc, en otra pasada)
+de consulta + serialización completas para contactos, usuarios y personas.
+
+    python -m bench.serialization --filas 1000,10000,100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import List
+
+from bench.common import print_table, run_worker
+
+
+def seed(filas):
+    import migrate
+    import models
+    from agenda_fastapi import models as agenda_models
+    from agenda_fastapi.database import SessionLocal as AgendaSession, engine as agenda_engine
+    from database import SessionLocal
+    from search import normalized_values
+
+    migrate.upgrade()
+    agenda_models.Base.metadata.create_all(bind=agenda_engine)
+    db = SessionLocal()
+    try:
+        db.execute(models.Usuario.__table__.insert(), [
+            {"email": f"u{i}@test.com", "password": "x", "nombre": f"Usuario {i}", "rol": "user"} for i in range(filas)
+        ])
+        db.execute(models.Contacto.__table__.insert(), [
+            {"nombre": f"Contacto {i:07d}", "email": f"c{i}@test.com", "telefono": f"555{i:07d}", "usuario_id": 1,
+             **normalized_values(f"Contacto {i:07d}", f"c{i}@test.com", f"555{i:07d}")}
+            for i in range(filas)
+        ])
+        db.commit()
+    finally:
+        db.close()
+    db = AgendaSession()
+    try:
+        db.execute(agenda_models.Persona.__table__.insert(), [
+            {"nombre": f"Persona {i}", "apellido": "Prueba", "email": f"p{i}@test.com", "telefono": f"555{i:07d}"}
+            for i in range(filas)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def casos():
+    """(entidad, ruta, función que consulta y devuelve los bytes de la respuesta)."""
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    import models
+    import queries
+    import serialization
+    from agenda_fastapi import crud, models as agenda_models, schemas as agenda_schemas
+    from agenda_fastapi.database import SessionLocal as AgendaSession
+    from database import SessionLocal
+    from schemas import ContactoResponse, UserResponse
+
+    def orm(session, schema, query):
+        def run():
+            with session() as db:
+                objetos = db.execute(query).scalars().all()
+                validados = TypeAdapter(List[schema]).validate_python(objetos, from_attributes=True)
+                return json.dumps(jsonable_encoder(validados), ensure_ascii=False,
+                                  separators=(",", ":")).encode()
+        return run
+
+    def columnas(session, query):
+        def run():
+            with session() as db:
+                return serialization.rows_json(db.execute(query).all())
+        return run
+
+    contactos = select(models.Contacto).where(models.Contacto.usuario_id == 1).order_by(models.Contacto.nombre)
+    contactos_cols = select(*queries.CONTACTO_COLUMNS).where(models.Contacto.usuario_id == 1).order_by(
+        models.Contacto.nombre)
+    personas = select(agenda_models.Persona).order_by(agenda_models.Persona.id)
+    personas_cols = select(*crud.PERSONA_COLUMNS).order_by(agenda_models.Persona.id)
+    return [
+        ("contactos", "orm+pydantic", orm(SessionLocal, ContactoResponse, contactos)),
+        ("contactos", "columnas", columnas(SessionLocal, contactos_cols)),
+        ("usuarios", "orm+pydantic", orm(SessionLocal, UserResponse, select(models.Usuario))),
+        ("usuarios", "columnas", columnas(SessionLocal, queries.usuarios())),
+        ("personas", "orm+pydantic", orm(AgendaSession, agenda_schemas.Persona, personas)),
+        ("personas", "columnas", columnas(AgendaSession, personas_cols)),
+    ]
+
+
+def medir(fn, repeticiones):
+    fn()  # calentamiento
+    tiempos = []
+    for _ in range(repeticiones):
+        gc.collect()
+        start = time.process_time()
+        fn()
+        tiempos.append(time.process_time() - start)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tiempos), pico
+
+
+def worker(args):
+    import serialization
+
+    seed(args.filas)
+    rows = []
+    for entidad, ruta, fn in casos():
+        cpu, pico = medir(fn, args.repeticiones)
+        if ruta == "columnas":
+            ruta = "columnas+orjson" if serialization.orjson is not None else "columnas+json"
+        rows.append({"entidad": entidad, "ruta": ruta, "filas": args.filas,
+                     "cpu_ms": round(cpu * 1000, 1), "pico_mb": round(pico / 2**20, 2)})
+    print(json.dumps(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", default="1000,10000,100000")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.filas = int(args.filas)
+        return worker(args)
+
+    rows = []
+    for filas in (int(f) for f in args.filas.split(",")):
+        rows += run_worker("bench.serialization",
+                           ["--worker", "--filas", str(filas), "--repeticiones", str(args.repeticiones)])
+    print_table(rows, ["entidad", "ruta", "filas", "cpu_ms", "pico_mb"])
+
+
+if __name__ == "__main__":
+    main()
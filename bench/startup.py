@@ -0,0 +1,83 @@
+"""
+Tiempo de arranque de las dos APIs.
+
+Para cada app mide, en procesos nuevos y tomando la mediana de --runs:
+  import_ms    importar el módulo de la app (no debe tocar la base)
+  respuesta_ms desde lanzar uvicorn hasta la primera respuesta de /metrics
+               (intérprete + import + lifespan: comprobación del esquema y pool)
+
+El escenario "caida" apunta a una base inaccesible: la app debe arrancar igual.
+
+    python -m bench.startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench.common import ROOT, print_table, sqlite_env
+from bench.suite import UVICORN_APPS, free_port
+
+MODULES = {"main": "main", "agenda": "agenda_fastapi.main"}
+
+
+def import_ms(app, env):
+    code = (f"import time; t = time.perf_counter(); import {MODULES[app]}; "
+            "print((time.perf_counter() - t) * 1000)")
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def first_response_ms(app, env):
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", UVICORN_APPS[app], "--port", str(port), "--log-level", "error"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < 30:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn terminó con código {proc.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1).status_code == 200:
+                    return (time.perf_counter() - start) * 1000
+            except httpx.TransportError:
+                time.sleep(0.005)
+        raise RuntimeError("uvicorn no respondió en 30 s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lista = sqlite_env(os.path.join(tmp, "startup.db"), CACHE_BACKEND="none")
+        for comando in (["migrate.py"], ["-m", "agenda_fastapi.schema"]):
+            subprocess.run([sys.executable, *comando], cwd=ROOT, env=lista, check=True, capture_output=True)
+        caida = sqlite_env(os.path.join(tmp, "no", "existe.db"), CACHE_BACKEND="none")
+
+        rows = []
+        for app in MODULES:
+            for escenario, env in (("lista", lista), ("caida", caida)):
+                imports = [import_ms(app, env) for _ in range(args.runs)]
+                respuestas = [first_response_ms(app, env) for _ in range(args.runs)]
+                rows.append({"app": app, "base": escenario,
+                             "import_ms": round(statistics.median(imports), 1),
+                             "respuesta_ms": round(statistics.median(respuestas), 1)})
+    print_table(rows, ["app", "base", "import_ms", "respuesta_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Suite de carga de las dos APIs, sin dependencias externas.
+
+Siembra una base (SQLite temporal o --database-url, que debe estar vacía) con
+--usuarios usuarios y --contactos contactos por usuario, y ejecuta cada
+escenario contra main.app y agenda_fastapi.main.app, en proceso (httpx +
+ASGI) y/o sobre un uvicorn local. Guarda los resultados en JSON para
+compararlos entre versiones.
+
+Escenarios (los que no aplican a una app se omiten):
+  login   tormenta de POST /login (solo main)
+  list    lecturas de la primera página del listado
+  crud    mezcla de lecturas, altas, ediciones y bajas
+  export  exportación NDJSON completa de la agenda (solo main)
+
+    python -m bench.suite --usuarios 20 --contactos 500 --output bench/results/base.json
+    python -m bench.suite --transport uvicorn --scenarios list,crud --compare bench/results/base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from bench.common import ROOT, drive, print_table
+
+APPS = ("main", "agenda")
+TRANSPORTS = ("inproc", "uvicorn")
+SCENARIOS = ("login", "list", "crud", "export")
+PASSWORD = "password123"
+
+# Módulo ASGI de cada app para uvicorn
+UVICORN_APPS = {"main": "main:app", "agenda": "agenda_fastapi.main:app"}
+
+
+def configure(args, tmp):
+    """Variables de entorno que deben existir antes de importar las apps."""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        if args.async_database_url:
+            os.environ["ASYNC_DATABASE_URL"] = args.async_database_url
+    else:
+        path = os.path.join(tmp, "load.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.environ["USE_ASYNC_DB"] = "1" if args.async_db else "0"
+    os.environ["CACHE_BACKEND"] = args.cache
+    # La tormenta de logins mide bcrypt, no el control de admisión (ver bench.login_flood)
+    os.environ["LOGIN_ADMISSION"] = "0"
+
+
+def seed(usuarios, contactos):
+    """Crea usuarios (misma contraseña, un solo hash), sus contactos y personas."""
+    import migrate
+    import models
+    from agenda_fastapi import models as agenda_models
+    from agenda_fastapi.database import SessionLocal as AgendaSession, engine as agenda_engine
+    from auth import get_password_hash
+    from database import SessionLocal
+    from search import normalized_values
+
+    migrate.upgrade()
+    agenda_models.Base.metadata.create_all(bind=agenda_engine)
+
+    password = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.execute(models.Usuario.__table__.insert(), [
+            {"email": f"load{u}@bench-carga.com", "password": password, "nombre": f"Carga {u}",
+             "rol": "admin" if u == 0 else "user"}
+            for u in range(usuarios)
+        ])
+        ids = dict(db.query(models.Usuario.email, models.Usuario.id).all())
+        filas = []
+        for u in range(usuarios):
+            for i in range(contactos):
+                nombre, email, telefono = f"Contacto {u}-{i:06d}", f"c{u}_{i}@bench-carga.com", f"55{u:03d}{i:06d}"
+                filas.append({"nombre": nombre, "email": email, "telefono": telefono,
+                              "usuario_id": ids[f"load{u}@bench-carga.com"],
+                              **normalized_values(nombre, email, telefono)})
+                if len(filas) >= 5000:
+                    db.execute(models.Contacto.__table__.insert(), filas)
+                    filas = []
+        if filas:
+            db.execute(models.Contacto.__table__.insert(), filas)
+        db.commit()
+
+        contactos_por_usuario = {}
+        for contacto_id, usuario_id in db.query(models.Contacto.id, models.Contacto.usuario_id):
+            contactos_por_usuario.setdefault(usuario_id, []).append(contacto_id)
+    finally:
+        db.close()
+
+    db = AgendaSession()
+    try:
+        db.execute(agenda_models.Persona.__table__.insert(), [
+            {"nombre": f"Persona {i}", "apellido": "Carga", "email": f"p{i}@bench-carga.com", "telefono": f"55{i:08d}"}
+            for i in range(usuarios * contactos)
+        ])
+        db.commit()
+        personas = [p for (p,) in db.query(agenda_models.Persona.id)]
+    finally:
+        db.close()
+
+    return {"usuarios": ids, "contactos": contactos_por_usuario, "personas": personas}
+
+
+def main_requests(datos, scenario):
+    """make_request para main.py según el escenario."""
+    from auth import create_access_token
+
+    usuarios = [(email, usuario_id) for email, usuario_id in datos["usuarios"].items()
+                if datos["contactos"].get(usuario_id)]
+    headers = {
+        usuario_id: {"Authorization": "Bearer " + create_access_token(
+            {"sub": email, "id": usuario_id, "rol": "admin" if email == "load0@bench-carga.com" else "user"})}
+        for email, usuario_id in datos["usuarios"].items()
+    }
+    creados = []
+
+    def make_request(client, i):
+        email, usuario_id = usuarios[i % len(usuarios)]
+        h = headers[usuario_id]
+        if scenario == "login":
+            return client.post("/login", json={"email": email, "password": PASSWORD})
+        if scenario == "list":
+            return client.get("/contactos", params={"limit": 50}, headers=h)
+        if scenario == "export":
+            return client.get("/contactos/export", params={"format": "ndjson"}, headers=h)
+
+        # crud: 50% listado, 20% detalle, 10% alta, 10% edición, 10% baja
+        paso = i % 10
+        propios = datos["contactos"][usuario_id]
+        if paso < 5:
+            return client.get("/contactos", params={"limit": 50}, headers=h)
+        if paso < 7:
+            return client.get(f"/contactos/{random.choice(propios)}", headers=h)
+        if paso == 7:
+            return crear(client, "/contactos", {"nombre": f"Nuevo {i}", "email": f"n{i}@bench-carga.com"}, h, usuario_id)
+        if paso == 8:
+            return client.put(f"/contactos/{random.choice(propios)}", json={"nombre": f"Editado {i}"}, headers=h)
+        pendientes = [c for c in creados if c[0] == usuario_id]
+        if pendientes:
+            creados.remove(pendientes[0])
+            return client.delete(f"/contactos/{pendientes[0][1]}", headers=h)
+        return client.get("/contactos", params={"limit": 50}, headers=h)
+
+    async def crear(client, url, body, h, dueno):
+        response = await client.post(url, json=body, headers=h)
+        if response.status_code < 300:
+            creados.append((dueno, response.json()["id"]))
+        return response
+
+    return make_request
+
+
+def agenda_requests(datos, scenario):
+    """make_request para agenda_fastapi según el escenario (sin login ni export)."""
+    personas = datos["personas"]
+    creadas = []
+
+    async def crear(client, body):
+        response = await client.post("/personas/", json=body)
+        if response.status_code < 300:
+            creadas.append(response.json()["id"])
+        return response
+
+    def make_request(client, i):
+        if scenario == "list":
+            return client.get("/personas/", params={"limit": 50})
+        paso = i % 10
+        if paso < 5:
+            return client.get("/personas/", params={"limit": 50})
+        if paso < 7:
+            return client.get(f"/personas/{random.choice(personas)}")
+        if paso == 7:
+            return crear(client, {"nombre": f"Nueva {i}", "apellido": "Carga", "email": f"nueva{i}@bench-carga.com"})
+        if paso == 8:
+            return client.put(f"/personas/{random.choice(personas)}", json={"nombre": f"Editada {i}"})
+        if creadas:
+            return client.delete(f"/personas/{creadas.pop()}")
+        return client.get("/personas/", params={"limit": 50})
+
+    return make_request
+
+
+def applies(app, scenario):
+    return app == "main" or scenario in ("list", "crud")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class UvicornServer:
+    """uvicorn en un subproceso con el mismo entorno (y la misma base) que la suite."""
+
+    def __init__(self, app, workers=1):
+        self.app = app
+        self.workers = workers
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.proc = None
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", UVICORN_APPS[self.app], "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=dict(os.environ),
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"uvicorn terminó con código {self.proc.returncode}")
+            try:
+                httpx.get(self.base_url + "/openapi.json", timeout=1)
+                return self
+            except httpx.TransportError:
+                time.sleep(0.1)
+        raise RuntimeError("uvicorn no respondió en 30 s")
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
+
+
+def run_scenario(app, transport, scenario, datos, args):
+    make_request = (main_requests if app == "main" else agenda_requests)(datos, scenario)
+    total = args.export_requests if scenario == "export" else args.requests
+    if scenario == "login":
+        total = args.login_requests
+
+    if transport == "inproc":
+        if app == "main":
+            import main as module
+        else:
+            from agenda_fastapi import main as module
+        return asyncio.run(drive(module.app, make_request, total, args.concurrency, fail_on_5xx=False))
+
+    with UvicornServer(app, args.workers) as server:
+        return asyncio.run(drive(None, make_request, total, args.concurrency,
+                                 base_url=server.base_url, fail_on_5xx=False))
+
+
+def compare(results, baseline_path, threshold):
+    """Imprime la variación contra una corrida previa; devuelve cuántos escenarios empeoraron."""
+    with open(baseline_path) as f:
+        baseline = {(r["app"], r["transport"], r["scenario"]): r for r in json.load(f)["results"]}
+    rows, regresiones = [], 0
+    for r in results:
+        previo = baseline.get((r["app"], r["transport"], r["scenario"]))
+        if previo is None:
+            continue
+        d_rps = (r["rps"] - previo["rps"]) / previo["rps"] if previo["rps"] else 0.0
+        d_p99 = (r["p99_ms"] - previo["p99_ms"]) / previo["p99_ms"] if previo["p99_ms"] else 0.0
+        peor = d_rps < -threshold or d_p99 > threshold
+        regresiones += peor
+        rows.append({"escenario": f"{r['app']}/{r['transport']}/{r['scenario']}",
+                     "rps": f"{d_rps:+.1%}", "p99": f"{d_p99:+.1%}", "estado": "REGRESIÓN" if peor else "ok"})
+    print(f"\nComparación contra {baseline_path} (umbral {threshold:.0%}):")
+    print_table(rows, ["escenario", "rps", "p99", "estado"])
+    return regresiones
+
+
+def parse_list(value, choices):
+    items = [v.strip() for v in value.split(",") if v.strip()]
+    invalid = set(items) - set(choices)
+    if invalid:
+        raise argparse.ArgumentTypeError(f"valores no válidos: {', '.join(sorted(invalid))}")
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", type=lambda v: parse_list(v, APPS), default=list(APPS))
+    parser.add_argument("--transport", type=lambda v: parse_list(v, TRANSPORTS), default=["inproc"],
+                        help="inproc, uvicorn o ambos separados por coma")
+    parser.add_argument("--scenarios", type=lambda v: parse_list(v, SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--usuarios", type=int, default=10)
+    parser.add_argument("--contactos", type=int, default=200, help="contactos por usuario")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--login-requests", type=int, default=200)
+    parser.add_argument("--export-requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="workers de uvicorn")
+    parser.add_argument("--cache", default="memory", help="CACHE_BACKEND de las apps (none para medir la base)")
+    parser.add_argument("--async-db", action="store_true", help="main.py con USE_ASYNC_DB=1")
+    parser.add_argument("--database-url", help="base vacía a sembrar; por defecto un SQLite temporal")
+    parser.add_argument("--async-database-url")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida previa")
+    parser.add_argument("--threshold", type=float, default=0.10, help="variación tolerada al comparar")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(args, tmp)
+        sys.path.insert(0, ROOT)
+        datos = seed(args.usuarios, args.contactos)
+
+        results = []
+        for transport in args.transport:
+            for app in args.apps:
+                for scenario in args.scenarios:
+                    if not applies(app, scenario):
+                        continue
+                    result = run_scenario(app, transport, scenario, datos, args)
+                    results.append({"app": app, "transport": transport, "scenario": scenario, **result})
+                    print(f"  {app}/{transport}/{scenario}: {result['rps']} req/s, p99 {result['p99_ms']} ms",
+                          file=sys.stderr)
+
+    print_table(results, ["app", "transport", "scenario", "requests", "rps", "p50_ms", "p95_ms", "p99_ms",
+                          "errors_5xx"])
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "plataforma": platform.platform(),
+                    "base": "sqlite" if not args.database_url else args.database_url.split(":", 1)[0],
+                    **{k: getattr(args, k) for k in ("usuarios", "contactos", "concurrency", "workers",
+                                                     "cache", "async_db")},
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
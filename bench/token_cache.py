@@ -0,0 +1,47 @@
+"""
+Microbenchmark de la dependencia auth.verify_token con y sin caché de tokens.
+
+    python -m bench.token_cache --calls 50000 --tokens 100
+"""
+import argparse
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+import auth
+from bench.common import print_table
+
+
+def run(calls, tokens, maxsize):
+    auth.token_cache.maxsize = maxsize
+    auth.token_cache.clear()
+    credentials = [
+        HTTPAuthorizationCredentials(
+            scheme="Bearer",
+            credentials=auth.create_access_token({"sub": f"u{i}@test.com", "id": i, "rol": "user"}),
+        )
+        for i in range(tokens)
+    ]
+    start = time.perf_counter()
+    for i in range(calls):
+        auth.verify_token(credentials[i % tokens])
+    elapsed = time.perf_counter() - start
+    return {"calls_s": round(calls / elapsed), "us_call": round(elapsed / calls * 1e6, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    rows = [
+        {"cache": "off", **run(args.calls, args.tokens, 0)},
+        {"cache": "on", **run(args.calls, args.tokens, auth.TOKEN_CACHE_SIZE)},
+    ]
+    print_table(rows, ["cache", "calls_s", "us_call"])
+    print(auth.token_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Escalado de main.py con el número de workers de serve.py.
+
+Para cada valor de --workers lanza `python serve.py` sobre la misma base
+SQLite sembrada y mide dos escenarios por red:
+  login  POST /login (bcrypt, limitado por CPU)
+  list   GET /contactos con token (sin caché de respuestas)
+
+En una máquina con un solo núcleo el throughput no debería crecer con los
+workers; con varios núcleos, login debería escalar casi linealmente hasta
+el número de CPUs.
+
+    python -m bench.workers --workers 1,2,4 --requests 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench.common import ROOT, drive, print_table, sqlite_env
+from bench.suite import free_port
+
+PASSWORD = "password123"
+
+
+def seed(env, contactos):
+    """Usuario de carga con contactos; devuelve (email, token)."""
+    code = (
+        "import json, migrate, seed_data\n"
+        "from auth import create_access_token\n"
+        "from database import engine\n"
+        "migrate.upgrade()\n"
+        f"ids = seed_data.sembrar_usuarios(engine, 1, password={PASSWORD!r})\n"
+        f"seed_data.sembrar_contactos(engine, ids, {contactos}, progreso=False)\n"
+        "from sqlalchemy import text\n"
+        "with engine.connect() as conn:\n"
+        "    email = conn.execute(text('SELECT email FROM usuarios WHERE id = :id'), {'id': ids[0]}).scalar()\n"
+        "print(json.dumps([email, create_access_token({'sub': email, 'id': ids[0], 'rol': 'admin'})]))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+class Serve:
+    def __init__(self, workers, env):
+        self.workers = workers
+        self.env = env
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, "serve.py", "--workers", str(self.workers), "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=self.env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"serve.py terminó con código {self.proc.returncode}")
+            try:
+                httpx.get(self.base_url + "/metrics", timeout=1)
+                # Dar tiempo a que todos los workers terminen su lifespan
+                time.sleep(0.5)
+                return self
+            except httpx.TransportError:
+                time.sleep(0.1)
+        raise RuntimeError("serve.py no respondió en 30 s")
+
+    def __exit__(self, *exc):
+        self.proc.terminate()
+        self.proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default=f"1,2,{os.cpu_count() or 1}")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--login-requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--contactos", type=int, default=200)
+    args = parser.parse_args()
+    counts = sorted({int(w) for w in args.workers.split(",")})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = sqlite_env(os.path.join(tmp, "workers.db"), CACHE_BACKEND="none", LOGIN_ADMISSION=0)
+        email, token = seed(env, args.contactos)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def login(client, i):
+            return client.post("/login", json={"email": email, "password": PASSWORD})
+
+        def listar(client, i):
+            return client.get("/contactos", headers=headers)
+
+        rows = []
+        for workers in counts:
+            with Serve(workers, env) as server:
+                for escenario, make_request, total in (("login", login, args.login_requests),
+                                                       ("list", listar, args.requests)):
+                    result = asyncio.run(drive(None, make_request, total, args.concurrency,
+                                               base_url=server.base_url, fail_on_5xx=False))
+                    rows.append({"workers": workers, "escenario": escenario, **result})
+    print(f"CPUs: {os.cpu_count()}")
+    print_table(rows, ["workers", "escenario", "rps", "p50_ms", "p99_ms", "errors_5xx"])
+
+
+if __name__ == "__main__":
+    main()
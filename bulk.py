@@ -0,0 +1,62 @@
+"""
+Importación masiva de contactos (y de personas en agenda_fastapi): lectura
+del cuerpo (JSON o CSV), validación por lotes y errores por fila. La
+inserción la hace cada ruta (sync o async) con un INSERT multi-fila por lote.
+"""
+import csv
+import io
+import os
+from pydantic import ValidationError
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "100000"))
+# Máximo de operaciones por POST /contactos/batch
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "500"))
+
+def parse_csv(text):
+    # Las celdas vacías se tratan como campos sin valor
+    reader = csv.DictReader(io.StringIO(text))
+    return [{k: (v or None) for k, v in row.items() if k} for row in reader]
+
+async def read_rows(request, items="contactos"):
+    """Lee una lista JSON, un CSV (text/csv) o un CSV subido en el campo 'file'."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise ValueError("Falta el archivo CSV en el campo 'file'")
+        rows = parse_csv((await upload.read()).decode("utf-8-sig"))
+    elif content_type.startswith("text/csv"):
+        rows = parse_csv((await request.body()).decode("utf-8-sig"))
+    else:
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise ValueError("JSON inválido")
+        if not isinstance(rows, list):
+            raise ValueError(f"Se esperaba una lista de {items}")
+    if len(rows) > BULK_MAX_ROWS:
+        raise ValueError(f"Máximo {BULK_MAX_ROWS} filas por importación")
+    return rows
+
+def error_messages(error):
+    return [f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+def validate_in_batches(rows, schema, batch_size, errors):
+    """Genera lotes de (índice, objeto validado); las filas inválidas van a `errors`."""
+    batch = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({"index": index, "detail": ["Se esperaba un objeto"]})
+            continue
+        try:
+            batch.append((index, schema(**row)))
+        except ValidationError as e:
+            errors.append({"index": index, "detail": error_messages(e)})
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
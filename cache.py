@@ -0,0 +1,169 @@
+"""
+Caché de respuestas serializadas (read-through) con invalidación en escritura.
+
+El backend es cualquier objeto con get/set(ex=)/delete como redis-py:
+  - CACHE_BACKEND=memory: LRU en proceso, acotado por CACHE_MAX_ENTRIES
+  - CACHE_BACKEND=redis:  redis.Redis.from_url(REDIS_URL), compartido entre workers
+  - CACHE_BACKEND=fake:   FakeRedis, sustituto local de Redis para pruebas
+  - CACHE_BACKEND=none:   desactivada
+
+memory y fake viven en cada proceso: una invalidación solo llega al worker
+que atendió la escritura. Con WEB_CONCURRENCY > 1 (serve.py lo fija) la
+caché local se desactiva; para cachear con varios workers, usar redis.
+
+Cada namespace (p. ej. la agenda de un usuario) tiene una generación aleatoria
+que forma parte de las llaves; invalidar es cambiar la generación, así que no
+hay que enumerar ni borrar las páginas guardadas (expiran por TTL o LRU).
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from fastapi import Response
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Procesos que atienden la app (serve.py / uvicorn --workers)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+logger = logging.getLogger("uvicorn.error")
+
+class MemoryBackend:
+    """LRU en proceso con TTL por llave."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data = OrderedDict()  # llave -> (valor, expira)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._data[name]
+                return None
+            self._data.move_to_end(name)
+            return value
+
+    def set(self, name, value, ex=None):
+        expires = time.monotonic() + ex if ex else None
+        with self._lock:
+            self._data[name] = (value, expires)
+            self._data.move_to_end(name)
+            while self.max_entries and len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def dbsize(self):
+        with self._lock:
+            return len(self._data)
+
+class FakeRedis(MemoryBackend):
+    """Sustituto local de Redis: sin límite de tamaño y devuelve bytes como redis-py."""
+
+    def __init__(self):
+        super().__init__(max_entries=0)
+
+    def set(self, name, value, ex=None):
+        return super().set(name, value.encode() if isinstance(value, str) else value, ex=ex)
+
+def create_backend(kind=CACHE_BACKEND):
+    if kind == "none":
+        return None
+    if kind == "redis":
+        import redis  # dependencia opcional
+        return redis.Redis.from_url(REDIS_URL)
+    if WEB_CONCURRENCY > 1:
+        logger.warning("CACHE_BACKEND=%s es local a cada uno de los %d workers: caché desactivada "
+                       "(usa CACHE_BACKEND=redis)", kind, WEB_CONCURRENCY)
+        return None
+    if kind == "fake":
+        return FakeRedis()
+    return MemoryBackend()
+
+class ResponseCache:
+    def __init__(self, backend, ttl=CACHE_TTL, prefix="agenda"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "stores": 0, "invalidations": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _generation(self, namespace):
+        key = f"{self.prefix}:gen:{namespace}"
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation)
+        return generation.decode() if isinstance(generation, bytes) else generation
+
+    def lookup(self, namespace, key, valid=None):
+        """
+        Devuelve (valor o None, slot). La generación se lee antes de consultar
+        la base, así que si una escritura invalida mientras tanto, store(slot)
+        guarda en una generación que ya nadie lee. Si `valid(valor)` es falso
+        el valor se descarta (cuenta como "stale") y store(slot) lo reemplaza.
+        """
+        if self.backend is None:
+            return None, None
+        slot = f"{self.prefix}:{namespace}:{self._generation(namespace)}:{key}"
+        value = self.backend.get(slot)
+        if value is not None and valid is not None and not valid(value):
+            self._count("stale")
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value, slot
+
+    def store(self, slot, value):
+        if self.backend is None or slot is None:
+            return
+        self.backend.set(slot, value, ex=self.ttl)
+        self._count("stores")
+
+    def invalidate(self, namespace):
+        if self.backend is None:
+            return
+        self.backend.set(f"{self.prefix}:gen:{namespace}", uuid.uuid4().hex)
+        self._count("invalidations")
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        total = counters["hits"] + counters["misses"]
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else "none",
+            "ttl": self.ttl,
+            **counters,
+            "hit_rate": round(counters["hits"] / total, 4) if total else 0.0,
+            "evictions": getattr(self.backend, "evictions", None),
+            "entries": self.backend.dbsize() if hasattr(self.backend, "dbsize") else None,
+        }
+
+response_cache = ResponseCache(create_backend())
+
+def pack(etag, body):
+    return etag.encode() + b"\n" + body
+
+def unpack(value):
+    etag, body = value.split(b"\n", 1)
+    return etag.decode(), body
+
+def json_response(body, headers=None):
+    return Response(content=body, media_type="application/json", headers=headers)
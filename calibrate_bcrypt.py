@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Calibra el costo de bcrypt para este hardware.
+
+Mide bcrypt con costos crecientes (cada +1 duplica el tiempo) y elige el
+mayor cuyo hash cabe en --budget-ms. El presupuesto es por hash, sin cola:
+debe dejar margen dentro del SLO de /login para la consulta y la espera en
+el pool de hashing con carga. Nunca baja de --min-rounds aunque no quepa.
+
+El resultado es BCRYPT_ROUNDS (auth.py), que se imprime como línea export.
+main.py y serve.py no cargan ningún archivo de entorno: el despliegue debe
+fijar la variable en el entorno del proceso (export antes de arrancar,
+EnvironmentFile de systemd, docker --env-file...). --env-file actualiza ese
+archivo si el despliegue usa uno. Los hashes existentes se convergen solos
+al nuevo costo en el siguiente login correcto de cada usuario.
+
+    python calibrate_bcrypt.py --budget-ms 250
+    python calibrate_bcrypt.py --budget-ms 250 --env-file /etc/agenda/agenda.env
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from passlib.context import CryptContext
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+def measure(rounds, samples=3):
+    """Mediana en ms de hashear con `rounds` (un hash de calentamiento aparte)."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    context.hash("calentamiento")
+    tiempos = []
+    for _ in range(samples):
+        inicio = time.perf_counter()
+        context.hash("calibracion")
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+def calibrate(budget_ms, min_rounds=MIN_ROUNDS, max_rounds=MAX_ROUNDS, samples=3):
+    """Devuelve (costo elegido, [(costo, ms), ...]); se detiene al pasarse del presupuesto."""
+    elegido = min_rounds
+    medidas = []
+    for rounds in range(min_rounds, max_rounds + 1):
+        ms = measure(rounds, samples)
+        medidas.append((rounds, ms))
+        if ms > budget_ms:
+            break
+        elegido = rounds
+    return elegido, medidas
+
+def write_env(path, name, value):
+    """Reemplaza (o añade) la línea NAME=valor del archivo de entorno."""
+    lineas = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lineas = f.read().splitlines()
+    linea = f"{name}={value}"
+    for i, actual in enumerate(lineas):
+        if actual.split("=", 1)[0].strip() in (name, f"export {name}"):
+            lineas[i] = linea
+            break
+    else:
+        lineas.append(linea)
+    with open(path, "w") as f:
+        f.write("\n".join(lineas) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=250, help="tiempo máximo por hash")
+    parser.add_argument("--min-rounds", type=int, default=MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    parser.add_argument("--samples", type=int, default=3, help="hashes medidos por costo")
+    parser.add_argument("--env-file", help="archivo de entorno del despliegue donde guardar BCRYPT_ROUNDS")
+    args = parser.parse_args()
+
+    from auth import BCRYPT_ROUNDS
+
+    print(f"⏱️  Calibrando bcrypt (presupuesto {args.budget_ms:g} ms por hash)")
+    elegido, medidas = calibrate(args.budget_ms, args.min_rounds, args.max_rounds, args.samples)
+    for rounds, ms in medidas:
+        marca = "✅" if rounds == elegido else ("❌" if ms > args.budget_ms else "  ")
+        print(f"   {marca} costo {rounds:>2}: {ms:8.1f} ms")
+
+    if medidas[0][1] > args.budget_ms:
+        print(f"⚠️  Ni el costo mínimo ({args.min_rounds}) cabe en el presupuesto; se usa igualmente")
+    print(f"\nexport BCRYPT_ROUNDS={elegido}  # actual: {BCRYPT_ROUNDS}")
+
+    if args.env_file:
+        write_env(args.env_file, "BCRYPT_ROUNDS", elegido)
+        print(f"💾 Guardado en {args.env_file}: la app solo lo verá si el despliegue carga ese archivo")
+    else:
+        print("   La app lo toma del entorno al arrancar: fíjalo en el despliegue y reinicia")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,13 @@
 """
 Script para verificar el esquema de la base de datos.
 """
-from sqlalchemy import create_engine, text, inspect
-from database import DATABASE_URL
+from sqlalchemy import text, inspect
+from database import engine
 import pandas as pd
 
 def check_database_schema():
     """Verifica y muestra el esquema de la base de datos."""
     try:
-        engine = create_engine(DATABASE_URL)
         inspector = inspect(engine)
         
         print("🗄️  ESQUEMA DE LA BASE DE DATOS")
@@ -71,7 +70,6 @@ def check_database_schema():
 def show_users_with_passwords():
     """Muestra todos los usuarios con información sobre sus passwords."""
     try:
-        engine = create_engine(DATABASE_URL)
         
         print("👥 USUARIOS EN EL SISTEMA")
         print("=" * 50)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Prueba local del borrado de usuarios con purga en segundo plano (SQLite).
+
+Crea un usuario con una agenda grande y comprueba con main.py que:
+  - DELETE /usuarios/{id} responde 202 al instante y el usuario desaparece
+    del listado y no puede iniciar sesión; su email queda libre para otra cuenta
+  - sus tokens se rechazan aunque no hayan expirado
+  - la purga avanza por lotes (progreso en GET /usuarios/purgas/{id})
+  - un trabajo interrumpido se reanuda desde ultimo_id
+  - un fallo transitorio reprograma el trabajo con espera; tras
+    PURGE_MAX_ATTEMPTS queda en error y POST .../reintentar lo reencola
+  - al terminar no quedan contactos ni la fila del usuario
+
+    python check_purge.py [--contactos 50000] [--async]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+fallos = []
+
+
+def check(descripcion, condicion):
+    print(f"   {'✅' if condicion else '❌'} {descripcion}")
+    if not condicion:
+        fallos.append(descripcion)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contactos", type=int, default=50000)
+    parser.add_argument("--async", dest="async_db", action="store_true")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmp.name, "purga.db")
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "USE_ASYNC_DB": "1" if args.async_db else "0",
+        "CACHE_BACKEND": "none",
+        "PURGE_CHUNK_SIZE": "1000",
+        "PURGE_PAUSE_MS": "0",
+    })
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select
+    from sqlalchemy.exc import OperationalError
+
+    import database
+    import main as app_main
+    import migrate
+    import models
+    import purge
+    from auth import create_access_token, get_password_hash
+    from seed_data import sembrar_contactos
+
+    migrate.upgrade()
+    with database.SessionLocal() as db:
+        for email, rol in (("admin@purga.com", "admin"), ("victima@purga.com", "user"), ("otro@purga.com", "user")):
+            db.add(models.Usuario(email=email, password=get_password_hash("secreto"), nombre=email, rol=rol))
+        db.commit()
+        ids = dict(db.query(models.Usuario.email, models.Usuario.id))
+    sembrar_contactos(database.engine, [ids["victima@purga.com"], ids["otro@purga.com"]],
+                      args.contactos, semilla=1, progreso=False)
+
+    def headers(email, rol):
+        return {"Authorization": f"Bearer {create_access_token({'sub': email, 'id': ids[email], 'rol': rol})}"}
+    admin, victima = headers("admin@purga.com", "admin"), headers("victima@purga.com", "user")
+
+    def contar(usuario_id):
+        with database.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(models.Contacto)
+                                .where(models.Contacto.usuario_id == usuario_id)).scalar()
+
+    print(f"🧹 Purga de {args.contactos} contactos ({'async' if args.async_db else 'sync'})")
+    # Sin worker en el lifespan: la purga se ejecuta a mano para poder interrumpirla
+    purge.PURGE_WORKER = False
+    with TestClient(app_main.app) as client:
+        assert client.get("/contactos", headers=victima).status_code == 200
+
+        inicio = time.perf_counter()
+        respuesta = client.delete(f"/usuarios/{ids['victima@purga.com']}", headers=admin)
+        ms = (time.perf_counter() - inicio) * 1000
+        check(f"DELETE responde 202 sin esperar la purga ({ms:.1f} ms)", respuesta.status_code == 202)
+        job_id = respuesta.json()["purga"]
+        check("borrar de nuevo da 404",
+              client.delete(f"/usuarios/{ids['victima@purga.com']}", headers=admin).status_code == 404)
+
+        emails = [u["email"] for u in client.get("/usuarios", headers=admin).json()]
+        check("el usuario ya no aparece en /usuarios", "victima@purga.com" not in emails)
+        check("su token se rechaza", client.get("/contactos", headers=victima).status_code == 401)
+        check("no puede iniciar sesión",
+              client.post("/login", json={"email": "victima@purga.com", "password": "secreto"}).status_code == 401)
+        check("su email se puede registrar de nuevo",
+              client.post("/usuarios", headers=admin,
+                          json={"email": "victima@purga.com", "password": "otra", "nombre": "Nueva"}).status_code == 200)
+        check("la exportación de admin da 404",
+              client.get(f"/usuarios/{ids['victima@purga.com']}/contactos/export", headers=admin).status_code == 404)
+
+        estado = client.get(f"/usuarios/purgas/{job_id}", headers=admin).json()
+        check("el trabajo queda pendiente con el total de contactos",
+              estado["estado"] == "pendiente" and estado["total"] == args.contactos)
+
+        # Interrumpir la purga tras el primer lote y reanudarla
+        class TrasUnLote:
+            def is_set(self):
+                return True
+        check("la purga se interrumpe tras un lote", purge.run_job(job_id, stop=TrasUnLote()) is False)
+        estado = client.get(f"/usuarios/purgas/{job_id}", headers=admin).json()
+        check("progreso parcial registrado",
+              estado["borrados"] == 1000 and contar(ids["victima@purga.com"]) == args.contactos - 1000)
+
+        # Fallos transitorios (p. ej. lock wait timeout) a mitad de la purga
+        def lote_fallido(*args, **kwargs):
+            raise OperationalError("DELETE FROM contactos", {}, Exception("Lock wait timeout exceeded"))
+
+        def fallar():
+            with database.engine.begin() as conn:
+                conn.execute(purge.jobs.update().values(lease_hasta=None))  # vence la espera
+            try:
+                purge.run_job(job_id)
+            except OperationalError:
+                pass
+            return client.get(f"/usuarios/purgas/{job_id}", headers=admin).json()
+
+        purge_chunk, purge.purge_chunk = purge.purge_chunk, lote_fallido
+        try:
+            estado = fallar()
+            check("un fallo transitorio deja el trabajo pendiente, con reintento programado",
+                  estado["estado"] == "pendiente" and estado["intentos"] == 1 and job_id not in purge.pending_jobs())
+            for _ in range(purge.PURGE_MAX_ATTEMPTS - 1):
+                estado = fallar()
+            check(f"tras {purge.PURGE_MAX_ATTEMPTS} fallos seguidos queda en error",
+                  estado["estado"] == "error" and "Lock wait timeout" in estado["error"])
+        finally:
+            purge.purge_chunk = purge_chunk
+        check("reintentar lo vuelve a encolar",
+              client.post(f"/usuarios/purgas/{job_id}/reintentar", headers=admin).status_code == 202
+              and client.get(f"/usuarios/purgas/{job_id}", headers=admin).json()["intentos"] == 0)
+
+        # Simula un worker caído: el lease vence y otro lo retoma
+        with database.engine.begin() as conn:
+            conn.execute(purge.jobs.update().values(lease_hasta=None))
+        inicio = time.perf_counter()
+        check("el trabajo se reanuda y termina", purge.run_job(job_id) is True)
+        segundos = time.perf_counter() - inicio
+        estado = client.get(f"/usuarios/purgas/{job_id}", headers=admin).json()
+        check(f"completado: {estado['borrados']} borrados en {segundos:.2f} s",
+              estado["estado"] == "completado" and estado["borrados"] == args.contactos and estado["progreso"] == 1.0)
+        check("no quedan contactos del usuario", contar(ids["victima@purga.com"]) == 0)
+        with database.SessionLocal() as db:
+            check("la fila del usuario se borró", db.get(models.Usuario, ids["victima@purga.com"]) is None)
+        check("los contactos de otros usuarios siguen ahí", contar(ids["otro@purga.com"]) == args.contactos)
+        check("el token sigue rechazado tras la purga", client.get("/contactos", headers=victima).status_code == 401)
+
+    if fallos:
+        print(f"\n❌ {len(fallos)} comprobación(es) fallaron")
+        sys.exit(1)
+    print("\n✅ Purga correcta")
+
+
+if __name__ == "__main__":
+    main()
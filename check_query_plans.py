@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Regresión de planes de consulta.
+
+Ejecuta las rutas de main.py y las funciones de agenda_fastapi/crud.py contra
+una base sembrada, captura cada sentencia que emiten y le corre EXPLAIN.
+Termina con código 1 si alguna hace un recorrido completo de tabla. También
+comprueba que la búsqueda por prefijo encuentre prefijos que terminan en "z"
+y en "9" (con --database-url, contra la collation real de MySQL), que un texto
+con algún dígito no busque en el teléfono y que el upsert de personas trate
+igual un email con otras mayúsculas.
+
+Un recorrido ordenado con LIMIT y sin ordenamiento temporal (la primera
+página de un listado) se acepta: se detiene tras LIMIT filas.
+
+    python check_query_plans.py                          # SQLite temporal
+    python check_query_plans.py --database-url mysql+mysqlconnector://root@localhost/plan_check
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+# Rutas cuyo recorrido completo es intencional
+ALLOWED_SCANS = {
+    "GET /usuarios": "lista completa de usuarios (solo admin)",
+}
+
+TABLES = ("usuarios", "contactos", "personas")
+
+
+def sqlite_full_scan(plan, statement):
+    detalles = [fila[-1] for fila in plan]
+    ordenado_con_limite = " LIMIT " in statement and not any("TEMP B-TREE" in d for d in detalles)
+    for detalle in detalles:
+        match = re.match(r"SCAN (\w+)", detalle)
+        if match and match.group(1) in TABLES and not ordenado_con_limite:
+            return detalle
+    return None
+
+
+def mysql_full_scan(plan, statement):
+    for fila in plan:
+        fila = dict(fila._mapping)
+        if fila.get("table") in TABLES and fila.get("type") == "ALL":
+            return f"type=ALL en {fila['table']}"
+        if fila.get("table") in TABLES and fila.get("type") == "index" and " LIMIT " not in statement:
+            return f"type=index (índice completo) en {fila['table']}"
+    return None
+
+
+class PlanChecker:
+    def __init__(self, engines):
+        self.origen = None
+        self.sentencias = {}
+        for engine in engines:
+            from sqlalchemy import event
+            event.listen(engine, "before_cursor_execute", self._capturar)
+
+    def _capturar(self, conn, cursor, statement, parameters, context, executemany):
+        if self.origen is None or executemany:
+            return
+        if statement.lstrip().split(" ", 1)[0].upper() in ("SELECT", "UPDATE", "DELETE"):
+            self.sentencias.setdefault((self.origen, statement), (conn.engine, parameters))
+
+    def explicar(self):
+        fallos = []
+        self.origen, origen_previo = None, self.origen
+        for (origen, statement), (engine, parameters) in self.sentencias.items():
+            with engine.connect() as conn:
+                if engine.dialect.name == "sqlite":
+                    plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+                    problema = sqlite_full_scan(plan, statement)
+                else:
+                    plan = conn.exec_driver_sql("EXPLAIN " + statement, parameters).all()
+                    problema = mysql_full_scan(plan, statement)
+            estado = "OK"
+            if problema:
+                estado = "PERMITIDO" if origen in ALLOWED_SCANS else "FALLA"
+                if estado == "FALLA":
+                    fallos.append((origen, statement, problema))
+            print(f"{estado:>9}  {origen}: {' '.join(statement.split())[:110]}")
+        self.origen = origen_previo
+        return fallos
+
+
+def seed(db, models, get_password_hash, usuarios=5, contactos=400):
+    from search import normalized_values
+
+    for u in range(usuarios):
+        usuario = models.Usuario(email=f"user{u}@test.com", password=get_password_hash("password123"),
+                                 nombre=f"Usuario {u}", rol="admin" if u == 0 else "user")
+        db.add(usuario)
+        db.flush()
+        db.execute(models.Contacto.__table__.insert(), [
+            {"nombre": f"Contacto {i}", "email": f"c{u}_{i}@test.com", "telefono": f"555{i:07d}",
+             "usuario_id": usuario.id, **normalized_values(f"Contacto {i}", f"c{u}_{i}@test.com", f"555{i:07d}")}
+            for i in range(contactos)
+        ])
+    db.commit()
+
+
+def ejecutar_main(checker):
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+
+    def llamar(origen, method, url, **kwargs):
+        checker.origen = origen
+        response = client.request(method, url, **kwargs)
+        checker.origen = None
+        assert response.status_code < 500, (origen, response.text)
+        return response
+
+    token = llamar("POST /login", "POST", "/login",
+                   json={"email": "user0@test.com", "password": "password123"}).json()["access_token"]
+    h = {"Authorization": f"Bearer {token}"}
+
+    llamar("GET /usuarios", "GET", "/usuarios", headers=h)
+    nuevo = llamar("POST /usuarios", "POST", "/usuarios", headers=h,
+                   json={"email": "nuevo@test.com", "password": "x", "nombre": "Nuevo"}).json()
+    llamar("GET /usuarios/{id}/contactos/export", "GET", "/usuarios/2/contactos/export", headers=h)
+    llamar("DELETE /usuarios/{id}", "DELETE", f"/usuarios/{nuevo['id']}", headers=h)
+
+    pagina = llamar("GET /contactos", "GET", "/contactos", headers=h, params={"limit": 20}).json()
+    llamar("GET /contactos", "GET", "/contactos", headers=h, params={"limit": 20, "cursor": pagina["next_cursor"]})
+    for q, match in (("cont", "prefix"), ("555", "prefix"), ("to 1", "substring")):
+        pagina = llamar("GET /contactos/search", "GET", "/contactos/search", headers=h,
+                        params={"q": q, "match": match, "limit": 5}).json()
+        llamar("GET /contactos/search", "GET", "/contactos/search", headers=h,
+               params={"q": q, "match": match, "limit": 5, "cursor": pagina["next_cursor"]})
+    # Prefijos que terminan en "z" y en "9": el límite superior del rango ("{", ":")
+    # ordena antes que letras y dígitos con una collation no binaria en MySQL
+    llamar("POST /contactos", "POST", "/contactos", headers=h, json={"nombre": "Luz Díaz", "telefono": "559 1234"})
+    for q in ("luz", "559"):
+        encontrados = llamar("GET /contactos/search", "GET", "/contactos/search", headers=h,
+                             params={"q": q, "match": "prefix"}).json()["items"]
+        assert [c["nombre"] for c in encontrados] == ["Luz Díaz"], (q, encontrados)
+    # "bob4" no es un teléfono: el "4" no debe traer contactos cuyo teléfono lo contiene
+    for match in ("prefix", "substring"):
+        encontrados = llamar("GET /contactos/search", "GET", "/contactos/search", headers=h,
+                             params={"q": "bob4", "match": match}).json()["items"]
+        assert encontrados == [], (match, encontrados)
+    llamar("GET /contactos/export", "GET", "/contactos/export", headers=h)
+    creado = llamar("POST /contactos", "POST", "/contactos", headers=h, json={"nombre": "Nuevo"}).json()
+    llamar("POST /contactos/bulk", "POST", "/contactos/bulk", headers=h, json=[{"nombre": "Bulk"}])
+    llamar("POST /contactos/batch", "POST", "/contactos/batch", headers=h, json=[
+        {"op": "create", "data": {"nombre": "Lote"}}, {"op": "update", "id": creado["id"], "data": {"nombre": "L"}},
+        {"op": "delete", "id": 10**6}])
+    llamar("GET /contactos/{id}", "GET", f"/contactos/{creado['id']}", headers=h)
+    llamar("PUT /contactos/{id}", "PUT", f"/contactos/{creado['id']}", headers=h, json={"nombre": "Editado"})
+    llamar("DELETE /contactos/{id}", "DELETE", f"/contactos/{creado['id']}", headers=h)
+
+
+def ejecutar_crud(checker):
+    from agenda_fastapi import crud, schemas
+    from agenda_fastapi.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        def llamar(origen, fn, *args, **kwargs):
+            checker.origen = origen
+            try:
+                return fn(db, *args, **kwargs)
+            finally:
+                checker.origen = None
+
+        datos = [{"nombre": f"P{i}", "apellido": "A", "email": f"p{i}@test.com"} for i in range(300)]
+        llamar("crud.crear_personas_bulk", crud.crear_personas_bulk, datos)
+        persona = llamar("crud.crear_persona", crud.crear_persona,
+                         schemas.PersonaCreate(nombre="N", apellido="A", email="nueva@test.com"))
+        llamar("crud.obtener_persona", crud.obtener_persona, persona.id)
+        llamar("crud.obtener_persona_por_email", crud.obtener_persona_por_email, "p1@test.com")
+        pagina = llamar("crud.obtener_personas", crud.obtener_personas, limit=20)
+        llamar("crud.obtener_personas", crud.obtener_personas, cursor=pagina["next_cursor"], limit=20)
+        llamar("crud.actualizar_persona", crud.actualizar_persona, persona.id, schemas.PersonaUpdate(nombre="M"))
+        llamar("crud.upsert_persona", crud.upsert_persona,
+               schemas.PersonaCreate(nombre="U", apellido="A", email="upsert@test.com"))
+        sync = llamar("crud.upsert_personas_bulk", crud.upsert_personas_bulk,
+                      [{"nombre": "P1", "apellido": "B", "email": "P1@test.com"},
+                       {"nombre": "Q", "apellido": "B", "email": "q@test.com"},
+                       {"nombre": "Q", "apellido": "C", "email": "Q@test.com"}])
+        # El email se normaliza: otra capitalización actualiza la fila existente
+        assert [r["resultado"] for r in sync["results"]] == ["actualizado", "insertado"], sync
+        assert [e["index"] for e in sync["errors"]] == [2], sync
+        llamar("crud.eliminar_persona", crud.eliminar_persona, persona.id)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="base de pruebas (se siembra); por defecto un SQLite temporal")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp.name, 'plans.db')}"
+    # Sin caché de respuestas: cada ruta debe llegar a la base
+    os.environ["CACHE_BACKEND"] = "none"
+
+    import models
+    import migrate
+    from auth import get_password_hash
+    from database import SessionLocal, engine
+    from agenda_fastapi import models as agenda_models
+    from agenda_fastapi.database import engine as agenda_engine
+
+    migrate.upgrade()
+    agenda_models.Base.metadata.create_all(bind=agenda_engine)
+    db = SessionLocal()
+    try:
+        seed(db, models, get_password_hash)
+    finally:
+        db.close()
+
+    checker = PlanChecker([engine, agenda_engine])
+    ejecutar_main(checker)
+    ejecutar_crud(checker)
+    fallos = checker.explicar()
+
+    if fallos:
+        print(f"\n❌ {len(fallos)} consulta(s) con recorrido completo de tabla:")
+        for origen, statement, problema in fallos:
+            print(f"   • {origen}: {problema}\n     {' '.join(statement.split())}")
+        sys.exit(1)
+    print(f"\n✅ {len(checker.sentencias)} consultas revisadas, sin recorridos completos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Prueba local del enrutamiento a réplicas con archivos SQLite.
+
+Un archivo hace de primario y otros dos de réplicas; "replicar" es copiar el
+primario sobre las réplicas (API de backup de sqlite3), así que entre copias
+las réplicas van atrasadas como lo haría una réplica real. Comprueba con
+main.py y agenda_fastapi que:
+  - las lecturas se reparten entre las réplicas (round-robin y least_connections)
+  - quien acaba de escribir lee del primario (ve su escritura)
+  - los demás usuarios siguen leyendo de las réplicas
+  - pasado READ_YOUR_WRITES_SECONDS se vuelve a las réplicas
+
+    python check_replicas.py            # rutas sync
+    python check_replicas.py --async    # rutas async (USE_ASYNC_DB=1)
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+STICKY_SECONDS = 0.5
+fallos = []
+
+
+def check(descripcion, condicion):
+    print(f"   {'✅' if condicion else '❌'} {descripcion}")
+    if not condicion:
+        fallos.append(descripcion)
+
+
+def replicar(primario, replicas):
+    origen = sqlite3.connect(primario)
+    for replica in replicas:
+        destino = sqlite3.connect(replica)
+        origen.backup(destino)
+        destino.close()
+    origen.close()
+
+
+def lecturas(router):
+    return router.stats()["reads"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--async", dest="async_db", action="store_true")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    primario = os.path.join(tmp.name, "primario.db")
+    replicas = [os.path.join(tmp.name, f"replica_{i}.db") for i in range(2)]
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{primario}",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{primario}",
+        "DATABASE_REPLICA_URLS": ",".join(f"sqlite:///{r}" for r in replicas),
+        "ASYNC_DATABASE_REPLICA_URLS": ",".join(f"sqlite+aiosqlite:///{r}" for r in replicas),
+        "READ_YOUR_WRITES_SECONDS": str(STICKY_SECONDS),
+        "USE_ASYNC_DB": "1" if args.async_db else "0",
+        # Sin caché de respuestas: cada lectura debe llegar a la base
+        "CACHE_BACKEND": "none",
+    })
+
+    from fastapi.testclient import TestClient
+
+    import database
+    import main as app_main
+    import migrate
+    import models
+    from agenda_fastapi import main as agenda_main, schema as agenda_schema
+    from agenda_fastapi.database import replicas as agenda_router
+    from auth import create_access_token
+
+    migrate.upgrade()
+    agenda_schema.create()
+    with database.SessionLocal() as db:
+        for email, rol in (("a@replicas.com", "admin"), ("b@replicas.com", "user")):
+            db.add(models.Usuario(email=email, password="x", nombre=email, rol=rol))
+        db.commit()
+        ids = dict(db.query(models.Usuario.email, models.Usuario.id))
+    replicar(primario, replicas)
+
+    def headers(email, rol):
+        return {"Authorization": f"Bearer {create_access_token({'sub': email, 'id': ids[email], 'rol': rol})}"}
+    a, b = headers("a@replicas.com", "admin"), headers("b@replicas.com", "user")
+    router = database.async_replicas if args.async_db else database.replicas
+
+    def nombres(client, h):
+        return [c["nombre"] for c in client.get("/contactos", headers=h).json()["items"]]
+
+    print(f"🔀 main.py ({'async' if args.async_db else 'sync'})")
+    with TestClient(app_main.app) as client:
+        antes = lecturas(router)
+        for _ in range(4):
+            assert client.get("/contactos", headers=b).status_code == 200
+        despues = lecturas(router)
+        check("round-robin: 4 lecturas, 2 por réplica",
+              [x - y for x, y in zip(despues["replicas"], antes["replicas"])] == [2, 2])
+
+        assert client.post("/contactos", json={"nombre": "Nuevo"}, headers=a).status_code == 200
+        check("quien escribió lee su escritura (primario)", nombres(client, a) == ["Nuevo"])
+        check("la lectura fue al primario por la marca de escritura", lecturas(router)["sticky"] == 1)
+        check("otro usuario sigue en las réplicas",
+              client.get("/contactos", headers=b).status_code == 200 and lecturas(router)["sticky"] == 1)
+
+        time.sleep(STICKY_SECONDS + 0.1)
+        check("pasada la ventana se lee de la réplica (atrasada)", nombres(client, a) == [])
+        replicar(primario, replicas)
+        check("tras replicar, la réplica ya tiene el contacto", nombres(client, a) == ["Nuevo"])
+
+        export = client.get("/contactos/export", headers=a)
+        check("la exportación lee de una réplica", export.status_code == 200 and "Nuevo" in export.text)
+
+        router.balance = "least_connections"
+        if args.async_db:
+            async def ocupar():
+                async with router.replicas[0].connect():
+                    return router.engine_for_read()
+            elegida = asyncio.run(ocupar())
+        else:
+            with router.replicas[0].connect():
+                elegida = router.engine_for_read()
+        check("least_connections evita la réplica con conexiones en uso", elegida is router.replicas[1])
+        router.balance = "round_robin"
+
+    print("🔀 agenda_fastapi")
+    with TestClient(agenda_main.app) as client:
+        persona = {"nombre": "Ana", "apellido": "Ruiz", "email": "ana@replicas.com"}
+        assert client.post("/personas/", json=persona).status_code == 201
+        check("tras escribir, el listado sale del primario",
+              [p["email"] for p in client.get("/personas/").json()["items"]] == ["ana@replicas.com"])
+        time.sleep(STICKY_SECONDS + 0.1)
+        client.get("/personas/")
+        check("después vuelve a las réplicas", sum(lecturas(agenda_router)["replicas"]) == 1)
+
+    if fallos:
+        print(f"\n❌ {len(fallos)} comprobación(es) fallaron")
+        sys.exit(1)
+    print("\n✅ Enrutamiento a réplicas correcto")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,19 @@ CREATE DATABASE IF NOT EXISTS sistema_python;
 USE sistema_python;
 
 -- Tabla de usuarios
+-- Debe coincidir con models.py (el esquema se versiona en migrate.py)
 CREATE TABLE IF NOT EXISTS usuarios (
     id INT AUTO_INCREMENT PRIMARY KEY,
-    email VARCHAR(255) UNIQUE NOT NULL,
+    email VARCHAR(255) NOT NULL,
     password VARCHAR(255) NOT NULL,
     nombre VARCHAR(255) NOT NULL,
     rol ENUM('admin', 'user') DEFAULT 'user',
-    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Se incrementa con cada cambio en sus contactos (ETags)
+    contactos_version INT NOT NULL DEFAULT 0,
+    -- Borrado lógico: purge.py borra después sus contactos por lotes
+    eliminado_en TIMESTAMP NULL,
+    UNIQUE INDEX ix_usuarios_email (email)
 );
 
 -- Tabla de contactos (agenda)
@@ -20,10 +26,52 @@ CREATE TABLE IF NOT EXISTS contactos (
     telefono VARCHAR(20),
     usuario_id INT,
     fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+    -- Copias normalizadas para la búsqueda (las mantiene la aplicación), en orden
+    -- binario: la búsqueda por prefijo es un rango [prefijo, siguiente)
+    nombre_norm VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin,
+    email_norm VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin,
+    telefono_norm VARCHAR(20) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+    INDEX ix_contactos_usuario_id (usuario_id, id),
+    INDEX ix_contactos_usuario_nombre (usuario_id, nombre),
+    INDEX ix_contactos_usuario_nombre_norm (usuario_id, nombre_norm),
+    INDEX ix_contactos_usuario_email_norm (usuario_id, email_norm),
+    INDEX ix_contactos_usuario_telefono_norm (usuario_id, telefono_norm)
+);
+
+-- Trabajos de purga de usuarios eliminados (ver purge.py)
+CREATE TABLE IF NOT EXISTS purge_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    usuario_id INT NOT NULL,
+    estado ENUM('pendiente', 'en_curso', 'completado', 'error') NOT NULL DEFAULT 'pendiente',
+    total INT NOT NULL DEFAULT 0,
+    borrados INT NOT NULL DEFAULT 0,
+    ultimo_id INT NOT NULL DEFAULT 0,
+    lease_hasta DATETIME NULL,
+    lease_owner VARCHAR(64) NULL,
+    intentos INT NOT NULL DEFAULT 0,
+    error TEXT,
+    creado TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    terminado TIMESTAMP NULL,
+    INDEX ix_purge_jobs_usuario_id (usuario_id),
+    INDEX ix_purge_jobs_terminado (terminado)
 );
 
--- Insertar usuario admin por defecto (password: admin123)
+-- Versión del esquema (ver migrate.py): este archivo crea la versión 4
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    descripcion VARCHAR(255) NOT NULL,
+    aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO schema_version (version, descripcion) VALUES
+    (1, 'Columnas normalizadas e índices para la búsqueda de contactos'),
+    (2, 'Índices compuestos por usuario en contactos'),
+    (3, 'Versión de la agenda por usuario (ETags)'),
+    (4, 'Borrado lógico de usuarios y trabajos de purga');
+
+-- Insertar usuario admin por defecto (password: admin123). El hash es de costo 12;
+-- con otro BCRYPT_ROUNDS se rehashea en su primer login
 INSERT IGNORE INTO usuarios (email, password, nombre, rol) 
 VALUES ('admin@system.com', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj89OFmOSUci', 'Administrador', 'admin');
 
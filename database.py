@@ -1,14 +1,204 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+import query_stats
+from replicas import ReplicaRouter
 
 # Configuración de la base de datos
-DATABASE_URL = "mysql+mysqlconnector://root@localhost/sistema_python"
+DATABASE_URL = os.getenv("DATABASE_URL", "mysql+mysqlconnector://root@localhost/sistema_python")
 
+# Modo async: USE_ASYNC_DB=1 activa AsyncSession en las rutas de main.py
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "mysql+aiomysql://root@localhost/sistema_python")
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "0").lower() in ("1", "true", "yes")
 
-engine = create_engine(DATABASE_URL)
+# Réplicas de lectura: URLs separadas por comas (vacío = todo va al primario).
+# Tras una escritura, las lecturas del mismo usuario van al primario durante
+# READ_YOUR_WRITES_SECONDS (debe superar el retraso de replicación).
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+ASYNC_DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("ASYNC_DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+REPLICA_BALANCE = os.getenv("REPLICA_BALANCE", "round_robin")  # o least_connections
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Pool de conexiones. DB_POOL_RECYCLE debe ser menor que el wait_timeout de MySQL
+# y DB_POOL_PRE_PING descarta conexiones que el servidor ya cerró.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+# Conexiones que se abren al arrancar (lifespan) para que las primeras peticiones no esperen
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", "2"))
+
+
+def _connect_args(url):
+    # SQLite (usado en pruebas/benchmarks) necesita compartir la conexión entre hilos
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+class PoolStats:
+    """Contadores de un pool: checkouts, conexiones nuevas, invalidaciones y espera por conexión."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, elapsed):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+
+    def snapshot(self, pool):
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            data.update(size=pool.size(), checked_out=pool.checkedout(),
+                        checked_in=pool.checkedin(), overflow=pool.overflow())
+        return data
+
+
+class _TimedPoolMixin:
+    # Mide cuánto espera cada checkout por una conexión libre
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if self.stats:
+                self.stats.count("timeouts")
+            raise
+        finally:
+            if self.stats:
+                self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_kwargs(url, pooled, poolclass):
+    if not pooled:
+        return {"poolclass": NullPool}
+    if make_url(url).database in (None, "", ":memory:"):
+        # SQLite en memoria usa su propio pool de una sola conexión
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def _attach_stats(engine):
+    # En el motor, no solo en el pool: dispose() crea un pool nuevo y solo los
+    # Timed*Pool se lo pasan (recreate); SQLite en memoria y aiosqlite lo perderían
+    stats = PoolStats()
+    engine.pool_stats = engine.pool.stats = stats
+    event.listen(engine, "checkout", lambda *args: stats.count("checkouts"))
+    event.listen(engine, "connect", lambda *args: stats.count("connects"))
+    event.listen(engine, "invalidate", lambda *args: stats.count("invalidations"))
+    return engine
+
+def make_engine(url=DATABASE_URL, pooled=True, **kwargs):
+    """
+    Fábrica única de motores (app y scripts). pooled=False usa NullPool, para
+    conexiones de un solo uso como crear la base de datos.
+    """
+    kwargs = {"connect_args": _connect_args(url), **_pool_kwargs(url, pooled, TimedQueuePool), **kwargs}
+    return query_stats.instrument(_attach_stats(create_engine(url, **kwargs)))
+
+def make_async_engine(url=ASYNC_DATABASE_URL, **kwargs):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    # aiosqlite (pruebas) mantiene un hilo por conexión abierta: se deja su pool por defecto
+    pool_kwargs = {} if url.startswith("sqlite") else _pool_kwargs(url, True, TimedAsyncQueuePool)
+    kwargs = {**pool_kwargs, **kwargs}
+    async_engine = create_async_engine(url, **kwargs)
+    _attach_stats(async_engine.sync_engine)
+    return query_stats.instrument(async_engine)
+
+def warm_pool(engine, connections=DB_POOL_WARM):
+    """Abre `connections` conexiones a la vez y las devuelve al pool."""
+    abiertas = []
+    try:
+        for _ in range(connections):
+            abiertas.append(engine.connect())
+    finally:
+        for conn in abiertas:
+            conn.close()
+
+async def warm_async_pool(async_engine, connections=DB_POOL_WARM):
+    abiertas = []
+    try:
+        for _ in range(connections):
+            abiertas.append(await async_engine.connect())
+    finally:
+        for conn in abiertas:
+            await conn.close()
+
+def server_url(url=DATABASE_URL):
+    """URL del servidor sin base de datos (para CREATE DATABASE)."""
+    return make_url(url).set(database=None).render_as_string(hide_password=False)
+
+def all_engines():
+    """Motores sync del proceso (primario y réplicas), incluidos los de los motores async."""
+    engines = [engine, *replicas.replicas]
+    if async_engine is not None:
+        engines += [e.sync_engine for e in (async_engine, *async_replicas.replicas)]
+    return engines
+
+def pool_status():
+    engines = {"primary": engine}
+    engines.update({f"replica_{i}": e for i, e in enumerate(replicas.replicas)})
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+        engines.update({f"async_replica_{i}": e.sync_engine for i, e in enumerate(async_replicas.replicas)})
+    return {
+        name: e.pool_stats.snapshot(e.pool)
+        for name, e in engines.items()
+    }
+
+
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+replicas = ReplicaRouter(engine, [make_engine(url) for url in DATABASE_REPLICA_URLS],
+                         REPLICA_BALANCE, READ_YOUR_WRITES_SECONDS)
+
 # Dependencia para obtener la sesión de la base de datos
 def get_db():
     db = SessionLocal()
@@ -16,3 +206,45 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def read_session(key=None):
+    """Sesión para lecturas: una réplica, o el primario si `key` escribió hace poco."""
+    return SessionLocal(bind=replicas.engine_for_read(key))
+
+def read_db(key=None):
+    db = read_session(key)
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Motor async: solo se crea si está activado, así el driver async es opcional
+async_engine = None
+AsyncSessionLocal = None
+async_replicas = None
+
+if USE_ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = make_async_engine(ASYNC_DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async_replicas = ReplicaRouter(async_engine, [make_async_engine(url) for url in ASYNC_DATABASE_REPLICA_URLS],
+                                   REPLICA_BALANCE, READ_YOUR_WRITES_SECONDS)
+
+# Dependencia async para obtener la sesión de la base de datos
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def async_read_session(key=None):
+    return AsyncSessionLocal(bind=async_replicas.engine_for_read(key))
+
+async def async_read_db(key=None):
+    async with async_read_session(key) as db:
+        yield db
+
+def mark_write(key):
+    """Llamar tras confirmar una escritura de `key` (p. ej. el id del usuario)."""
+    replicas.mark_write(key)
+    if async_replicas is not None:
+        async_replicas.mark_write(key)
@@ -0,0 +1,33 @@
+"""
+ETags de las rutas de contactos. Se construyen con usuarios.contactos_version,
+que se incrementa en la misma transacción que cada escritura de contactos,
+así que una petición condicional se responde con 304 leyendo solo esa columna.
+"""
+import hashlib
+from fastapi import Response
+
+CACHE_CONTROL = "private, no-cache"
+
+def contactos_etag(usuario_id, version, *parts):
+    digest = hashlib.blake2s(repr(parts).encode(), digest_size=6).hexdigest()
+    return f'W/"{usuario_id}-{version}-{digest}"'
+
+def etag_matches(request, etag, exists=True):
+    """
+    `If-None-Match: *` solo coincide si el recurso existe: una ruta que responde
+    antes de buscarlo pasa exists=False y vuelve a comprobar tras encontrarlo.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidatos = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return (exists and "*" in candidatos) or etag.removeprefix("W/") in candidatos
+
+def etag_headers(etag):
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def set_etag(response, etag):
+    response.headers.update(etag_headers(etag))
+
+def not_modified(etag):
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,70 @@
+"""
+Exportación de contactos en streaming (NDJSON o CSV).
+
+Las filas se leen como tuplas de columnas en lotes por keyset (id > último
+id del lote anterior, LIMIT EXPORT_BATCH_SIZE) y se escriben lote a lote, así
+que la memoria no crece con el tamaño de la agenda: no hay identity map, ni
+validación Pydantic por fila, ni un cuerpo JSON completo en memoria. No se
+usan cursores del lado del servidor: mysql-connector los ignora (buffered) y
+cargaría toda la agenda antes del primer byte.
+"""
+import csv
+import io
+import json
+import os
+import database
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_COLUMNS = ("id", "nombre", "email", "telefono", "usuario_id")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def export_headers(formato, nombre="contactos"):
+    return {"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'}
+
+def format_rows(rows, formato):
+    if formato == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows
+    )
+
+def _header(formato):
+    return format_rows([EXPORT_COLUMNS], "csv") if formato == "csv" else ""
+
+def _chunk(query, last_id):
+    # `query` va ordenada por su primera columna, el id (único)
+    return query.where(query.selected_columns[0] > last_id).limit(EXPORT_BATCH_SIZE)
+
+def stream_export(query, formato, key=None):
+    """
+    Generador sync; abre su propia sesión (de lectura: réplica o primario
+    según `key`) porque vive más que la petición.
+    """
+    db = database.read_session(key)
+    try:
+        yield _header(formato)
+        last_id = 0
+        while True:
+            rows = db.execute(_chunk(query, last_id)).all()
+            if rows:
+                yield format_rows(rows, formato)
+            if len(rows) < EXPORT_BATCH_SIZE:
+                break
+            last_id = rows[-1][0]
+    finally:
+        db.close()
+
+async def stream_export_async(query, formato, key=None):
+    """Versión async para USE_ASYNC_DB."""
+    async with database.async_read_session(key) as db:
+        yield _header(formato)
+        last_id = 0
+        while True:
+            rows = (await db.execute(_chunk(query, last_id))).all()
+            if rows:
+                yield format_rows(rows, formato)
+            if len(rows) < EXPORT_BATCH_SIZE:
+                break
+            last_id = rows[-1][0]
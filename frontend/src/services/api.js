@@ -50,11 +50,27 @@ export const usersAPI = {
   deleteUser: (id) => api.delete(`/usuarios/${id}`),
 };
 
+// Recorre todas las páginas de un listado paginado por cursor
+const getAllPages = async (url) => {
+  let items = [];
+  let cursor = null;
+  do {
+    const response = await api.get(url, { params: { cursor, limit: 500 } });
+    items = items.concat(response.data.items);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return { data: items };
+};
+
 export const contactsAPI = {
-  getContacts: () => api.get('/contactos'),
+  getContacts: () => getAllPages('/contactos'),
+  getContactsPage: (cursor, limit = 50) => api.get('/contactos', { params: { cursor, limit } }),
   createContact: (contactData) => api.post('/contactos', contactData),
   updateContact: (id, contactData) => api.put(`/contactos/${id}`, contactData),
   deleteContact: (id) => api.delete(`/contactos/${id}`),
+  // Altas, ediciones y bajas en una sola transacción:
+  // [{ op: 'create', data }, { op: 'update', id, data }, { op: 'delete', id }]
+  batchContacts: (operations) => api.post('/contactos/batch', operations),
 };
 
 export default api;
\ No newline at end of file
@@ -3,29 +3,22 @@
 Script para inicializar la base de datos del sistema de agenda.
 """
 import sys
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from passlib.context import CryptContext
+from sqlalchemy import text
+import migrate
 import models
-from database import DATABASE_URL, Base, engine
-
-# Configuración de password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+from auth import get_password_hash
+from database import SessionLocal, engine, make_engine, server_url
 
 def init_database():
     """Inicializa la base de datos y crea el usuario admin."""
     try:
         print("🔧 Inicializando base de datos...")
         
-        # Crear todas las tablas
-        Base.metadata.create_all(bind=engine)
+        # Crear todas las tablas y aplicar las migraciones
+        migrate.upgrade(engine)
         print("✅ Tablas creadas exitosamente")
         
         # Crear sesión
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
         db = SessionLocal()
         
         # Verificar si ya existe el usuario admin
@@ -113,13 +106,13 @@ def create_mysql_database():
         print("🗄️  Creando base de datos MySQL...")
         
         # Conectar a MySQL sin especificar base de datos
-        mysql_url = "mysql+mysqlconnector://root@localhost/"
-        temp_engine = create_engine(mysql_url)
+        temp_engine = make_engine(server_url(), pooled=False)
         
         with temp_engine.connect() as conn:
             # Crear base de datos si no existe
             conn.execute(text("CREATE DATABASE IF NOT EXISTS sistema_python"))
             conn.commit()
+        temp_engine.dispose()
         
         print("✅ Base de datos 'sistema_python' creada/verificada")
         return True
@@ -1,17 +1,73 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import os
+import sys
+
+# `python main.py` arranca serve.py (varios workers, reciclado y apagado ordenado)
+# antes de importar nada de la app: así fija WEB_CONCURRENCY y HASH_WORKERS a
+# tiempo, y la app se carga una sola vez (como main:app)
+if __name__ == "__main__":
+    import serve
+    sys.exit(serve.main())
+
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, OperationalError, TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import migrate
 import models
-# import schemas
-from database import get_db, engine
-from auth import verify_token, get_password_hash, verify_password, create_access_token
+import purge
+import queries
+from schemas import (UserLogin, UserCreate, UserResponse, ContactoCreate, ContactoResponse, ContactoPage,
+                     ContactoOperacion, ContactoBatchResponse)
+from admission import login_admission
+from bulk import BATCH_MAX_OPERATIONS, BULK_BATCH_SIZE, read_rows, validate_in_batches
+from cache import CACHE_BACKEND, WEB_CONCURRENCY, json_response, pack, response_cache, unpack
+from etag import contactos_etag, etag_headers, etag_matches, not_modified, set_etag
+from export import MEDIA_TYPES, export_headers, stream_export
+from metrics import MetricsMiddleware, metrics, metrics_response
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page
+from query_stats import SERVER_TIMING, SQL_TRACE, QueryStatsMiddleware
+from serialization import page_json, rows_json
+from database import (get_db, read_db, mark_write, replicas, async_replicas, engine, async_engine, pool_status,
+                      warm_async_pool, warm_pool, USE_ASYNC_DB)
+from auth import (verify_token, verify_and_update_async, get_password_hash_async, create_access_token,
+                  hash_pool, revoked_users, token_cache, HashPoolSaturated)
 from datetime import timedelta
 
-# Crear tablas en la base de datos
-models.Base.metadata.create_all(bind=engine)
+# Solo desarrollo: aplicar las migraciones al arrancar en lugar de con `python migrate.py`
+SCHEMA_AUTO_MIGRATE = os.getenv("SCHEMA_AUTO_MIGRATE", "0").lower() in ("1", "true", "yes")
 
-app = FastAPI(title="Sistema de Agenda", version="1.0.0")
+def preparar_base():
+    if SCHEMA_AUTO_MIGRATE:
+        migrate.upgrade()
+    migrate.check()
+    for e in (engine, *replicas.replicas):
+        warm_pool(e)
+
+# Importar el módulo no toca la base: la comprobación del esquema y el
+# calentamiento del pool ocurren una vez, al arrancar el servidor
+@asynccontextmanager
+async def lifespan(app):
+    try:
+        await run_in_threadpool(preparar_base)
+        if USE_ASYNC_DB:
+            for e in (async_engine, *async_replicas.replicas):
+                await warm_async_pool(e)
+    except OperationalError as exc:
+        # Base caída: arrancar igual, el pool reconecta en la primera petición
+        print(f"⚠️  No se pudo conectar a la base al arrancar: {exc.orig}")
+    # Reanuda las purgas que quedaron a medias y atiende las nuevas
+    if purge.PURGE_WORKER:
+        purge.purge_worker.start()
+    yield
+    purge.purge_worker.stop()
+
+app = FastAPI(title="Sistema de Agenda", version="1.0.0", lifespan=lifespan)
+revoked_users.loader = purge.revoked_user_ids
 
 # Configurar CORS para el frontend
 app.add_middleware(
@@ -20,58 +76,81 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"] if SERVER_TIMING else ["ETag"],
 )
 
-# Schemas (estructuras de datos)
-from pydantic import BaseModel
-from typing import Optional
-
-class UserLogin(BaseModel):
-    email: str
-    password: str
-
-class UserCreate(BaseModel):
-    email: str
-    password: str
-    nombre: str
-    rol: str = "user"
-
-class UserResponse(BaseModel):
-    id: int
-    email: str
-    nombre: str
-    rol: str
-
-    class Config:
-        from_attributes = True
-
-class ContactoCreate(BaseModel):
-    nombre: str
-    email: Optional[str] = None
-    telefono: Optional[str] = None
-
-class ContactoResponse(BaseModel):
-    id: int
-    nombre: str
-    email: Optional[str]
-    telefono: Optional[str]
-    usuario_id: int
-
-    class Config:
-        from_attributes = True
-        
-@app.post("/login")
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(models.Usuario).filter(models.Usuario.email == user_data.email).first()
-    print("Usuario encontrado:", user)  # 👈 agrega esto
-
-    if not user:
-        raise HTTPException(status_code=401, detail="Usuario no encontrado")
-
-    print("Verificando contraseña...")  # 👈 agrega esto
-    if not verify_password(user_data.password, user.password):
-        print("Contraseña incorrecta")  # 👈 agrega esto
-        raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+# Con Redis las marcas de "escribió hace poco" se comparten entre workers
+# (sin él, con varios workers y réplicas, la app no arranca)
+for replica_router in (replicas, async_replicas):
+    if replica_router is not None:
+        if CACHE_BACKEND == "redis":
+            replica_router.sticky_store = response_cache.backend
+        replica_router.check_workers(WEB_CONCURRENCY)
+
+# Conteo y latencia por ruta, expuestos en /metrics
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
+# Consultas y tiempo de base de datos por petición (lentas, N+1; Server-Timing con SERVER_TIMING=1)
+if SQL_TRACE:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Pool de bcrypt lleno: fallar rápido en lugar de encolar sin límite
+@app.exception_handler(HashPoolSaturated)
+def hash_pool_saturated_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, intenta de nuevo"},
+        headers={"Retry-After": "1"},
+    )
+
+# Sin conexiones libres tras DB_POOL_TIMEOUT: 503 en lugar de un 500 genérico
+@app.exception_handler(PoolTimeoutError)
+def pool_timeout_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Base de datos ocupada, intenta de nuevo"},
+        headers={"Retry-After": "1"},
+    )
+
+# Rutas con sesión de base de datos sync; con USE_ASYNC_DB se usan
+# las versiones async de async_routes.py
+router = APIRouter()
+
+# Lecturas: réplica, salvo que el usuario haya escrito hace poco (lee lo que escribió)
+def get_read_db(token: dict = Depends(verify_token)):
+    yield from read_db(token.get("id"))
+
+# /login y POST /usuarios son async para que bcrypt espere en su propio pool
+# (auth.hash_pool) sin retener un hilo del threadpool; la consulta sí va al threadpool.
+# admission.py decide antes si el intento se atiende (429/503 si no)
+@router.post("/login")
+async def login(user_data: UserLogin, request: Request, db: Session = Depends(get_db)):
+    async with login_admission.admit(request, user_data.email):
+        def buscar():
+            user = db.query(models.Usuario).filter(
+                models.Usuario.email == user_data.email, models.Usuario.eliminado_en.is_(None)
+            ).first()
+            # Devolver la conexión al pool antes del bcrypt (close no expira los atributos)
+            db.close()
+            return user
+        user = await run_in_threadpool(buscar)
+        print("Usuario encontrado:", user)  # 👈 agrega esto
+
+        if not user:
+            raise HTTPException(status_code=401, detail="Usuario no encontrado")
+
+        print("Verificando contraseña...")  # 👈 agrega esto
+        valida, nuevo_hash = await verify_and_update_async(user_data.password, user.password)
+        if not valida:
+            print("Contraseña incorrecta")  # 👈 agrega esto
+            raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+
+        # Hash con otro costo que BCRYPT_ROUNDS: se reemplaza ahora que tenemos la contraseña
+        if nuevo_hash:
+            def guardar_hash():
+                db.execute(queries.rehash_password(user.id, user.password, nuevo_hash))
+                db.commit()
+            await run_in_threadpool(guardar_hash)
 
     access_token = create_access_token(
         data={"sub": user.email, "id": user.id, "rol": user.rol},
@@ -92,39 +171,44 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
     }
 
 # Rutas de Usuarios (solo admin)
-@app.get("/usuarios", response_model=List[UserResponse])
-def get_usuarios(token: dict = Depends(verify_token), db: Session = Depends(get_db)):
+@router.get("/usuarios", response_model=List[UserResponse])
+def get_usuarios(token: dict = Depends(verify_token), db: Session = Depends(get_read_db)):
     if token.get("rol") != "admin":
         raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
     
-    usuarios = db.query(models.Usuario).all()
-    return usuarios
+    # Solo las columnas de UserResponse, serializadas sin validar fila por fila
+    rows = db.execute(queries.usuarios()).all()
+    return json_response(rows_json(rows))
 
-@app.post("/usuarios", response_model=UserResponse)
-def crear_usuario(usuario: UserCreate, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
+@router.post("/usuarios", response_model=UserResponse)
+async def crear_usuario(usuario: UserCreate, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
     if token.get("rol") != "admin":
         raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
     
-    # Verificar si el email ya existe
-    usuario_existente = db.query(models.Usuario).filter(models.Usuario.email == usuario.email).first()
-    if usuario_existente:
-        raise HTTPException(status_code=400, detail="El email ya está registrado")
-    
-    # Crear nuevo usuario
+    # Crear nuevo usuario; el índice único de email detecta el duplicado
+    # (sin SELECT previo que dos altas simultáneas podrían pasar a la vez)
     db_usuario = models.Usuario(
         email=usuario.email,
-        password=get_password_hash(usuario.password),
+        password=await get_password_hash_async(usuario.password),
         nombre=usuario.nombre,
         rol=usuario.rol
     )
     
-    db.add(db_usuario)
-    db.commit()
-    db.refresh(db_usuario)
+    def guardar():
+        db.add(db_usuario)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="El email ya está registrado")
+        db.refresh(db_usuario)
+    await run_in_threadpool(guardar)
+    mark_write(token.get("id"))
     
     return db_usuario
 
-@app.delete("/usuarios/{usuario_id}")
+# Borrado lógico inmediato; los contactos se borran por lotes en segundo plano (purge.py)
+@router.delete("/usuarios/{usuario_id}", status_code=status.HTTP_202_ACCEPTED)
 def eliminar_usuario(usuario_id: int, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
     if token.get("rol") != "admin":
         raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
@@ -132,22 +216,160 @@ def eliminar_usuario(usuario_id: int, token: dict = Depends(verify_token), db: S
     if usuario_id == token.get("id"):
         raise HTTPException(status_code=400, detail="No puedes eliminarte a ti mismo")
     
-    usuario = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
-    if not usuario:
+    marcar, encolar = purge.soft_delete_statements(usuario_id)
+    if db.execute(marcar).rowcount == 0:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    db.delete(usuario)
+    job_id = db.execute(encolar).inserted_primary_key[0]
     db.commit()
+    revoked_users.add(usuario_id)
+    purge.purge_worker.wake()
+    mark_write(token.get("id"))
     
-    return {"message": "Usuario eliminado correctamente"}
+    return {"message": "Usuario eliminado correctamente", "purga": job_id}
+
+# Progreso de la purga de un usuario eliminado (solo admin)
+@router.get("/usuarios/purgas/{job_id}")
+def estado_purga(job_id: int, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    job = db.get(models.PurgeJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Purga no encontrada")
+    return purge.job_status(job)
+
+# Volver a encolar una purga que agotó sus reintentos (solo admin)
+@router.post("/usuarios/purgas/{job_id}/reintentar", status_code=status.HTTP_202_ACCEPTED)
+def reintentar_purga(job_id: int, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    if db.execute(purge.retry_statement(job_id)).rowcount == 0:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="La purga no existe o no está en error")
+    db.commit()
+    purge.purge_worker.wake()
+    return {"message": "Purga encolada de nuevo", "purga": job_id}
+
+# Exportación en streaming de la agenda de un usuario (solo admin)
+@router.get("/usuarios/{usuario_id}/contactos/export")
+def exportar_contactos_usuario(
+    usuario_id: int,
+    formato: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_read_db)
+):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+
+    if not db.query(models.Usuario.id).filter(models.Usuario.id == usuario_id,
+                                              models.Usuario.eliminado_en.is_(None)).first():
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+
+    return StreamingResponse(
+        stream_export(queries.contactos_export(usuario_id), formato, token.get("id")),
+        media_type=MEDIA_TYPES[formato],
+        headers=export_headers(formato, f"contactos_usuario_{usuario_id}"),
+    )
 
 # Rutas de Contactos (Agenda)
-@app.get("/contactos", response_model=List[ContactoResponse])
-def get_contactos(token: dict = Depends(verify_token), db: Session = Depends(get_db)):
-    contactos = db.query(models.Contacto).filter(models.Contacto.usuario_id == token.get("id")).all()
-    return contactos
+@router.get("/contactos", response_model=ContactoPage)
+def get_contactos(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_read_db)
+):
+    # Si la agenda no cambió, 304 sin ejecutar la consulta del listado
+    usuario_id = token.get("id")
+    version = db.execute(queries.contactos_version(usuario_id)).scalar() or 0
+    etag = contactos_etag(usuario_id, version, cursor, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Página ya serializada en caché: solo vale si es de la versión actual (una
+    # invalidación hecha por otro worker puede no verse en esta caché)
+    cached, slot = response_cache.lookup(f"contactos:{usuario_id}", f"{cursor}:{limit}",
+                                         valid=lambda value: unpack(value)[0] == etag)
+    if cached is not None:
+        return json_response(unpack(cached)[1], etag_headers(etag))
+
+    try:
+        query = queries.contactos_page(usuario_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = db.execute(query).all()
+    page = build_page(rows, limit, queries.contacto_cursor_key)
+    body = page_json(page)
+    response_cache.store(slot, pack(etag, body))
+    return json_response(body, etag_headers(etag))
+
+# Búsqueda por nombre, email o teléfono (índices sobre columnas normalizadas)
+@router.get("/contactos/search", response_model=ContactoPage)
+def buscar_contactos(
+    q: str = Query(..., min_length=1, max_length=100),
+    match: str = Query("prefix", pattern="^(prefix|substring)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_read_db)
+):
+    try:
+        consultas = queries.contactos_search(token.get("id"), q, match, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Se piden grupos de relevancia en orden hasta llenar la página (+1 fila)
+    rows = []
+    for rank, columna, query in consultas:
+        if len(rows) > limit:
+            break
+        result = db.execute(query.limit(limit + 1 - len(rows)))
+        rows.extend((rank, columna, contacto) for contacto in result.scalars())
+
+    page = build_page(rows, limit, queries.search_cursor_key)
+    page["items"] = [contacto for _, _, contacto in page["items"]]
+    return page
 
-@app.post("/contactos", response_model=ContactoResponse)
+# Exportación en streaming de la agenda propia
+@router.get("/contactos/export")
+def exportar_contactos(
+    formato: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    token: dict = Depends(verify_token)
+):
+    return StreamingResponse(
+        stream_export(queries.contactos_export(token.get("id")), formato, token.get("id")),
+        media_type=MEDIA_TYPES[formato],
+        headers=export_headers(formato),
+    )
+
+@router.get("/contactos/{contacto_id}", response_model=ContactoResponse)
+def get_contacto(
+    contacto_id: int,
+    request: Request,
+    response: Response,
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_read_db)
+):
+    usuario_id = token.get("id")
+    version = db.execute(queries.contactos_version(usuario_id)).scalar() or 0
+    etag = contactos_etag(usuario_id, version, contacto_id)
+    # Con "*" hay que saber antes si el contacto existe (y es de este usuario)
+    if etag_matches(request, etag, exists=False):
+        return not_modified(etag)
+
+    contacto = db.execute(queries.contacto(usuario_id, contacto_id)).scalars().first()
+    if not contacto:
+        raise HTTPException(status_code=404, detail="Contacto no encontrado")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
+    return contacto
+
+@router.post("/contactos", response_model=ContactoResponse)
 def crear_contacto(contacto: ContactoCreate, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
     db_contacto = models.Contacto(
         nombre=contacto.nombre,
@@ -157,42 +379,107 @@ def crear_contacto(contacto: ContactoCreate, token: dict = Depends(verify_token)
     )
     
     db.add(db_contacto)
+    db.execute(queries.bump_contactos_version(token.get("id")))
     db.commit()
+    response_cache.invalidate(f"contactos:{token.get('id')}")
+    mark_write(token.get("id"))
     db.refresh(db_contacto)
     
     return db_contacto
 
-@app.put("/contactos/{contacto_id}", response_model=ContactoResponse)
+# Importación masiva: JSON o CSV, validado e insertado por lotes multi-fila
+@router.post("/contactos/bulk")
+async def crear_contactos_bulk(
+    request: Request,
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=10000),
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_db)
+):
+    try:
+        rows = await read_rows(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    usuario_id = token.get("id")
+    errors = []
+    def insertar():
+        inserted = 0
+        for batch in validate_in_batches(rows, ContactoCreate, batch_size, errors):
+            db.execute(insert(models.Contacto), [queries.contacto_values(c, usuario_id) for _, c in batch])
+            inserted += len(batch)
+        if inserted:
+            db.execute(queries.bump_contactos_version(usuario_id))
+        db.commit()
+        response_cache.invalidate(f"contactos:{usuario_id}")
+        mark_write(usuario_id)
+        return inserted
+    inserted = await run_in_threadpool(insertar)
+
+    return {"inserted": inserted, "errors": errors}
+
+# Lote de altas, ediciones y bajas en una sola transacción: todo o nada
+@router.post("/contactos/batch", response_model=ContactoBatchResponse)
+def procesar_lote_contactos(
+    operaciones: List[ContactoOperacion],
+    token: dict = Depends(verify_token),
+    db: Session = Depends(get_db)
+):
+    if len(operaciones) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Máximo {BATCH_MAX_OPERATIONS} operaciones por lote")
+
+    usuario_id = token.get("id")
+    results = []
+    for index, operacion in enumerate(operaciones):
+        query, values = queries.batch_statement(usuario_id, operacion)
+        results.append(queries.batch_result(index, operacion, db.execute(query), values))
+
+    # Si alguna falla no se aplica ninguna; se devuelven todos los resultados
+    if any(r["status"] >= 400 for r in results):
+        db.rollback()
+        return JSONResponse(status_code=409, content=ContactoBatchResponse(committed=False, results=results).model_dump())
+
+    if operaciones:
+        db.execute(queries.bump_contactos_version(usuario_id))
+        db.commit()
+        response_cache.invalidate(f"contactos:{usuario_id}")
+        mark_write(usuario_id)
+    return {"committed": True, "results": results}
+
+@router.put("/contactos/{contacto_id}", response_model=ContactoResponse)
 def actualizar_contacto(contacto_id: int, contacto: ContactoCreate, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
-    db_contacto = db.query(models.Contacto).filter(
-        models.Contacto.id == contacto_id, 
-        models.Contacto.usuario_id == token.get("id")
-    ).first()
-    
-    if not db_contacto:
+    # Un solo UPDATE ... WHERE id AND usuario_id (sin SELECT previo ni refresh)
+    usuario_id = token.get("id")
+    values = queries.contacto_values(contacto, usuario_id)
+    if queries.supports_returning(db):
+        row = db.execute(queries.update_contacto(usuario_id, contacto_id, values, returning=True)).first()
+        actualizado = row._asdict() if row else None
+    else:
+        # Sin RETURNING la respuesta se arma con los valores escritos
+        result = db.execute(queries.update_contacto(usuario_id, contacto_id, values))
+        actualizado = {"id": contacto_id, **values} if result.rowcount else None
+
+    if not actualizado:
         raise HTTPException(status_code=404, detail="Contacto no encontrado")
     
-    db_contacto.nombre = contacto.nombre
-    db_contacto.email = contacto.email
-    db_contacto.telefono = contacto.telefono
-    
+    db.execute(queries.bump_contactos_version(usuario_id))
     db.commit()
-    db.refresh(db_contacto)
+    response_cache.invalidate(f"contactos:{usuario_id}")
+    mark_write(usuario_id)
     
-    return db_contacto
+    return actualizado
 
-@app.delete("/contactos/{contacto_id}")
+@router.delete("/contactos/{contacto_id}")
 def eliminar_contacto(contacto_id: int, token: dict = Depends(verify_token), db: Session = Depends(get_db)):
-    contacto = db.query(models.Contacto).filter(
-        models.Contacto.id == contacto_id, 
-        models.Contacto.usuario_id == token.get("id")
-    ).first()
+    usuario_id = token.get("id")
+    result = db.execute(queries.delete_contacto(usuario_id, contacto_id))
     
-    if not contacto:
+    if not result.rowcount:
         raise HTTPException(status_code=404, detail="Contacto no encontrado")
     
-    db.delete(contacto)
+    db.execute(queries.bump_contactos_version(usuario_id))
     db.commit()
+    response_cache.invalidate(f"contactos:{usuario_id}")
+    mark_write(usuario_id)
     
     return {"message": "Contacto eliminado correctamente"}
 
@@ -201,6 +488,55 @@ def eliminar_contacto(contacto_id: int, token: dict = Depends(verify_token), db:
 def verify_token_route(token: dict = Depends(verify_token)):
     return {"valid": True, "user": token}
 
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+# Métricas en formato Prometheus (para el scraper, sin token). Es async: el
+# registro solo se lee y modifica en el event loop, sin lock
+@app.get("/metrics", include_in_schema=False)
+async def metrics_route():
+    return metrics_response()
+
+# Estadísticas del pool de hashing (solo admin)
+@app.get("/stats/hashing")
+def hashing_stats(token: dict = Depends(verify_token)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+    return hash_pool.stats()
+
+# Estadísticas de la caché de tokens verificados (solo admin)
+@app.get("/stats/tokens")
+def token_cache_stats(token: dict = Depends(verify_token)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+    return token_cache.stats()
+
+# Control de admisión de /login (solo admin)
+@app.get("/stats/login")
+def login_admission_stats(token: dict = Depends(verify_token)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+    return login_admission.stats()
+
+# Estadísticas de la caché de respuestas (solo admin)
+@app.get("/stats/cache")
+def response_cache_stats(token: dict = Depends(verify_token)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+    return response_cache.stats()
+
+# Estado del pool de conexiones (solo admin)
+@app.get("/stats/pool")
+def connection_pool_stats(token: dict = Depends(verify_token)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+    return pool_status()
+
+@app.get("/stats/replicas")
+def replica_stats(token: dict = Depends(verify_token)):
+    if token.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
+    return (async_replicas if USE_ASYNC_DB else replicas).stats()
+
+if USE_ASYNC_DB:
+    from async_routes import router as async_router
+    app.include_router(async_router)
+else:
+    app.include_router(router)
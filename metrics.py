@@ -0,0 +1,111 @@
+"""
+Métricas HTTP en formato de texto de Prometheus.
+
+MetricsMiddleware es un middleware ASGI puro (sin BaseHTTPMiddleware) que
+cuenta peticiones por ruta, método y código, las peticiones en curso y un
+histograma de latencia por ruta. La ruta es la plantilla de FastAPI
+(/contactos/{contacto_id}), no la URL, para que el número de series sea fijo.
+
+Los contadores se actualizan solo desde el event loop, así que no llevan lock:
+render() también debe llamarse desde el event loop (una ruta async def), nunca
+desde el threadpool.
+"""
+import time
+from bisect import bisect_left
+from fastapi.responses import PlainTextResponse
+
+# Límites superiores (segundos) de las cubetas del histograma
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Starlette agrega "; charset=utf-8"
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+class RouteMetrics:
+    __slots__ = ("statuses", "buckets", "total", "count")
+
+    def __init__(self):
+        self.statuses = {}
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # la última es +Inf
+        self.total = 0.0
+        self.count = 0
+
+class MetricsRegistry:
+    def __init__(self, prefix="http"):
+        self.prefix = prefix
+        self.routes = {}  # (método, ruta) -> RouteMetrics
+        self.in_flight = 0
+
+    def observe(self, method, route, status_code, elapsed):
+        key = (method, route)
+        metrics = self.routes.get(key)
+        if metrics is None:
+            metrics = self.routes[key] = RouteMetrics()
+        metrics.statuses[status_code] = metrics.statuses.get(status_code, 0) + 1
+        metrics.buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        metrics.total += elapsed
+        metrics.count += 1
+
+    def render(self):
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_requests_in_flight Peticiones en curso.",
+            f"# TYPE {p}_requests_in_flight gauge",
+            f"{p}_requests_in_flight {self.in_flight}",
+            f"# HELP {p}_requests_total Peticiones atendidas por ruta, método y código.",
+            f"# TYPE {p}_requests_total counter",
+        ]
+        routes = sorted(self.routes.items())
+        for (method, route), metrics in routes:
+            for status_code, count in sorted(metrics.statuses.items()):
+                lines.append(f'{p}_requests_total{{method="{method}",route="{route}",status="{status_code}"}} {count}')
+
+        lines += [
+            f"# HELP {p}_request_duration_seconds Latencia de las peticiones por ruta.",
+            f"# TYPE {p}_request_duration_seconds histogram",
+        ]
+        for (method, route), metrics in routes:
+            labels = f'method="{method}",route="{route}"'
+            acumulado = 0
+            for limite, count in zip(LATENCY_BUCKETS + ("+Inf",), metrics.buckets):
+                acumulado += count
+                lines.append(f'{p}_request_duration_seconds_bucket{{{labels},le="{limite}"}} {acumulado}')
+            lines.append(f"{p}_request_duration_seconds_sum{{{labels}}} {metrics.total:.6f}")
+            lines.append(f"{p}_request_duration_seconds_count{{{labels}}} {metrics.count}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        self.routes.clear()
+
+class MetricsMiddleware:
+    def __init__(self, app, registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        registry = self.registry
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            registry.in_flight -= 1
+            # El router de FastAPI deja la ruta resuelta en el scope
+            route = scope.get("route")
+            registry.observe(scope["method"], route.path if route is not None else "unmatched", status_code, elapsed)
+
+metrics = MetricsRegistry()
+
+def metrics_response(registry=metrics):
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Migraciones versionadas del esquema.
+
+La versión aplicada se guarda en la tabla schema_version. Cada migración es
+idempotente (comprueba columnas e índices antes de crearlos), así que también
+sirve sobre una base creada con create_all o con create_tables.sql.
+
+    python migrate.py            # aplica las migraciones pendientes
+    python migrate.py --status   # muestra la versión actual
+
+Las apps no crean tablas al importarse: al arrancar solo llaman a check(),
+que falla si la base no está en la última versión.
+"""
+import sys
+from sqlalchemy import Column, Integer, MetaData, String, Table, TIMESTAMP, inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.sql import func
+import models
+from database import Base, engine
+from search import normalized_values
+
+MIGRATIONS = []
+
+schema_version = Table(
+    "schema_version", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("descripcion", String(255), nullable=False),
+    Column("aplicada", TIMESTAMP, server_default=func.now()),
+)
+
+def migration(version, descripcion):
+    def register(fn):
+        MIGRATIONS.append((version, descripcion, fn))
+        return fn
+    return register
+
+def _columns(conn, table):
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+def _create_indexes(conn, table, *names):
+    existentes = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in names and index.name not in existentes:
+            index.create(conn)
+
+@migration(1, "Columnas normalizadas e índices para la búsqueda de contactos")
+def _busqueda_contactos(conn, batch_size=1000):
+    columnas = _columns(conn, "contactos")
+    # Orden binario en MySQL (ver models._norm_string); SQLite ya compara en BINARY
+    collation = " CHARACTER SET utf8mb4 COLLATE utf8mb4_bin" if conn.dialect.name == "mysql" else ""
+    for nombre, tipo in (("nombre_norm", "VARCHAR(255)"), ("email_norm", "VARCHAR(255)"),
+                         ("telefono_norm", "VARCHAR(20)")):
+        if nombre not in columnas:
+            conn.execute(text(f"ALTER TABLE contactos ADD COLUMN {nombre} {tipo}{collation}"))
+
+    # Rellenar por lotes las filas existentes
+    contactos = models.Contacto.__table__
+    ultimo_id = 0
+    while True:
+        filas = conn.execute(
+            select(contactos.c.id, contactos.c.nombre, contactos.c.email, contactos.c.telefono)
+            .where(contactos.c.id > ultimo_id, contactos.c.nombre_norm.is_(None))
+            .order_by(contactos.c.id).limit(batch_size)
+        ).all()
+        if not filas:
+            break
+        conn.execute(
+            text("UPDATE contactos SET nombre_norm = :nombre_norm, email_norm = :email_norm, "
+                 "telefono_norm = :telefono_norm WHERE id = :id"),
+            [{"id": fila.id, **normalized_values(fila.nombre, fila.email, fila.telefono)} for fila in filas],
+        )
+        ultimo_id = filas[-1].id
+
+    _create_indexes(conn, contactos, "ix_contactos_usuario_nombre_norm",
+                    "ix_contactos_usuario_email_norm", "ix_contactos_usuario_telefono_norm")
+
+@migration(2, "Índices compuestos por usuario en contactos")
+def _indices_por_usuario(conn):
+    _create_indexes(conn, models.Contacto.__table__, "ix_contactos_usuario_id", "ix_contactos_usuario_nombre")
+    # Índices redundantes sobre la llave primaria que creaba create_all
+    for tabla, indice in (("usuarios", "ix_usuarios_id"), ("contactos", "ix_contactos_id")):
+        if indice in {i["name"] for i in inspect(conn).get_indexes(tabla)}:
+            sufijo = f" ON {tabla}" if conn.dialect.name == "mysql" else ""
+            conn.execute(text(f"DROP INDEX {indice}{sufijo}"))
+
+@migration(3, "Versión de la agenda por usuario (ETags)")
+def _version_contactos(conn):
+    if "contactos_version" not in _columns(conn, "usuarios"):
+        conn.execute(text("ALTER TABLE usuarios ADD COLUMN contactos_version INTEGER NOT NULL DEFAULT 0"))
+
+@migration(4, "Borrado lógico de usuarios y trabajos de purga")
+def _borrado_logico(conn):
+    # La tabla purge_jobs la crea create_all en upgrade()
+    if "eliminado_en" not in _columns(conn, "usuarios"):
+        conn.execute(text("ALTER TABLE usuarios ADD COLUMN eliminado_en TIMESTAMP NULL"))
+
+class SchemaOutdated(RuntimeError):
+    pass
+
+def latest_version():
+    return max(v for v, _, _ in MIGRATIONS)
+
+def current_version(conn):
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+def upgrade(bind=engine):
+    """Crea las tablas que falten y aplica las migraciones pendientes, cada una en su transacción."""
+    Base.metadata.create_all(bind=bind)
+    schema_version.create(bind, checkfirst=True)
+    aplicadas = []
+    for version, descripcion, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        with bind.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            fn(conn)
+            conn.execute(schema_version.insert().values(version=version, descripcion=descripcion))
+        aplicadas.append(version)
+    return aplicadas
+
+def check(bind=engine):
+    """
+    Comprobación de arranque: una sola consulta, sin reflejar el esquema.
+    Un error al conectar se propaga tal cual; una tabla schema_version
+    inexistente cuenta como versión 0.
+    """
+    with bind.connect() as conn:
+        try:
+            actual = conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        except (OperationalError, ProgrammingError):
+            actual = 0
+    if actual < latest_version():
+        raise SchemaOutdated(
+            f"El esquema está en la versión {actual} y la app espera la {latest_version()}: "
+            "ejecuta python migrate.py")
+    return actual
+
+def main():
+    if "--status" in sys.argv:
+        with engine.connect() as conn:
+            actual = current_version(conn)
+        print(f"📋 Versión del esquema: {actual} (última: {latest_version()})")
+        return
+    aplicadas = upgrade()
+    if aplicadas:
+        print(f"✅ Migraciones aplicadas: {', '.join(map(str, aplicadas))}")
+    else:
+        print("✅ El esquema ya está al día")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,84 @@
 
-from sqlalchemy import Column, Integer, String, Enum, TIMESTAMP, ForeignKey, Text
+from sqlalchemy import Column, DateTime, Integer, String, Enum, TIMESTAMP, ForeignKey, Text, Index, event
+from sqlalchemy.dialects import mysql
 from sqlalchemy.sql import func
 from database import Base
+from search import normalized_values
 
 class Usuario(Base):
     __tablename__ = "usuarios"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     password = Column(String(255), nullable=False)
     nombre = Column(String(255), nullable=False)
-    rol = Column(Enum('admin', 'user'), default='user')
+    rol = Column(Enum('admin', 'user'), default='user', server_default='user')
     fecha_creacion = Column(TIMESTAMP, server_default=func.now())
+    # Se incrementa con cada cambio en sus contactos (ETags, ver etag.py)
+    contactos_version = Column(Integer, nullable=False, default=0, server_default='0')
+    # Borrado lógico: el usuario deja de existir para la API y purge.py borra sus datos
+    # (su email se libera al marcarlo, ver purge.soft_delete_statements)
+    eliminado_en = Column(TIMESTAMP, nullable=True)
+
+def _norm_string(length):
+    # Orden binario en MySQL: la búsqueda por prefijo es el rango [prefijo, siguiente)
+    # y con utf8mb4_0900_ai_ci la puntuación (":" tras "9", "{" tras "z") ordena antes
+    return String(length).with_variant(mysql.VARCHAR(length, charset="utf8mb4", collation="utf8mb4_bin"), "mysql")
 
 class Contacto(Base):
     __tablename__ = "contactos"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     nombre = Column(String(255), nullable=False)
     email = Column(String(255))
     telefono = Column(String(20))
-    usuario_id = Column(Integer, ForeignKey('usuarios.id'))
+    usuario_id = Column(Integer, ForeignKey('usuarios.id', ondelete='CASCADE'))
     fecha_creacion = Column(TIMESTAMP, server_default=func.now())
+
+    # Copias normalizadas para la búsqueda (ver search.py)
+    nombre_norm = Column(_norm_string(255))
+    email_norm = Column(_norm_string(255))
+    telefono_norm = Column(_norm_string(20))
+
+    # Todas las consultas de contactos filtran por dueño: índices compuestos
+    # (usuario_id, ...) para listados por id/nombre y para la búsqueda.
+    # Mantener en sincronía con create_tables.sql y migrate.py.
+    __table_args__ = (
+        Index("ix_contactos_usuario_id", "usuario_id", "id"),
+        Index("ix_contactos_usuario_nombre", "usuario_id", "nombre"),
+        Index("ix_contactos_usuario_nombre_norm", "usuario_id", "nombre_norm"),
+        Index("ix_contactos_usuario_email_norm", "usuario_id", "email_norm"),
+        Index("ix_contactos_usuario_telefono_norm", "usuario_id", "telefono_norm"),
+    )
+
+class PurgeJob(Base):
+    """Borrado por lotes de los contactos de un usuario eliminado (ver purge.py)."""
+    __tablename__ = "purge_jobs"
+
+    id = Column(Integer, primary_key=True)
+    # Sin llave foránea: la fila del usuario se borra al terminar el trabajo
+    usuario_id = Column(Integer, nullable=False, index=True)
+    estado = Column(Enum('pendiente', 'en_curso', 'completado', 'error'), nullable=False,
+                    default='pendiente', server_default='pendiente')
+    total = Column(Integer, nullable=False, default=0, server_default='0')
+    borrados = Column(Integer, nullable=False, default=0, server_default='0')
+    # Mayor id de contacto ya borrado: el trabajo se reanuda desde aquí
+    ultimo_id = Column(Integer, nullable=False, default=0, server_default='0')
+    # Un worker reclama el trabajo hasta este momento (UTC) y lo renueva en cada lote
+    # (tras un fallo, también "no reintentar antes de")
+    lease_hasta = Column(DateTime, nullable=True)
+    lease_owner = Column(String(64), nullable=True)
+    # Fallos seguidos sin avanzar; al llegar a PURGE_MAX_ATTEMPTS pasa a 'error'
+    intentos = Column(Integer, nullable=False, default=0, server_default='0')
+    error = Column(Text)
+    creado = Column(TIMESTAMP, server_default=func.now())
+    # Indexado: revoked_user_ids filtra por él en cada refresco
+    terminado = Column(TIMESTAMP, nullable=True, index=True)
+
+# Mantener las columnas normalizadas en cada escritura vía ORM
+# (los INSERT masivos las calculan en queries.contacto_values)
+@event.listens_for(Contacto, "before_insert")
+@event.listens_for(Contacto, "before_update")
+def _normalizar_contacto(mapper, connection, contacto):
+    for campo, valor in normalized_values(contacto.nombre, contacto.email, contacto.telefono).items():
+        setattr(contacto, campo, valor)
@@ -0,0 +1,32 @@
+"""
+Paginación por cursor (keyset): el cursor codifica la clave de orden de la
+última fila devuelta, así que una página profunda cuesta lo mismo que la
+primera (no hay OFFSET que recorrer).
+"""
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(*values):
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor, *types):
+    """Devuelve los valores del cursor validando sus tipos; ValueError si no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if (not isinstance(values, list) or len(values) != len(types)
+            or not all(type(v) is t for v, t in zip(values, types))):
+        raise ValueError("Cursor inválido")
+    return values
+
+def build_page(rows, limit, key):
+    """`rows` trae limit + 1 filas; la fila extra indica que hay otra página."""
+    items = rows[:limit]
+    next_cursor = encode_cursor(*key(items[-1])) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
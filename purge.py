@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Purga en segundo plano de usuarios eliminados.
+
+DELETE /usuarios/{id} solo marca al usuario (usuarios.eliminado_en) y encola
+un trabajo en purge_jobs, en la misma transacción. El email se reemplaza por
+uno que no puede existir (eliminado-{id}@invalid): el índice único lo dejaría
+reservado hasta el final de la purga y crear otra cuenta con él daría 400. Un worker borra después
+sus contactos en lotes de PURGE_CHUNK_SIZE filas, cada lote en su propia
+transacción (locks y undo log acotados), y al final borra la fila del
+usuario. El progreso (borrados, ultimo_id) se guarda con cada lote, así que
+si el proceso muere el trabajo se reanuda donde quedó.
+
+Cada trabajo se reclama con un lease (lease_hasta) que se renueva por lote:
+con varios workers de serve.py no se procesa el mismo trabajo dos veces, y
+uno abandonado se retoma cuando su lease vence.
+
+Un error en un lote (deadlock, lock wait timeout, conexión caída) no cierra
+el trabajo: vuelve a 'pendiente' con lease_hasta = ahora + espera
+exponencial (PURGE_RETRY_SECONDS, 2×, 4×...) y se reintenta desde ultimo_id.
+Solo tras PURGE_MAX_ATTEMPTS fallos seguidos sin avanzar queda en 'error';
+POST /usuarios/purgas/{id}/reintentar lo vuelve a encolar.
+
+La app ejecuta el worker en un hilo (PURGE_WORKER=1, por defecto). También
+se puede ejecutar aparte:
+
+    python purge.py           # procesa trabajos hasta Ctrl+C
+    python purge.py --once    # procesa los pendientes y termina
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, or_, select, update
+import models
+from auth import ACCESS_TOKEN_EXPIRE_MINUTES
+from database import engine
+
+PURGE_WORKER = os.getenv("PURGE_WORKER", "1").lower() in ("1", "true", "yes")
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "1000"))
+# Pausa entre lotes para ceder la base al tráfico normal
+PURGE_PAUSE_MS = float(os.getenv("PURGE_PAUSE_MS", "10"))
+PURGE_POLL_SECONDS = float(os.getenv("PURGE_POLL_SECONDS", "30"))
+PURGE_LEASE_SECONDS = int(os.getenv("PURGE_LEASE_SECONDS", "60"))
+PURGE_MAX_ATTEMPTS = int(os.getenv("PURGE_MAX_ATTEMPTS", "5"))
+PURGE_RETRY_SECONDS = float(os.getenv("PURGE_RETRY_SECONDS", "30"))
+PURGE_RETRY_MAX_SECONDS = float(os.getenv("PURGE_RETRY_MAX_SECONDS", "3600"))
+
+jobs = models.PurgeJob.__table__
+contactos = models.Contacto.__table__
+usuarios = models.Usuario.__table__
+
+def job_status(job):
+    """Representación para la API de una fila de purge_jobs."""
+    return {
+        "id": job.id,
+        "usuario_id": job.usuario_id,
+        "estado": job.estado,
+        "total": job.total,
+        "borrados": job.borrados,
+        "progreso": round(job.borrados / job.total, 4) if job.total else (1.0 if job.estado == "completado" else 0.0),
+        "intentos": job.intentos,
+        "error": job.error,
+        "creado": job.creado,
+        "terminado": job.terminado,
+    }
+
+def soft_delete_statements(usuario_id):
+    """
+    (marcar, encolar): UPDATE que oculta al usuario y libera su email (rowcount
+    0 si no existe o ya estaba eliminado) e INSERT del trabajo. El total se
+    calcula en el INSERT.
+    """
+    marcar = (
+        update(usuarios)
+        .where(usuarios.c.id == usuario_id, usuarios.c.eliminado_en.is_(None))
+        .values(eliminado_en=func.now(), email=f"eliminado-{usuario_id}@invalid")
+    )
+    total = select(func.count()).select_from(contactos).where(contactos.c.usuario_id == usuario_id).scalar_subquery()
+    encolar = jobs.insert().values(usuario_id=usuario_id, estado="pendiente", total=total)
+    return marcar, encolar
+
+def revoked_user_ids(bind=engine):
+    """
+    Usuarios cuyos tokens se rechazan: los que tienen una purga pendiente y
+    los purgados hace menos de lo que dura un token (después ya expiraron).
+    """
+    desde = datetime.utcnow() - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    with bind.connect() as conn:
+        return frozenset(conn.execute(
+            select(jobs.c.usuario_id).distinct()
+            .where(or_(jobs.c.terminado.is_(None), jobs.c.terminado > desde))
+        ).scalars())
+
+def retry_statement(job_id):
+    """UPDATE que vuelve a encolar un trabajo en 'error' (rowcount 0 si no lo está)."""
+    return (
+        update(jobs)
+        .where(jobs.c.id == job_id, jobs.c.estado == "error")
+        .values(estado="pendiente", intentos=0, lease_hasta=None, lease_owner=None)
+    )
+
+def retry_delay(intentos):
+    """Espera antes del reintento número `intentos` (exponencial, con tope)."""
+    return min(PURGE_RETRY_SECONDS * 2 ** (intentos - 1), PURGE_RETRY_MAX_SECONDS)
+
+def _claim(conn, job_id, owner):
+    """Reclama o renueva el lease; False si otro worker lo tiene vigente."""
+    ahora = datetime.utcnow()
+    result = conn.execute(
+        update(jobs)
+        .where(jobs.c.id == job_id, jobs.c.estado.in_(("pendiente", "en_curso")),
+               or_(jobs.c.lease_hasta.is_(None), jobs.c.lease_hasta < ahora, jobs.c.lease_owner == owner))
+        .values(estado="en_curso", lease_hasta=ahora + timedelta(seconds=PURGE_LEASE_SECONDS), lease_owner=owner)
+    )
+    return result.rowcount == 1
+
+def purge_chunk(conn, job, chunk_size=PURGE_CHUNK_SIZE):
+    """Borra un lote de contactos del trabajo; devuelve cuántos borró."""
+    ids = conn.execute(
+        select(contactos.c.id)
+        .where(contactos.c.usuario_id == job.usuario_id, contactos.c.id > job.ultimo_id)
+        .order_by(contactos.c.id)
+        .limit(chunk_size)
+    ).scalars().all()
+    if ids:
+        conn.execute(delete(contactos).where(contactos.c.id.in_(ids)))
+        conn.execute(
+            update(jobs).where(jobs.c.id == job.id)
+            .values(borrados=jobs.c.borrados + len(ids), ultimo_id=ids[-1], intentos=0)
+        )
+    return len(ids)
+
+def run_job(job_id, bind=engine, chunk_size=PURGE_CHUNK_SIZE, pause=PURGE_PAUSE_MS / 1000, stop=None):
+    """
+    Procesa un trabajo hasta terminarlo. Devuelve False si otro worker lo
+    tiene reclamado o si `stop` se activó a mitad (queda para reanudarse).
+    """
+    owner = uuid.uuid4().hex
+    try:
+        while True:
+            with bind.begin() as conn:
+                if not _claim(conn, job_id, owner):
+                    return False
+                job = conn.execute(select(jobs).where(jobs.c.id == job_id)).first()
+                borrados = purge_chunk(conn, job, chunk_size)
+                if not borrados:
+                    # Sin contactos: se borra el usuario y se cierra el trabajo
+                    conn.execute(delete(usuarios).where(usuarios.c.id == job.usuario_id))
+                    conn.execute(
+                        update(jobs).where(jobs.c.id == job_id)
+                        .values(estado="completado", lease_hasta=None, lease_owner=None, terminado=datetime.utcnow())
+                    )
+                    return True
+            if stop is not None and stop.is_set():
+                return False
+            if pause:
+                time.sleep(pause)
+    except Exception as exc:
+        _fail(bind, job_id, owner, exc)
+        raise
+
+def _fail(bind, job_id, owner, exc):
+    """Programa el reintento con espera exponencial, o marca 'error' tras PURGE_MAX_ATTEMPTS."""
+    with bind.begin() as conn:
+        job = conn.execute(
+            select(jobs.c.intentos, jobs.c.lease_owner, jobs.c.lease_hasta).where(jobs.c.id == job_id)
+        ).first()
+        # El rollback del lote deshizo también el reclamo: solo se cede si otro
+        # worker tiene un lease vigente (lo tomó cuando venció el nuestro)
+        if job is None or (job.lease_owner not in (None, owner) and job.lease_hasta
+                           and job.lease_hasta > datetime.utcnow()):
+            return
+        intentos = job.intentos + 1
+        error = f"{type(exc).__name__}: {exc}"
+        if intentos >= PURGE_MAX_ATTEMPTS:
+            values = {"estado": "error", "lease_hasta": None}
+        else:
+            values = {"estado": "pendiente",
+                      "lease_hasta": datetime.utcnow() + timedelta(seconds=retry_delay(intentos))}
+        conn.execute(
+            update(jobs).where(jobs.c.id == job_id)
+            .values(**values, lease_owner=None, intentos=intentos, error=error)
+        )
+
+def pending_jobs(bind=engine):
+    ahora = datetime.utcnow()
+    with bind.connect() as conn:
+        return conn.execute(
+            select(jobs.c.id)
+            .where(jobs.c.estado.in_(("pendiente", "en_curso")),
+                   or_(jobs.c.lease_hasta.is_(None), jobs.c.lease_hasta < ahora))
+            .order_by(jobs.c.id)
+        ).scalars().all()
+
+class PurgeWorker:
+    """Hilo que procesa los trabajos pendientes; wake() lo despierta tras encolar uno."""
+
+    def __init__(self, bind=engine, poll_seconds=PURGE_POLL_SECONDS):
+        self.bind = bind
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="purge", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_pending(self):
+        for job_id in pending_jobs(self.bind):
+            if self._stop.is_set():
+                break
+            try:
+                run_job(job_id, self.bind, stop=self._stop)
+            except Exception as exc:
+                print(f"❌ Error en la purga {job_id}: {exc}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as exc:
+                # Base caída u otro error transitorio: se reintenta en el siguiente ciclo
+                print(f"⚠️  Purga: {exc}")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+purge_worker = PurgeWorker()
+
+def main():
+    if "--once" in sys.argv:
+        purge_worker.run_pending()
+        print("✅ Trabajos de purga procesados")
+        return
+    purge_worker.start()
+    print(f"🧹 Worker de purga en marcha (lotes de {PURGE_CHUNK_SIZE}, Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        purge_worker.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Consultas compartidas por las rutas sync (main.py) y async (async_routes.py).
+Devuelven sentencias select(), que se ejecutan igual con Session y AsyncSession.
+"""
+from sqlalchemy import and_, delete, insert, or_, select, update
+import models
+from pagination import decode_cursor
+from search import normalize_text, phone_query, normalized_values, prefix_upper_bound
+
+# Columnas de ContactoResponse y UserResponse, en el orden de sus campos
+CONTACTO_COLUMNS = (
+    models.Contacto.id,
+    models.Contacto.nombre,
+    models.Contacto.email,
+    models.Contacto.telefono,
+    models.Contacto.usuario_id,
+)
+USUARIO_COLUMNS = (models.Usuario.id, models.Usuario.email, models.Usuario.nombre, models.Usuario.rol)
+
+def usuarios():
+    return select(*USUARIO_COLUMNS).where(models.Usuario.eliminado_en.is_(None)).order_by(models.Usuario.id)
+
+def contactos_page(usuario_id, cursor=None, limit=50):
+    """
+    Página de contactos ordenada por (nombre, id); pide limit + 1 filas.
+    Devuelve filas de columnas (serialization.page_json), no objetos ORM.
+    """
+    query = select(*CONTACTO_COLUMNS).where(models.Contacto.usuario_id == usuario_id)
+    if cursor:
+        nombre, contacto_id = decode_cursor(cursor, str, int)
+        query = query.where(or_(
+            models.Contacto.nombre > nombre,
+            and_(models.Contacto.nombre == nombre, models.Contacto.id > contacto_id),
+        ))
+    return query.order_by(models.Contacto.nombre, models.Contacto.id).limit(limit + 1)
+
+def contacto(usuario_id, contacto_id):
+    return select(models.Contacto).where(
+        models.Contacto.id == contacto_id,
+        models.Contacto.usuario_id == usuario_id,
+    )
+
+def contactos_version(usuario_id):
+    return select(models.Usuario.contactos_version).where(models.Usuario.id == usuario_id)
+
+def bump_contactos_version(usuario_id):
+    """Ejecutar en la misma transacción que la escritura de contactos."""
+    return (
+        update(models.Usuario)
+        .where(models.Usuario.id == usuario_id)
+        .values(contactos_version=models.Usuario.contactos_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def rehash_password(usuario_id, anterior, nuevo):
+    """Guarda el hash con el costo actual si nadie cambió la contraseña entretanto."""
+    return (
+        update(models.Usuario)
+        .where(models.Usuario.id == usuario_id, models.Usuario.password == anterior)
+        .values(password=nuevo)
+        .execution_options(synchronize_session=False)
+    )
+
+def contacto_cursor_key(contacto):
+    return contacto.nombre, contacto.id
+
+def contactos_export(usuario_id):
+    """Columnas de exportación (sin hidratar objetos ORM), en orden de id; export.py la recorre por lotes."""
+    return (
+        select(*CONTACTO_COLUMNS)
+        .where(models.Contacto.usuario_id == usuario_id)
+        .order_by(models.Contacto.id)
+    )
+
+def contacto_values(contacto, usuario_id):
+    return {
+        "nombre": contacto.nombre,
+        "email": contacto.email,
+        "telefono": contacto.telefono,
+        "usuario_id": usuario_id,
+        **normalized_values(contacto.nombre, contacto.email, contacto.telefono),
+    }
+
+def contacto_response(contacto_id, values):
+    """Campos de ContactoResponse a partir de los valores escritos."""
+    return {"id": contacto_id, **{c.key: values[c.key] for c in CONTACTO_COLUMNS[1:]}}
+
+def supports_returning(db):
+    """UPDATE ... RETURNING: SQLite (3.35+) sí, MySQL no. Funciona con Session y AsyncSession."""
+    return db.get_bind().dialect.update_returning
+
+def update_contacto(usuario_id, contacto_id, values, returning=False):
+    """
+    Un solo UPDATE acotado al dueño. Con returning=True devuelve la fila de
+    ContactoResponse; sin él, rowcount indica si existía (los dialectos MySQL
+    de SQLAlchemy cuentan filas encontradas, no solo las modificadas).
+    """
+    query = (
+        update(models.Contacto)
+        .where(models.Contacto.id == contacto_id, models.Contacto.usuario_id == usuario_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return query.returning(*CONTACTO_COLUMNS) if returning else query
+
+def delete_contacto(usuario_id, contacto_id):
+    """Un solo DELETE acotado al dueño; rowcount indica si existía."""
+    return (
+        delete(models.Contacto)
+        .where(models.Contacto.id == contacto_id, models.Contacto.usuario_id == usuario_id)
+        .execution_options(synchronize_session=False)
+    )
+
+def batch_statement(usuario_id, operacion):
+    """(sentencia, valores escritos) de una operación de POST /contactos/batch."""
+    if operacion.op == "delete":
+        return delete_contacto(usuario_id, operacion.id), None
+    values = contacto_values(operacion.data, usuario_id)
+    if operacion.op == "create":
+        return insert(models.Contacto.__table__).values(**values), values
+    return update_contacto(usuario_id, operacion.id, values), values
+
+def batch_result(index, operacion, result, values):
+    """Resultado por operación; update/delete sin filas afectadas es un 404."""
+    resultado = {"index": index, "op": operacion.op}
+    if operacion.op == "create":
+        return {**resultado, "status": 201, "contacto": contacto_response(result.inserted_primary_key[0], values)}
+    if not result.rowcount:
+        return {**resultado, "status": 404, "detail": "Contacto no encontrado"}
+    if operacion.op == "update":
+        return {**resultado, "status": 200, "contacto": contacto_response(operacion.id, values)}
+    return {**resultado, "status": 200}
+
+def _prefix(column, prefix):
+    # Rango [prefix, siguiente) en lugar de LIKE: usa el índice en MySQL y en SQLite
+    return and_(column >= prefix, column < prefix_upper_bound(prefix))
+
+def contactos_search(usuario_id, q, match="prefix", cursor=None):
+    """
+    Búsqueda en nombre, email y teléfono de un usuario, por grupos de relevancia:
+    0 = el nombre empieza por q, 1 = el email, 2 = el teléfono,
+    3 = q aparece dentro (solo con match="substring").
+    El teléfono solo se busca si q parece un teléfono (ver search.phone_query).
+    Devuelve una lista de (rank, columna de orden, select). Cada select recorre
+    un índice (usuario_id, columna) en orden, así que con LIMIT se detiene
+    pronto y no hay que ordenar todas las coincidencias.
+    """
+    texto = normalize_text(q)
+    digitos = phone_query(q)
+    if not texto:
+        return []
+    c = models.Contacto
+
+    grupos = [(0, c.nombre_norm, _prefix(c.nombre_norm, texto)),
+              (1, c.email_norm, _prefix(c.email_norm, texto))]
+    if digitos:
+        grupos.append((2, c.telefono_norm, _prefix(c.telefono_norm, digitos)))
+    if match == "substring":
+        contiene = [c.nombre_norm.contains(texto, autoescape=True), c.email_norm.contains(texto, autoescape=True)]
+        if digitos:
+            contiene.append(c.telefono_norm.contains(digitos, autoescape=True))
+        grupos.append((3, c.nombre_norm, or_(*contiene)))
+
+    ultimo = decode_cursor(cursor, int, str, int) if cursor else None
+    consultas = []
+    anteriores = []
+    for rank, columna, condicion in grupos:
+        # Cada fila aparece solo en el primer grupo que la incluye
+        excluir = [or_(col.is_(None), ~cond) for col, cond in anteriores]
+        anteriores.append((columna, condicion))
+        if ultimo and rank < ultimo[0]:
+            continue
+        query = select(c).where(c.usuario_id == usuario_id, condicion, *excluir)
+        if ultimo and rank == ultimo[0]:
+            query = query.where(or_(columna > ultimo[1], and_(columna == ultimo[1], c.id > ultimo[2])))
+        consultas.append((rank, columna.key, query.order_by(columna, c.id)))
+    return consultas
+
+def search_cursor_key(row):
+    rank, columna, contacto = row
+    return rank, getattr(contacto, columna), contacto.id
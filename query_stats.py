@@ -0,0 +1,115 @@
+"""
+Instrumentación de SQL por petición.
+
+instrument(engine) engancha before/after_cursor_execute al motor. Mientras
+QueryStatsMiddleware atiende una petición, cada sentencia suma al contador y
+al tiempo de base de datos de esa petición (un contextvar; las rutas sync lo
+heredan en el threadpool). Al responder:
+  - con SERVER_TIMING=1 se añade `Server-Timing: db;desc="consultas: N";dur=ms`
+    (lo que corrió antes de empezar la respuesta; el cuerpo en streaming no
+    cuenta). Apagado por defecto: revela a cualquier cliente cuánto trabaja
+    la base en cada ruta
+  - si la misma sentencia se repitió más de SQL_REPEAT_THRESHOLD veces, se
+    registra como posible N+1
+
+Las sentencias más lentas que SLOW_QUERY_MS se registran siempre, con la
+forma de los parámetros (tipos, nunca valores). Con SQL_TRACE=0 no se
+registra ningún evento ni se añade el middleware.
+"""
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from sqlalchemy import event
+
+SQL_TRACE = os.getenv("SQL_TRACE", "1").lower() in ("1", "true", "yes")
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+
+logger = logging.getLogger("agenda.sql")
+
+class RequestQueries:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold=SQL_REPEAT_THRESHOLD):
+        return [(statement, n) for statement, n in self.statements.most_common() if n > threshold]
+
+    def server_timing(self):
+        return f'db;desc="consultas: {self.count}";dur={self.seconds * 1000:.2f}'
+
+_current = ContextVar("request_queries", default=None)
+
+def current():
+    """Estadísticas de la petición en curso (None fuera de una petición)."""
+    return _current.get()
+
+def parameter_shape(parameters, executemany=False):
+    """Tipos de los parámetros, sin sus valores: {"id_1": "int"} o "500 × {...}"."""
+    if executemany:
+        return f"{len(parameters)} × {parameter_shape(parameters[0]) if parameters else '{}'}"
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] += 1
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning("Consulta lenta (%.1f ms): %s | parámetros: %s",
+                       elapsed * 1000, " ".join(statement.split()), parameter_shape(parameters, executemany))
+
+def instrument(engine):
+    """Engancha el motor (o el sync_engine de uno async); no hace nada con SQL_TRACE=0."""
+    if not SQL_TRACE:
+        return engine
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before)
+    event.listen(sync_engine, "after_cursor_execute", _after)
+    return engine
+
+class QueryStatsMiddleware:
+    def __init__(self, app, repeat_threshold=SQL_REPEAT_THRESHOLD, server_timing=SERVER_TIMING):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestQueries()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            repeated = stats.repeated(self.repeat_threshold)
+            if repeated:
+                route = scope.get("route")
+                path = route.path if route is not None else scope["path"]
+                for statement, n in repeated:
+                    logger.warning("Posible N+1 en %s %s: %d× %s", scope["method"], path, n, " ".join(statement.split()))
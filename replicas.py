@@ -0,0 +1,109 @@
+"""
+Enrutamiento de lecturas a réplicas.
+
+Las rutas de solo lectura piden su motor a ReplicaRouter.engine_for_read(key).
+Se lee del primario si no hay réplicas o si `key` (el usuario, o el namespace
+que se escribió) tuvo una escritura hace menos de sticky_seconds: así quien
+acaba de escribir lee lo que escribió aunque las réplicas vayan atrasadas.
+En otro caso se elige una réplica por round-robin o por la que tenga menos
+conexiones en uso.
+
+sticky_seconds debe ser mayor que el retraso de replicación esperado. Las
+marcas de escritura viven en memoria del proceso; con varios workers hace
+falta un sticky_store compartido (get/set(ex=) como redis-py), y
+check_workers() impide arrancar sin él.
+"""
+import itertools
+import math
+import threading
+import time
+from sqlalchemy import event
+
+BALANCES = ("round_robin", "least_connections")
+
+class ReplicaRouter:
+    def __init__(self, primary, replicas=(), balance="round_robin", sticky_seconds=5.0, sticky_store=None):
+        if balance not in BALANCES:
+            raise ValueError(f"Balanceo desconocido: {balance} (usa {', '.join(BALANCES)})")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.balance = balance
+        self.sticky_seconds = sticky_seconds
+        self.sticky_store = sticky_store
+        self._recent = {}  # key -> expira (monotonic)
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._stats = {"primary": 0, "sticky": 0, "replicas": [0] * len(self.replicas)}
+        # Conexiones en uso por réplica, contadas con eventos del pool (sirve también con NullPool)
+        self.in_use = [0] * len(self.replicas)
+        for index, replica in enumerate(self.replicas):
+            self._track(getattr(replica, "sync_engine", replica), index)
+
+    def _track(self, engine, index):
+        def checkout(*args):
+            with self._lock:
+                self.in_use[index] += 1
+
+        def checkin(*args):
+            with self._lock:
+                self.in_use[index] -= 1
+
+        event.listen(engine, "checkout", checkout)
+        event.listen(engine, "checkin", checkin)
+
+    def check_workers(self, workers):
+        """Con réplicas y varios workers, sin sticky_store otro worker leería de una réplica atrasada."""
+        if self.replicas and self.sticky_store is None and workers > 1:
+            raise RuntimeError(f"Réplicas de lectura con {workers} workers: las marcas de escritura "
+                               "deben compartirse (CACHE_BACKEND=redis)")
+
+    def mark_write(self, key):
+        """Las lecturas de `key` van al primario durante sticky_seconds."""
+        if not self.replicas or key is None or self.sticky_seconds <= 0:
+            return
+        if self.sticky_store is not None:
+            self.sticky_store.set(f"sticky:{key}", 1, ex=max(1, math.ceil(self.sticky_seconds)))
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._recent[key] = now + self.sticky_seconds
+            if len(self._recent) > 10000:
+                self._recent = {k: t for k, t in self._recent.items() if t > now}
+
+    def _sticky(self, key):
+        if key is None:
+            return False
+        if self.sticky_store is not None:
+            return self.sticky_store.get(f"sticky:{key}") is not None
+        expires = self._recent.get(key)
+        return expires is not None and expires > time.monotonic()
+
+    def engine_for_read(self, key=None):
+        if not self.replicas:
+            self._count("primary")
+            return self.primary
+        if self._sticky(key):
+            self._count("sticky")
+            return self.primary
+        if self.balance == "least_connections":
+            index = min(range(len(self.replicas)), key=self.in_use.__getitem__)
+        else:
+            index = next(self._turn) % len(self.replicas)
+        with self._lock:
+            self._stats["replicas"][index] += 1
+        return self.replicas[index]
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = {"primary": self._stats["primary"], "sticky": self._stats["sticky"],
+                     "replicas": list(self._stats["replicas"])}
+        return {
+            "balance": self.balance,
+            "sticky_seconds": self.sticky_seconds,
+            "reads": stats,
+            "replicas_in_use": list(self.in_use),
+        }
@@ -0,0 +1,67 @@
+from pydantic import BaseModel, model_validator
+from typing import List, Literal, Optional
+
+# Schemas (estructuras de datos)
+
+class UserLogin(BaseModel):
+    email: str
+    password: str
+
+class UserCreate(BaseModel):
+    email: str
+    password: str
+    nombre: str
+    rol: str = "user"
+
+class UserResponse(BaseModel):
+    id: int
+    email: str
+    nombre: str
+    rol: str
+
+    class Config:
+        from_attributes = True
+
+class ContactoCreate(BaseModel):
+    nombre: str
+    email: Optional[str] = None
+    telefono: Optional[str] = None
+
+class ContactoResponse(BaseModel):
+    id: int
+    nombre: str
+    email: Optional[str]
+    telefono: Optional[str]
+    usuario_id: int
+
+    class Config:
+        from_attributes = True
+
+class ContactoPage(BaseModel):
+    items: List[ContactoResponse]
+    next_cursor: Optional[str] = None
+
+# Operación de POST /contactos/batch: create lleva data; update, id y data; delete, id
+class ContactoOperacion(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: Optional[ContactoCreate] = None
+
+    @model_validator(mode="after")
+    def _campos_requeridos(self):
+        if self.op != "create" and self.id is None:
+            raise ValueError(f"'{self.op}' requiere id")
+        if self.op != "delete" and self.data is None:
+            raise ValueError(f"'{self.op}' requiere data")
+        return self
+
+class ContactoOperacionResultado(BaseModel):
+    index: int
+    op: str
+    status: int
+    contacto: Optional[ContactoResponse] = None
+    detail: Optional[str] = None
+
+class ContactoBatchResponse(BaseModel):
+    committed: bool
+    results: List[ContactoOperacionResultado]
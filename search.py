@@ -0,0 +1,45 @@
+"""
+Normalización para la búsqueda de contactos. Las columnas *_norm de
+models.Contacto guardan estos valores y tienen índices B-tree por usuario,
+así que una búsqueda por prefijo es un rango sobre el índice.
+"""
+import unicodedata
+
+def normalize_text(value):
+    """Minúsculas y sin acentos ("José" -> "jose")."""
+    if value is None:
+        return None
+    value = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in value if not unicodedata.combining(c)).lower().strip()
+
+def normalize_phone(value):
+    """Solo dígitos ("+52 (55) 1234" -> "52551234")."""
+    if value is None:
+        return None
+    return "".join(c for c in value if c.isdigit()) or None
+
+# Una búsqueda solo mira el teléfono si q parece uno: dígitos y separadores
+# habituales, sin letras ("bob4" y "Calle 5" no son teléfonos)
+PHONE_QUERY_CHARS = set("0123456789 +()-.")
+PHONE_QUERY_MIN_DIGITS = 3
+
+def phone_query(value):
+    """Dígitos de q si parece un teléfono ("+52 (55) 1234" -> "52551234"); si no, None."""
+    digitos = normalize_phone(value)
+    if not digitos or len(digitos) < PHONE_QUERY_MIN_DIGITS or not set(value) <= PHONE_QUERY_CHARS:
+        return None
+    return digitos
+
+def normalized_values(nombre, email, telefono):
+    return {
+        "nombre_norm": normalize_text(nombre),
+        "email_norm": normalize_text(email),
+        "telefono_norm": normalize_phone(telefono),
+    }
+
+def prefix_upper_bound(prefix):
+    """
+    Menor cadena mayor que todas las que empiezan por `prefix`, en orden
+    binario (las columnas *_norm usan utf8mb4_bin en MySQL).
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos para desarrollo y benchmarks.
+
+Crea N usuarios con M contactos cada uno (y opcionalmente personas de
+agenda_fastapi) con nombres, emails y teléfonos realistas. Con la misma
+--semilla genera siempre los mismos datos. Las contraseñas se hashean una
+sola vez y el hash se reutiliza (--hash unico hashea cada usuario, en
+paralelo entre procesos), y las filas entran por lotes con executemany
+(INSERT multi-fila en MySQL).
+
+    python seed_data.py --usuarios 1000 --contactos 1000         # 1 M de contactos
+    python seed_data.py --usuarios 10 --contactos 50 --personas 5000 --semilla 7
+
+Los emails de usuario llevan el número de usuario (a partir de --desde), así
+que para sembrar más sobre una base ya sembrada hay que usar otro --desde.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from sqlalchemy import func, select
+import models
+from database import engine
+from search import normalize_text
+
+NOMBRES = (
+    "José", "María", "Juan", "Guadalupe", "Luis", "Ana", "Carlos", "Sofía", "Jorge", "Fernanda",
+    "Miguel", "Valeria", "Alejandro", "Daniela", "Ricardo", "Camila", "Fernando", "Lucía", "Andrés", "Paola",
+    "Javier", "Mariana", "Raúl", "Ximena", "Héctor", "Regina", "Óscar", "Renata", "Iván", "Andrea",
+    "Sergio", "Natalia", "Eduardo", "Gabriela", "Roberto", "Mónica", "Diego", "Verónica", "Ángel", "Patricia",
+)
+APELLIDOS = (
+    "García", "Hernández", "Martínez", "López", "González", "Pérez", "Rodríguez", "Sánchez", "Ramírez", "Cruz",
+    "Flores", "Gómez", "Morales", "Vázquez", "Jiménez", "Reyes", "Díaz", "Torres", "Gutiérrez", "Ruiz",
+    "Mendoza", "Aguilar", "Ortiz", "Moreno", "Castillo", "Romero", "Álvarez", "Méndez", "Chávez", "Rivera",
+    "Juárez", "Ramos", "Domínguez", "Herrera", "Medina", "Castro", "Vargas", "Guzmán", "Velázquez", "Muñoz",
+)
+DOMINIOS = ("gmail.com", "hotmail.com", "outlook.com", "yahoo.com.mx", "icloud.com", "empresa.com.mx", "uni.edu.mx")
+LADAS = ("55", "33", "81", "222", "442", "477", "614", "664", "998", "999")
+
+# Las listas son finitas: cada nombre se normaliza una sola vez
+_norm = lru_cache(maxsize=None)(normalize_text)
+
+@lru_cache(maxsize=None)
+def _slug(texto):
+    # "José Pérez" -> "jose.perez"
+    return _norm(texto).replace(" ", ".")
+
+def _persona(rng):
+    nombre, apellido = rng.choice(NOMBRES), rng.choice(APELLIDOS)
+    return nombre, apellido, _slug(f"{nombre} {apellido}")
+
+def _telefono(rng):
+    """(telefono, telefono_norm): "+52 55 1234 5678" y sus dígitos."""
+    lada = rng.choice(LADAS)
+    resto = f"{rng.randrange(10 ** (10 - len(lada))):0{10 - len(lada)}d}"
+    corte = len(resto) - 4
+    return f"+52 {lada} {resto[:corte]} {resto[corte:]}", f"52{lada}{resto}"
+
+def generar_contactos(rng, usuario_id, cantidad):
+    """Contactos de un usuario; ~10% sin email y ~5% sin teléfono."""
+    filas = []
+    for _ in range(cantidad):
+        nombre, apellido, slug = _persona(rng)
+        completo = f"{nombre} {apellido}"
+        email = f"{slug}{rng.randrange(1000)}@{rng.choice(DOMINIOS)}" if rng.random() >= 0.10 else None
+        telefono, telefono_norm = _telefono(rng) if rng.random() >= 0.05 else (None, None)
+        filas.append({
+            "nombre": completo, "email": email, "telefono": telefono, "usuario_id": usuario_id,
+            # Equivalen a search.normalized_values: el email ya es ASCII en minúsculas
+            "nombre_norm": _norm(completo), "email_norm": email, "telefono_norm": telefono_norm,
+        })
+    return filas
+
+def _hash(password):
+    from auth import get_password_hash
+    return get_password_hash(password)
+
+def hashes(password, cantidad, modo, procesos):
+    """Un hash compartido, o uno por usuario (sal distinta) repartido entre procesos."""
+    if modo == "compartido":
+        return [_hash(password)] * cantidad
+    procesos = procesos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(_hash, [password] * cantidad, chunksize=max(1, cantidad // (procesos * 4))))
+
+class Progreso:
+    def __init__(self, etiqueta, total):
+        self.etiqueta = etiqueta
+        self.total = total
+        self.hechas = 0
+        self.inicio = time.perf_counter()
+
+    def avanzar(self, filas):
+        self.hechas += filas
+        segundos = time.perf_counter() - self.inicio
+        tasa = self.hechas / segundos if segundos else 0
+        print(f"\r   {self.etiqueta}: {self.hechas:,}/{self.total:,} ({tasa:,.0f} filas/s)", end="", file=sys.stderr)
+
+    def terminar(self):
+        segundos = time.perf_counter() - self.inicio
+        print(file=sys.stderr)
+        return segundos
+
+def _rapido(conn):
+    # Solo SQLite: sin fsync por transacción mientras se siembra
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("PRAGMA synchronous = OFF")
+
+def sembrar_usuarios(bind, usuarios, desde=0, semilla=0, password="password123", modo_hash="compartido",
+                     procesos=None, admins=1):
+    """Inserta los usuarios y devuelve sus ids en orden."""
+    rng = random.Random(f"usuarios:{semilla}")
+    tabla = models.Usuario.__table__
+    passwords = hashes(password, usuarios, modo_hash, procesos)
+    filas = []
+    for i in range(usuarios):
+        nombre, apellido, slug = _persona(rng)
+        filas.append({"email": f"{slug}.{desde + i}@{rng.choice(DOMINIOS)}", "password": passwords[i],
+                      "nombre": f"{nombre} {apellido}", "rol": "admin" if i < admins else "user"})
+    with bind.begin() as conn:
+        _rapido(conn)
+        ultimo = conn.execute(select(func.max(tabla.c.id))).scalar() or 0
+        if filas:
+            conn.execute(tabla.insert(), filas)
+        return list(conn.execute(select(tabla.c.id).where(tabla.c.id > ultimo).order_by(tabla.c.id)).scalars())
+
+def sembrar_contactos(bind, usuario_ids, por_usuario, semilla=0, batch_size=10000, progreso=True):
+    """Inserta por_usuario contactos para cada usuario, en lotes de batch_size filas."""
+    rng = random.Random(f"contactos:{semilla}")
+    tabla = models.Contacto.__table__
+    avance = Progreso("contactos", len(usuario_ids) * por_usuario) if progreso else None
+    with bind.begin() as conn:
+        _rapido(conn)
+        lote = []
+        for usuario_id in usuario_ids:
+            lote += generar_contactos(rng, usuario_id, por_usuario)
+            while len(lote) >= batch_size:
+                conn.execute(tabla.insert(), lote[:batch_size])
+                del lote[:batch_size]
+                if avance:
+                    avance.avanzar(batch_size)
+        if lote:
+            conn.execute(tabla.insert(), lote)
+            if avance:
+                avance.avanzar(len(lote))
+    return avance.terminar() if avance else None
+
+def sembrar_personas(cantidad, desde=0, semilla=0, batch_size=10000, progreso=True):
+    """Personas de agenda_fastapi (su propia base y motor)."""
+    from agenda_fastapi import models as agenda_models
+    from agenda_fastapi.database import engine as agenda_engine
+
+    agenda_models.Base.metadata.create_all(bind=agenda_engine)
+    rng = random.Random(f"personas:{semilla}")
+    tabla = agenda_models.Persona.__table__
+    avance = Progreso("personas", cantidad) if progreso else None
+    with agenda_engine.begin() as conn:
+        _rapido(conn)
+        for inicio in range(0, cantidad, batch_size):
+            lote = []
+            for i in range(inicio, min(inicio + batch_size, cantidad)):
+                nombre, apellido, slug = _persona(rng)
+                lote.append({"nombre": nombre, "apellido": apellido, "email": f"{slug}.{desde + i}@{rng.choice(DOMINIOS)}",
+                             "telefono": _telefono(rng)[0]})
+            conn.execute(tabla.insert(), lote)
+            if avance:
+                avance.avanzar(len(lote))
+    return avance.terminar() if avance else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--contactos", type=int, default=100, help="contactos por usuario")
+    parser.add_argument("--personas", type=int, default=0, help="personas de agenda_fastapi")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--desde", type=int, default=0, help="número del primer usuario/persona (emails únicos)")
+    parser.add_argument("--password", default="password123", help="contraseña de todos los usuarios")
+    parser.add_argument("--hash", choices=("compartido", "unico"), default="compartido",
+                        help="un hash para todos, o uno por usuario en paralelo")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos para --hash unico")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    import migrate
+    migrate.upgrade()
+
+    inicio = time.perf_counter()
+    usuario_ids = sembrar_usuarios(engine, args.usuarios, args.desde, args.semilla, args.password,
+                                   args.hash, args.procesos)
+    print(f"✅ {len(usuario_ids):,} usuarios ({time.perf_counter() - inicio:.1f} s, contraseña: {args.password})")
+
+    segundos = sembrar_contactos(engine, usuario_ids, args.contactos, args.semilla, args.batch_size)
+    total = len(usuario_ids) * args.contactos
+    print(f"✅ {total:,} contactos en {segundos:.1f} s ({total / segundos if segundos else 0:,.0f} filas/s)")
+
+    if args.personas:
+        segundos = sembrar_personas(args.personas, args.desde, args.semilla, args.batch_size)
+        print(f"✅ {args.personas:,} personas en {segundos:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Serialización rápida de listados.
+
+Las rutas de listado seleccionan solo las columnas de la respuesta (filas, no
+objetos ORM) y las codifican directamente, sin validar cada fila con Pydantic:
+son datos que ya pasaron la validación al escribirse. La salida es la misma
+que la de model_dump_json() del esquema si las columnas van en el orden de
+sus campos.
+
+Usa orjson si está instalado; si no, json de la biblioteca estándar.
+"""
+import json
+from datetime import date, datetime
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} no es serializable a JSON")
+
+def dumps(obj):
+    """JSON compacto en bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+def rows_as_dicts(rows):
+    """Filas de select(columnas) como dicts, con las llaves en el orden de las columnas."""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+def rows_json(rows):
+    return dumps(rows_as_dicts(rows))
+
+def page_json(page):
+    """Página de build_page() cuyos items son filas de columnas."""
+    return dumps({"items": rows_as_dicts(page["items"]), "next_cursor": page["next_cursor"]})
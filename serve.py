@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Servidor de producción: N procesos uvicorn que comparten un mismo socket.
+
+El proceso padre importa la app una sola vez (preload) y hace fork de los
+workers, que heredan el código ya cargado. Cada worker crea sus propias
+conexiones después del fork (el lifespan comprueba el esquema y calienta el
+pool en cada uno). Un worker que atiende --max-requests peticiones (más un
+jitter aleatorio, para que no se reinicien todos a la vez) termina sus
+peticiones en curso y el padre lo reemplaza.
+
+    python serve.py                                       # main:app, un worker por CPU
+    python serve.py --workers 4 --max-requests 10000
+    python serve.py --app agenda_fastapi.main:app --port 8001
+
+Señales del proceso padre:
+  SIGTERM / SIGINT  apagado ordenado: los workers dejan de aceptar conexiones
+                    y tienen --graceful-timeout segundos para terminar
+  SIGHUP            recicla todos los workers sin cerrar el socket
+
+Sin fork (Windows) se ejecuta un solo proceso, sin reciclado.
+
+El estado en memoria es de cada worker: /metrics, la caché de tokens
+verificados, la admisión de /login, el pool de bcrypt y /stats/* describen
+solo al worker que atendió la petición. Cada scrape de /metrics puede caer
+en un worker distinto y un worker reciclado empieza de cero, así que los
+contadores no son monótonos: agrégalos por worker (o usa un solo worker).
+"""
+import argparse
+import logging
+import os
+import random
+import signal
+import sys
+import time
+
+import uvicorn
+
+logger = logging.getLogger("uvicorn.error")
+
+# Código de salida de un worker cuya app no pudo arrancar (p. ej. esquema desactualizado)
+WORKER_BOOT_ERROR = 3
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.getenv("APP_MODULE", "main:app"))
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=_env_int("PORT", 8000))
+    parser.add_argument("--workers", type=int, default=_env_int("WEB_CONCURRENCY", os.cpu_count() or 1))
+    parser.add_argument("--max-requests", type=int, default=_env_int("MAX_REQUESTS", 0),
+                        help="reciclar cada worker tras N peticiones (0 = nunca)")
+    parser.add_argument("--max-requests-jitter", type=int, default=_env_int("MAX_REQUESTS_JITTER", 0))
+    parser.add_argument("--graceful-timeout", type=int, default=_env_int("GRACEFUL_TIMEOUT", 30))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    parser.add_argument("--no-access-log", action="store_true")
+    return parser.parse_args(argv)
+
+
+def reset_pools():
+    """
+    Descarta en el worker los pools heredados del padre sin cerrar sus
+    conexiones (siguen siendo del padre); cada worker abre las suyas.
+    """
+    for nombre in ("database", "agenda_fastapi.database"):
+        module = sys.modules.get(nombre)
+        if module is not None:
+            for engine in module.all_engines():
+                engine.dispose(close=False)
+
+
+class Arbiter:
+    """Mantiene `workers` procesos vivos sobre el socket compartido."""
+
+    def __init__(self, config, sock, workers, max_requests=0, max_requests_jitter=0, graceful_timeout=30):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.children = set()  # pids de los workers
+        self.stopping = False
+        self.recycle = False
+        self.boot_error = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._hup)
+        logger.info("Supervisor [%d] con %d workers en %s:%d", os.getpid(), self.workers,
+                    self.config.host, self.config.port)
+        try:
+            while not self.stopping:
+                if self.recycle:
+                    self.recycle = False
+                    self._signal_all(signal.SIGTERM)
+                self._reap()
+                while len(self.children) < self.workers and not self.stopping:
+                    self._spawn()
+                time.sleep(0.2)
+        finally:
+            self._shutdown()
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+
+    def _hup(self, signum, frame):
+        self.recycle = True
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return
+        # Worker
+        code = 1
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            random.seed()
+            reset_pools()
+            if self.max_requests:
+                self.config.limit_max_requests = self.max_requests + random.randint(0, self.max_requests_jitter)
+            server = uvicorn.Server(self.config)
+            server.run(sockets=[self.sock])
+            code = 0 if server.started else WORKER_BOOT_ERROR
+        except BaseException:
+            logger.exception("Error en el worker [%d]", os.getpid())
+        finally:
+            os._exit(code)
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            self.children.discard(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if code == WORKER_BOOT_ERROR:
+                # Reiniciarlo fallaría igual: se detiene todo
+                logger.error("El worker [%d] no pudo arrancar la app; deteniendo el servidor", pid)
+                self.stopping = True
+                self.boot_error = True
+            elif not self.stopping:
+                logger.info("Worker [%d] terminó (código %d); reemplazándolo", pid, code)
+
+    def _signal_all(self, signum):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                self.children.discard(pid)
+
+    def _shutdown(self):
+        self._signal_all(signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        if self.children:
+            logger.warning("Forzando la salida de %d workers", len(self.children))
+            self._signal_all(signal.SIGKILL)
+            for pid in list(self.children):
+                os.waitpid(pid, 0)
+            self.children.clear()
+        self.sock.close()
+        logger.info("Supervisor [%d] detenido", os.getpid())
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = max(1, args.workers) if hasattr(os, "fork") else 1
+    # La app ajusta el estado por proceso (caché local, réplicas) al número de workers
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    # bcrypt usa un pool de hilos por worker: repartir los núcleos entre los workers
+    os.environ.setdefault("HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+    config = uvicorn.Config(
+        args.app, host=args.host, port=args.port, log_level=args.log_level,
+        access_log=not args.no_access_log, timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=args.max_requests or None,
+    )
+    # Preload: se importa la app en el padre, antes del fork
+    config.load()
+    sock = config.bind_socket()
+
+    if not hasattr(os, "fork"):
+        uvicorn.Server(config).run(sockets=[sock])
+        return
+
+    arbiter = Arbiter(config, sock, workers, args.max_requests, args.max_requests_jitter, args.graceful_timeout)
+    arbiter.run()
+    if arbiter.boot_error:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,25 @@ Script para configurar la base de datos MySQL
 Ejecuta este script para crear las tablas automáticamente
 """
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 import sys
-from database import DATABASE_URL, Base
+from database import DATABASE_URL, SessionLocal, engine, make_engine, server_url
+import migrate
 import models
 from auth import get_password_hash
 
 def create_database():
     """Crear la base de datos si no existe"""
     try:
-        # Conectar sin especificar la base de datos
-        base_url = DATABASE_URL.split('/')[:-1]
-        base_url = '/'.join(base_url)
-        engine = create_engine(base_url)
+        # Conectar sin especificar la base de datos (conexión de un solo uso)
+        server_engine = make_engine(server_url(), pooled=False)
         
-        with engine.connect() as conn:
+        with server_engine.connect() as conn:
             conn.execute(text("CREATE DATABASE IF NOT EXISTS sistema_python"))
             print("✅ Base de datos 'sistema_python' creada/verificada")
         
-        engine.dispose()
+        server_engine.dispose()
         return True
     except Exception as e:
         print(f"❌ Error creando base de datos: {e}")
@@ -32,13 +31,10 @@ def create_database():
 def create_tables():
     """Crear las tablas usando SQLAlchemy"""
     try:
-        engine = create_engine(DATABASE_URL)
-        Base.metadata.create_all(bind=engine)
+        migrate.upgrade(engine)
         print("✅ Tablas creadas correctamente")
         
         # Crear usuario admin por defecto
-        from sqlalchemy.orm import sessionmaker
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
         db = SessionLocal()
         
         try:
@@ -66,7 +62,6 @@ def create_tables():
         finally:
             db.close()
             
-        engine.dispose()
         return True
         
     except Exception as e:
@@ -76,11 +71,9 @@ def create_tables():
 def verify_connection():
     """Verificar la conexión a MySQL"""
     try:
-        engine = create_engine(DATABASE_URL)
         with engine.connect() as conn:
             result = conn.execute(text("SELECT 1"))
             print("✅ Conexión a MySQL exitosa")
-        engine.dispose()
         return True
     except OperationalError as e:
         print(f"❌ Error de conexión a MySQL: {e}")